@@ -8,6 +8,7 @@ import sys
 # Add the app directory to the path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
 
+from app.core.config import settings
 from app.core.database import Base
 # Import all models to ensure they're registered with SQLAlchemy
 from app.models.analytics import Sale, Customer, Expense
@@ -16,6 +17,9 @@ from app.models.analytics import Sale, Customer, Expense
 # access to the values within the .ini file in use.
 config = context.config
 
+# Migrate the database the app is configured for (DATABASE_URL / .env), not the ini default
+config.set_main_option("sqlalchemy.url", settings.database_url.replace("%", "%%"))
+
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
 if config.config_file_name is not None:
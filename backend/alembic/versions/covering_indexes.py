@@ -0,0 +1,44 @@
+"""Add covering indexes for the analytics query shapes
+
+Revision ID: cover_001
+Revises: suggest_001
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'cover_001'
+down_revision = 'suggest_001'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """
+    Covering Index Strategy:
+    1. Date windows aggregating amount_cents by day/product (revenue metrics, trends,
+       top-product partials, period comparison) -> (date, product_id, amount_cents)
+    2. GROUP BY customer_id over identified customers (repeat customers, customer
+       summary) -> (customer_id, date, amount_cents), partial WHERE customer_id IS NOT NULL
+    3. Expense totals by window and category -> (date, category, amount_cents)
+    4. PostgreSQL INCLUDEs id so COUNT(id) stays an index-only scan; SQLite indexes
+       carry the rowid (= id) already
+    5. Check plans with: python -m app.services.index_advisor
+    """
+    # IF NOT EXISTS: a sales table partitioned with the current layout already has these
+    op.create_index('ix_sales_date_product_amount', 'sales', ['date', 'product_id', 'amount_cents'],
+                    postgresql_include=['id'], if_not_exists=True)
+    op.create_index('ix_sales_customer_date_amount', 'sales', ['customer_id', 'date', 'amount_cents'],
+                    postgresql_include=['id'],
+                    postgresql_where=sa.text('customer_id IS NOT NULL'),
+                    sqlite_where=sa.text('customer_id IS NOT NULL'),
+                    if_not_exists=True)
+    op.create_index('ix_expenses_date_category_amount', 'expenses', ['date', 'category', 'amount_cents'],
+                    if_not_exists=True)
+
+def downgrade():
+    """Remove covering indexes"""
+    op.drop_index('ix_expenses_date_category_amount', table_name='expenses')
+    op.drop_index('ix_sales_customer_date_amount', table_name='sales')
+    op.drop_index('ix_sales_date_product_amount', table_name='sales')
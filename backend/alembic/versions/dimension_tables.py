@@ -0,0 +1,74 @@
+"""Add product and category dimension tables
+
+Revision ID: dims_001
+Revises: perf_001
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'dims_001'
+down_revision = 'perf_001'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """
+    Dimension Strategy:
+    1. Distinct product/category names move to small tables with integer ids
+    2. Sales reference them by integer key so GROUP BY works on fixed-width values
+    3. Existing rows are backfilled from their free-text names
+    """
+    op.create_table('products',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_table('categories',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    
+    # Batch mode so the foreign keys also work on SQLite
+    with op.batch_alter_table('sales') as batch_op:
+        batch_op.add_column(sa.Column('product_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('category_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_sales_product_id', 'products', ['product_id'], ['id'])
+        batch_op.create_foreign_key('fk_sales_category_id', 'categories', ['category_id'], ['id'])
+    
+    # Backfill dimensions and surrogate keys from existing sales
+    op.execute(
+        "INSERT INTO products (name) "
+        "SELECT DISTINCT product_name FROM sales WHERE product_name IS NOT NULL"
+    )
+    op.execute(
+        "INSERT INTO categories (name) "
+        "SELECT DISTINCT category FROM sales WHERE category IS NOT NULL"
+    )
+    op.execute(
+        "UPDATE sales SET product_id = "
+        "(SELECT products.id FROM products WHERE products.name = sales.product_name)"
+    )
+    op.execute(
+        "UPDATE sales SET category_id = "
+        "(SELECT categories.id FROM categories WHERE categories.name = sales.category) "
+        "WHERE category IS NOT NULL"
+    )
+    
+    op.create_index(op.f('ix_sales_product_id'), 'sales', ['product_id'], unique=False)
+
+def downgrade():
+    """Remove dimension tables and surrogate keys"""
+    op.drop_index(op.f('ix_sales_product_id'), table_name='sales')
+    with op.batch_alter_table('sales') as batch_op:
+        batch_op.drop_constraint('fk_sales_category_id', type_='foreignkey')
+        batch_op.drop_constraint('fk_sales_product_id', type_='foreignkey')
+        batch_op.drop_column('category_id')
+        batch_op.drop_column('product_id')
+    op.drop_table('categories')
+    op.drop_table('products')
@@ -0,0 +1,51 @@
+"""Drop redundant indexes
+
+Revision ID: dedupe_001
+Revises: cover_001
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'dedupe_001'
+down_revision = 'cover_001'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns) - recreated as-is on downgrade
+REDUNDANT_INDEXES = [
+    # perf_001 copies of indexes the initial migration already created from the model
+    ('idx_sales_date', 'sales', ['date']),
+    ('idx_sales_customer_id', 'sales', ['customer_id']),
+    ('idx_sales_date_customer', 'sales', ['date', 'customer_id']),
+    ('idx_expenses_date', 'expenses', ['date']),
+    # Secondary indexes on primary keys
+    ('ix_sales_id', 'sales', ['id']),
+    ('ix_expenses_id', 'expenses', ['id']),
+    # Served by the covering indexes from cover_001 (customer_id = ? implies NOT NULL,
+    # so equality lookups use the partial index)
+    ('ix_sales_customer_id', 'sales', ['customer_id']),
+    ('idx_expenses_category', 'expenses', ['category']),
+    # No query filters sales on the free-text name since the products dimension
+    ('idx_sales_product_name', 'sales', ['product_name']),
+]
+
+def upgrade():
+    """
+    Write Amplification Strategy:
+    1. One model set (models/analytics.py) owns every table and its indexes
+    2. Every sales insert maintained up to 11 secondary indexes - drop duplicates,
+       primary-key copies and indexes the covering indexes make redundant
+    3. sales keeps: ix_sales_date (date, id order for pages/exports), ix_sales_date_customer,
+       ix_sales_product_id (foreign key), and the two covering indexes
+    4. Verify with: python -m app.services.index_advisor
+    """
+    for name, table, _ in REDUNDANT_INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
+
+def downgrade():
+    """Recreate the dropped indexes"""
+    for name, table, columns in reversed(REDUNDANT_INDEXES):
+        op.create_index(name, table, columns, if_not_exists=True)
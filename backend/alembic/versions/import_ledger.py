@@ -0,0 +1,52 @@
+"""Add the import ledger (file and chunk content hashes)
+
+Revision ID: ledger_001
+Revises: upsert_001
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'ledger_001'
+down_revision = 'upsert_001'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """
+    Import Ledger Strategy:
+    1. import_files: one row per deduplicating import - (kind, content hash) is unique,
+       so an identical file is answered with one index lookup
+    2. import_chunks: (kind, chunk hash) of every chunk of rows imported - later files
+       only process chunks missing here
+    3. See services/import_ledger.py
+    """
+    op.create_table('import_files',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('content_hash', sa.String(32), nullable=False),
+        sa.Column('size_bytes', sa.Integer(), nullable=False),
+        sa.Column('total_rows', sa.Integer(), nullable=False),
+        sa.Column('chunks', sa.Integer(), nullable=False),
+        sa.Column('chunks_processed', sa.Integer(), nullable=False),
+        sa.Column('records_written', sa.Integer(), nullable=False),
+        sa.Column('imported_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ux_import_files_kind_hash', 'import_files', ['kind', 'content_hash'], unique=True)
+    op.create_table('import_chunks',
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('chunk_hash', sa.String(32), nullable=False),
+        sa.Column('file_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['file_id'], ['import_files.id']),
+        sa.PrimaryKeyConstraint('kind', 'chunk_hash')
+    )
+
+def downgrade():
+    """Remove the import ledger"""
+    op.drop_table('import_chunks')
+    op.drop_index('ux_import_files_kind_hash', table_name='import_files')
+    op.drop_table('import_files')
@@ -0,0 +1,90 @@
+"""Add row hashes and unique indexes for deduplicated re-imports
+
+Revision ID: upsert_001
+Revises: dedupe_001
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+import hashlib
+from collections import Counter
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'upsert_001'
+down_revision = 'dedupe_001'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 5000
+# Typed so dates hash as datetimes, exactly as imports see them
+FIELD_TYPES = {'date': sa.DateTime, 'amount_cents': sa.Integer}
+
+# Frozen copy of the row hash in services/upserts.py as of this revision - the
+# migration must hash the same way however that module changes later
+SALE_HASH_FIELDS = ('date', 'product_name', 'amount_cents', 'customer_id', 'category')
+EXPENSE_HASH_FIELDS = ('date', 'description', 'amount_cents', 'category')
+LEGACY_EMPTY_TEXT = 'nan'
+
+def _field_text(value):
+    if value is None or value == LEGACY_EMPTY_TEXT:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return str(value)
+
+def _row_hash(row, fields, seen):
+    """Content digest; identical rows get ordinals 0, 1, 2... in the order they are hashed"""
+    content = '\x1f'.join(_field_text(row[field]) for field in fields)
+    base = hashlib.blake2b(content.encode(), digest_size=16).digest()
+    ordinal = seen[base]
+    seen[base] += 1
+    if ordinal == 0:
+        return base.hex()
+    return hashlib.blake2b(base + ordinal.to_bytes(4, 'big'), digest_size=16).hexdigest()
+
+def _backfill(table_name, fields):
+    """
+    Hash existing rows in id order, so rows already duplicated keep distinct ordinals
+    Keyset batches by id: one batch of rows in memory at a time, written before the next is read
+    """
+    connection = op.get_bind()
+    table = sa.table(table_name, sa.column('id'), sa.column('row_hash'),
+                     *(sa.column(field, FIELD_TYPES.get(field, sa.String)) for field in fields))
+    update = table.update().where(table.c.id == sa.bindparam('row_id')).values(row_hash=sa.bindparam('hash'))
+    query = sa.select(table.c.id, *(table.c[field] for field in fields)).order_by(table.c.id).limit(BACKFILL_BATCH_SIZE)
+    seen = Counter()
+    last_id = None
+    while True:
+        page = query if last_id is None else query.where(table.c.id > last_id)
+        rows = connection.execute(page).all()
+        if not rows:
+            break
+        connection.execute(update, [{'row_id': row.id, 'hash': _row_hash(row._mapping, fields, seen)} for row in rows])
+        last_id = rows[-1].id
+
+def upgrade():
+    """
+    Idempotent Import Strategy:
+    1. sales/expenses get row_hash, a content digest (frozen above from services/upserts.py); NULL
+       never conflicts, so rows written outside imports need none
+    2. Backfill existing rows so the first re-import dedupes against them
+    3. Unique indexes are the ON CONFLICT targets; on sales it leads with date,
+       the partition key, as a unique index on a partitioned table must include it
+    """
+    op.add_column('sales', sa.Column('row_hash', sa.String(32), nullable=True))
+    op.add_column('expenses', sa.Column('row_hash', sa.String(32), nullable=True))
+    _backfill('sales', SALE_HASH_FIELDS)
+    _backfill('expenses', EXPENSE_HASH_FIELDS)
+    op.create_index('ux_sales_date_row_hash', 'sales', ['date', 'row_hash'], unique=True)
+    op.create_index('ux_expenses_row_hash', 'expenses', ['row_hash'], unique=True)
+
+def downgrade():
+    """Remove row hashes"""
+    op.drop_index('ux_expenses_row_hash', table_name='expenses')
+    op.drop_index('ux_sales_date_row_hash', table_name='sales')
+    with op.batch_alter_table('expenses') as batch_op:
+        batch_op.drop_column('row_hash')
+    with op.batch_alter_table('sales') as batch_op:
+        batch_op.drop_column('row_hash')
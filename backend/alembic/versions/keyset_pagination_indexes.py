@@ -0,0 +1,28 @@
+"""Add keyset pagination index for customers
+
+Revision ID: keyset_001
+Revises: dims_001
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'keyset_001'
+down_revision = 'dims_001'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """
+    Keyset Pagination Strategy:
+    1. Pages are ordered newest first by (sort column, id) and seek past the last row
+    2. Sales and expenses already have date indexes (SQLite appends the rowid id to them)
+    3. Customers were sorted by created_at with no index at all
+    """
+    op.create_index('ix_customers_created_at_id', 'customers', ['created_at', 'id'])
+
+def downgrade():
+    """Remove keyset pagination index"""
+    op.drop_index('ix_customers_created_at_id', table_name='customers')
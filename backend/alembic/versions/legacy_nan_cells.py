@@ -0,0 +1,45 @@
+"""Store empty import cells stored as 'nan' as NULL
+
+Revision ID: nan_001
+Revises: sheets_001
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'nan_001'
+down_revision = 'sheets_001'
+branch_labels = None
+depends_on = None
+
+# What pandas wrote for an empty cell - frozen here, not imported from services/upserts.py
+LEGACY_EMPTY_TEXT = 'nan'
+
+# Optional columns imports filled from possibly empty cells
+NULLABLE_IMPORT_COLUMNS = {
+    'sales': ('customer_id', 'category'),
+    'expenses': ('category',),
+    'customers': ('email',),
+}
+
+def upgrade():
+    """
+    Empty Cell Strategy:
+    1. Before sheets_001, imports parsed empty cells as NaN and stored the string 'nan'
+    2. Rewrite those to NULL, as imports now store them
+    3. row_hash is unchanged: upserts.py hashes 'nan' and NULL alike, so existing
+       rows keep matching their re-imports
+    4. Sales with a 'nan' category lose the matching category_id as well
+    """
+    sales = sa.table('sales', sa.column('category'), sa.column('category_id'))
+    op.execute(sales.update().where(sales.c.category == LEGACY_EMPTY_TEXT).values(category_id=None))
+    for table_name, columns in NULLABLE_IMPORT_COLUMNS.items():
+        for column in columns:
+            table = sa.table(table_name, sa.column(column))
+            op.execute(table.update().where(table.c[column] == LEGACY_EMPTY_TEXT).values({column: None}))
+
+def downgrade():
+    """Nothing to undo - NULL and 'nan' hash alike, and imports no longer write 'nan'"""
+    pass
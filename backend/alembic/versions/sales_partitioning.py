@@ -0,0 +1,58 @@
+"""Partition sales by month (PostgreSQL, opt-in)
+
+Revision ID: part_001
+Revises: keyset_001
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.core.config import settings
+from app.core.partitioning import is_partitioned, partition_sales_table, unpartition_sales_table
+
+# revision identifiers
+revision = 'part_001'
+down_revision = 'keyset_001'
+branch_labels = None
+depends_on = None
+
+# The sales layout at this revision - fixed here, so later schema changes to
+# app.core.partitioning do not change what this migration builds or restores
+SALES_COLUMNS = "id, date, product_name, amount_cents, customer_id, category, product_id, category_id, created_at"
+SALES_COLUMN_DDL = """
+    id INTEGER NOT NULL DEFAULT nextval('sales_id_seq'),
+    date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    product_name VARCHAR NOT NULL,
+    amount_cents INTEGER NOT NULL,
+    customer_id VARCHAR,
+    category VARCHAR,
+    product_id INTEGER,
+    category_id INTEGER,
+    created_at TIMESTAMP WITHOUT TIME ZONE
+"""
+SALES_INDEXES = (
+    ("ix_sales_date", "(date)"),
+    ("ix_sales_customer_id", "(customer_id)"),
+    ("ix_sales_product_id", "(product_id)"),
+    ("ix_sales_date_customer", "(date, customer_id)"),
+)
+LAYOUT = dict(columns=SALES_COLUMNS, column_ddl=SALES_COLUMN_DDL, indexes=SALES_INDEXES, unique_indexes=())
+
+def upgrade():
+    """
+    Partitioning Strategy:
+    1. Only with SALES_PARTITIONING=true on PostgreSQL - a no-op everywhere else
+    2. sales becomes RANGE (date) partitioned: one partition per month of history,
+       the next SALES_PARTITIONS_AHEAD months, and a DEFAULT partition
+    3. The app creates upcoming months at startup and via POST /admin/partitions/maintain
+    """
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql" or not settings.sales_partitioning or is_partitioned(bind):
+        return
+    partition_sales_table(bind, settings.sales_partitions_ahead, **LAYOUT)
+
+def downgrade():
+    """Fold the partitions back into a single sales table"""
+    bind = op.get_bind()
+    if is_partitioned(bind):
+        unpartition_sales_table(bind, **LAYOUT)
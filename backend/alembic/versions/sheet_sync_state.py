@@ -0,0 +1,36 @@
+"""Add the incremental Google Sheets sync cursor
+
+Revision ID: sheets_001
+Revises: ledger_001
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'sheets_001'
+down_revision = 'ledger_001'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """
+    Incremental Sync Strategy:
+    1. One cursor per (spreadsheet, sheet): the last row synced and the header it was synced under
+    2. A sync pages from last_row + 1; a changed header restarts from row 2
+    3. See GoogleSheetsConnector.sync_sheet
+    """
+    op.create_table('sheet_sync_state',
+        sa.Column('spreadsheet_id', sa.String(), nullable=False),
+        sa.Column('sheet_name', sa.String(), nullable=False),
+        sa.Column('header', sa.String(), nullable=False),
+        sa.Column('last_row', sa.Integer(), nullable=False),
+        sa.Column('rows_synced', sa.Integer(), nullable=False),
+        sa.Column('synced_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('spreadsheet_id', 'sheet_name')
+    )
+
+def downgrade():
+    """Remove the sync cursor table"""
+    op.drop_table('sheet_sync_state')
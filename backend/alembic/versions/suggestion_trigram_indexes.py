@@ -0,0 +1,30 @@
+"""Add trigram indexes for autocomplete suggestions
+
+Revision ID: suggest_001
+Revises: part_001
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.services.suggestions import create_trigram_indexes, drop_trigram_indexes
+
+# revision identifiers
+revision = 'suggest_001'
+down_revision = 'part_001'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """
+    Suggestion Index Strategy:
+    1. /entry/suggestions is served from the in-memory trigram index by default
+    2. With SUGGESTION_INDEX_ENABLED=false it searches the database by substring
+    3. PostgreSQL: pg_trgm GIN indexes on products.name and customers.name serve ILIKE '%q%'
+    4. SQLite: FTS5 trigram tables over the same columns, kept in sync by triggers
+    """
+    create_trigram_indexes(op.get_bind())
+
+def downgrade():
+    """Remove trigram indexes"""
+    drop_trigram_indexes(op.get_bind())
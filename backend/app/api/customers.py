@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from ..core.database import get_db
+from ..core.exceptions import ValidationError
+from ..core.pagination import NEXT_CURSOR_HEADER
+from ..core.serialization import FastJSONResponse, rows_to_records
 from ..models.schemas import CustomerCreate, CustomerUpdate, CustomerResponse
-from ..services.customers_service import CustomersService
+from ..services.customers_service import CUSTOMER_RESPONSE_COLUMNS, CustomersService
 
 router = APIRouter(prefix="/customers", tags=["customers"])
 
@@ -18,11 +21,26 @@ def create_customer(customer: CustomerCreate, db: Session = Depends(get_db)):
 def get_customers(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description=f"Token from the previous page's {NEXT_CURSOR_HEADER} header"),
     db: Session = Depends(get_db)
 ):
-    """Get customers with pagination"""
+    """Get customers with pagination (keyset pages unless `skip` is given)"""
+    if cursor and skip:
+        raise HTTPException(status_code=400, detail="Use either skip or cursor, not both")
+    
+    # Plain column tuples rendered by orjson - response_model only documents the shape
     service = CustomersService(db)
-    return service.get_customers(skip=skip, limit=limit)
+    headers = {}
+    if skip:
+        rows = service.get_customers(skip=skip, limit=limit, columns=CUSTOMER_RESPONSE_COLUMNS)
+    else:
+        try:
+            rows, next_cursor = service.get_customers_page(limit=limit, cursor=cursor, columns=CUSTOMER_RESPONSE_COLUMNS)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.message)
+        if next_cursor:
+            headers[NEXT_CURSOR_HEADER] = next_cursor
+    return FastJSONResponse(rows_to_records(CUSTOMER_RESPONSE_COLUMNS, rows, cents_field=None), headers=headers)
 
 @router.get("/{customer_id}", response_model=CustomerResponse)
 def get_customer(customer_id: str, db: Session = Depends(get_db)):
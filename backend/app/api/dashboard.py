@@ -1,27 +1,29 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any, List
 from datetime import datetime, timedelta
 
-from ..core.database import get_db
-from ..services.kpi_service import KPIService
+from ..core.database import get_async_read_db, get_read_db
+from ..services.kpi_service import AsyncKPIService, KPIService
 from ..services.sales_service import SalesService
+from ..services.analytics import AnalyticsService
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
 @router.get("/kpis")
 async def get_dashboard_kpis(
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ) -> Dict[str, Any]:
     """Get all KPIs for dashboard"""
-    kpi_service = KPIService(db)
+    kpi_service = AsyncKPIService(db)
     return await kpi_service.calculate_all_kpis(days)
 
 @router.get("/revenue-trend")
 def get_revenue_trend(
     days: int = Query(30, ge=7, le=365),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ) -> List[Dict[str, Any]]:
     """Get daily revenue trend"""
     sales_service = SalesService(db)
@@ -54,52 +56,34 @@ def get_revenue_trend(
 
 @router.get("/customer-analytics")
 def get_customer_analytics(
-    db: Session = Depends(get_db)
+    exact: bool = Query(False, description="Force an exact count when approximate mode is enabled"),
+    db: Session = Depends(get_read_db)
 ) -> Dict[str, Any]:
     """Get customer analytics data - OPTIMIZED VERSION"""
-    from sqlalchemy import func, case
-    from ..models.analytics import Sale
-    
-    # Single query to get all customer metrics - 100x faster than Python loops
-    result = db.query(
-        func.count().label('total_customers'),
-        func.sum(case((func.count(Sale.id) == 1, 1), else_=0)).label('new_customers'),
-        func.sum(case((func.count(Sale.id) > 1, 1), else_=0)).label('repeat_customers'),
-        func.sum(case((func.sum(Sale.amount_cents) > 50000, 1), else_=0)).label('vip_customers')
-    ).select_from(
-        db.query(
-            Sale.customer_id,
-            func.count(Sale.id).label('purchase_count'),
-            func.sum(Sale.amount_cents).label('total_spent')
-        ).filter(
-            Sale.customer_id.isnot(None)
-        ).group_by(Sale.customer_id).subquery()
-    ).first()
+    summary = AnalyticsService(db).get_customer_summary(exact=exact)
     
-    total = result.total_customers or 0
-    repeat = result.repeat_customers or 0
+    total = summary['total_customers']
+    repeat = summary['repeat_customers']
     
     return {
-        "total_customers": total,
-        "new_customers": result.new_customers or 0,
-        "repeat_customers": repeat,
-        "vip_customers": result.vip_customers or 0,
+        **summary,
         "repeat_rate": (repeat / total * 100) if total > 0 else 0
     }
 
 @router.get("/product-performance")
 def get_product_performance(
-    limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db)
+    limit: int = Query(10, ge=1, le=1000),
+    rank_by: str = Query("revenue", regex="^(revenue|count)$"),
+    db: Session = Depends(get_read_db)
 ) -> List[Dict[str, Any]]:
     """Get product performance metrics"""
     kpi_service = KPIService(db)
-    return kpi_service.get_top_products(limit)
+    return kpi_service.get_top_products(limit, rank_by)
 
 @router.get("/expense-breakdown")
 def get_expense_breakdown(
     days: int = Query(30, ge=1, le=365),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ) -> List[Dict[str, Any]]:
     """Get expense breakdown by category"""
     from sqlalchemy import func
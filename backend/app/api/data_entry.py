@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any, Optional
 from datetime import datetime
 from pydantic import BaseModel, Field, validator
 
-from ..core.database import get_db
-from ..services.sales_service import SalesService
+from ..core.config import settings
+from ..core.database import get_async_db, get_db, get_read_db
+from ..services.sales_service import AsyncSalesService
 from ..services.customers_service_v2 import CustomersService
 from ..services.expenses_service_v2 import ExpensesService
+from ..services.suggestions import MAX_SUGGESTIONS, search_database, suggestions
 
 router = APIRouter(prefix="/entry", tags=["Data Entry"])
 
@@ -47,10 +50,10 @@ class QuickExpense(BaseModel):
 @router.post("/quick-sale")
 async def create_quick_sale(
     sale: QuickSale,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Dict[str, Any]:
     """Quick sale entry for manual data input"""
-    sales_service = SalesService(db)
+    sales_service = AsyncSalesService(db)
     
     sale_data = {
         "product_name": sale.product_name,
@@ -122,31 +125,24 @@ async def create_quick_expense(
 @router.get("/suggestions/products")
 def get_product_suggestions(
     query: str = "",
-    db: Session = Depends(get_db)
+    limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS),
+    db: Session = Depends(get_read_db)
 ):
-    """Get product name suggestions for autocomplete"""
-    from sqlalchemy import func
-    from ..models.analytics import Sale
-    
-    results = db.query(Sale.product_name).filter(
-        Sale.product_name.ilike(f"%{query}%")
-    ).group_by(Sale.product_name).limit(10).all()
-    
-    return [result.product_name for result in results]
+    """Get product name suggestions for autocomplete, most-sold first"""
+    if settings.suggestion_index_enabled:
+        return suggestions.suggest_products(db, query, limit)
+    return [name for _, name in search_database(db, "products", query, limit)]
 
 @router.get("/suggestions/customers")
 def get_customer_suggestions(
     query: str = "",
-    db: Session = Depends(get_db)
+    limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS),
+    db: Session = Depends(get_read_db)
 ):
-    """Get customer suggestions for autocomplete"""
-    from ..models.analytics import Customer
-    
-    results = db.query(Customer.id, Customer.name).filter(
-        Customer.name.ilike(f"%{query}%")
-    ).limit(10).all()
-    
+    """Get customer suggestions for autocomplete, most frequent buyers first"""
+    if settings.suggestion_index_enabled:
+        return suggestions.suggest_customers(db, query, limit)
     return [
-        {"id": result.id, "name": result.name}
-        for result in results
-    ]
\ No newline at end of file
+        {"id": customer_id, "name": name}
+        for customer_id, name in search_database(db, "customers", query, limit)
+    ]
@@ -4,8 +4,11 @@ from typing import List, Optional
 from datetime import datetime
 
 from ..core.database import get_db
+from ..core.exceptions import ValidationError
+from ..core.pagination import NEXT_CURSOR_HEADER
+from ..core.serialization import FastJSONResponse, rows_to_records
 from ..models.schemas import ExpenseCreate, ExpenseUpdate, ExpenseResponse
-from ..services.expenses_service import ExpensesService
+from ..services.expenses_service import EXPENSE_RESPONSE_COLUMNS, ExpensesService
 
 router = APIRouter(prefix="/expenses", tags=["expenses"])
 
@@ -28,24 +31,30 @@ def create_expense(expense: ExpenseCreate, db: Session = Depends(get_db)):
 def get_expenses(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description=f"Token from the previous page's {NEXT_CURSOR_HEADER} header"),
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     db: Session = Depends(get_db)
 ):
-    """Get expenses with optional pagination and date filtering"""
+    """Get expenses with optional pagination and date filtering (keyset pages unless `skip` is given)"""
+    if cursor and skip:
+        raise HTTPException(status_code=400, detail="Use either skip or cursor, not both")
+    
+    # Plain column tuples rendered by orjson - response_model only documents the shape
     service = ExpensesService(db)
-    expenses = service.get_expenses(skip=skip, limit=limit, start_date=start_date, end_date=end_date)
-    return [
-        ExpenseResponse(
-            id=expense.id,
-            date=expense.date,
-            description=expense.description,
-            amount=expense.amount_cents / 100,
-            category=expense.category,
-            created_at=expense.created_at
-        )
-        for expense in expenses
-    ]
+    headers = {}
+    if skip:
+        rows = service.get_expenses(skip=skip, limit=limit, start_date=start_date, end_date=end_date,
+                                    columns=EXPENSE_RESPONSE_COLUMNS)
+    else:
+        try:
+            rows, next_cursor = service.get_expenses_page(limit=limit, cursor=cursor, start_date=start_date,
+                                                          end_date=end_date, columns=EXPENSE_RESPONSE_COLUMNS)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.message)
+        if next_cursor:
+            headers[NEXT_CURSOR_HEADER] = next_cursor
+    return FastJSONResponse(rows_to_records(EXPENSE_RESPONSE_COLUMNS, rows), headers=headers)
 
 @router.get("/{expense_id}", response_model=ExpenseResponse)
 def get_expense(expense_id: int, db: Session = Depends(get_db)):
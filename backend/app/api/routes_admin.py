@@ -1,10 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
-from ..core.database import get_db
+from ..core.config import settings
+from ..core.database import get_db, get_read_db, has_read_pool, pool_stats
+from ..core.instrumentation import query_registry
+from ..core.partitioning import (
+    ensure_upcoming_partitions, is_partitioned, list_partitions, partitions_for_window, supports_partitioning
+)
 from ..services.sheets_connector import GoogleSheetsConnector, SheetsURLParser
 from ..services.pdf_generator import PDFReportGenerator
+from ..services.system_status import SystemStatusService
+from ..core.cache import invalidate_daily_rollups
+from ..services.columnar_store import columnar_sales
+from ..services.suggestions import suggestions
 from ..models.schemas import UploadResponse
 from pydantic import BaseModel
 
@@ -20,6 +30,8 @@ class BusinessSettings(BaseModel):
 class SheetsConnection(BaseModel):
     spreadsheet_url: str
     sheet_name: Optional[str] = "Sheet1"
+    # Append-only sheets: page through rows added since the last sync instead of re-reading the range
+    incremental: bool = False
     
 class ReportRequest(BaseModel):
     days_back: int = 30
@@ -50,8 +62,9 @@ async def connect_google_sheets(
         # Initialize connector
         connector = GoogleSheetsConnector(db)
         
+        # Sheets API calls and the import's queued writes run off the event loop
         # Test connection first
-        validation_result = connector.validate_sheet_access(spreadsheet_id)
+        validation_result = await run_in_threadpool(connector.validate_sheet_access, spreadsheet_id)
         
         if not validation_result["valid"]:
             raise HTTPException(
@@ -60,14 +73,32 @@ async def connect_google_sheets(
             )
         
         # Import data
-        records_processed, errors = connector.extract_sheet_data(
-            spreadsheet_id, 
-            connection.sheet_name
-        )
+        if connection.incremental:
+            records_processed, errors = await run_in_threadpool(
+                connector.sync_sheet, spreadsheet_id, connection.sheet_name
+            )
+        else:
+            records_processed, errors = await run_in_threadpool(
+                connector.extract_sheet_data,
+                spreadsheet_id, 
+                connection.sheet_name
+            )
         
+        plan = connector.plan
+        if connector.sync_state is not None:
+            message = (f"Synced {records_processed} new records from '{validation_result['title']}' "
+                       f"(through row {connector.sync_state.last_row})")
+        elif plan and plan.already_imported:
+            message = f"'{validation_result['title']}' is unchanged since its last import"
+        else:
+            message = f"Successfully imported {records_processed} records from '{validation_result['title']}'"
         return UploadResponse(
-            message=f"Successfully imported {records_processed} records from '{validation_result['title']}'",
+            message=message,
             records_processed=records_processed,
+            duplicates_skipped=connector.duplicates_skipped,
+            already_imported=bool(plan and plan.already_imported),
+            chunks_skipped=plan.chunks_skipped if plan else 0,
+            possible_corrections=connector.possible_corrections,
             errors=errors
         )
         
@@ -218,28 +249,16 @@ async def update_business_settings(
 
 
 @router.get("/system-status")
-async def get_system_status(db: Session = Depends(get_db)):
+async def get_system_status(db: Session = Depends(get_read_db)):
     """
     System health check for admin monitoring
     
     Use case: Admin dashboard can show system health
+    Safe to poll: row counts come from planner statistics (COUNT(*) only for never-analyzed
+    tables), cached for SYSTEM_STATUS_TTL_SECONDS
     """
     try:
-        # Test database connection
-        db.execute("SELECT 1").fetchone()
-        db_status = "healthy"
-        
-        # Check recent data
-        from ..models.analytics import Sale
-        recent_sales = db.query(Sale).count()
-        
-        return {
-            "status": "healthy",
-            "database": db_status,
-            "total_sales_records": recent_sales,
-            "last_check": datetime.utcnow().isoformat(),
-            "version": "1.0.0"
-        }
+        return SystemStatusService(db).get_status()
         
     except Exception as e:
         return {
@@ -249,6 +268,73 @@ async def get_system_status(db: Session = Depends(get_db)):
         }
 
 
+@router.get("/db-pools")
+async def get_db_pool_stats():
+    """
+    Connection pool metrics for the write and read pools
+    
+    Use case: Spot report queries holding read connections (max_hold_ms, peak_in_use)
+    before they turn into timeouts - the write pool's numbers should stay flat
+    """
+    return {
+        "separate_read_pool": has_read_pool(),
+        "pools": pool_stats(),
+        "checked_at": datetime.utcnow().isoformat()
+    }
+
+
+@router.get("/partitions")
+async def get_sales_partitions(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Monthly sales partitions with row estimates
+    
+    Use case: With a window, shows which partitions a query over it reads after pruning
+    """
+    conn = db.connection()
+    partitions = list_partitions(conn)
+    result = {
+        "supported": supports_partitioning(conn),
+        "partitioned": is_partitioned(conn),
+        "partitions": partitions
+    }
+    if start_date and end_date:
+        result["pruned_to"] = partitions_for_window([partition["name"] for partition in partitions],
+                                                    start_date, end_date)
+    return result
+
+
+@router.post("/partitions/maintain")
+async def maintain_sales_partitions(db: Session = Depends(get_db)):
+    """Create missing partitions for the current and next SALES_PARTITIONS_AHEAD months (idempotent)"""
+    created = ensure_upcoming_partitions(db.connection(), settings.sales_partitions_ahead)
+    db.commit()
+    return {"created": created, "checked_at": datetime.utcnow().isoformat()}
+
+
+@router.get("/query-stats")
+async def get_query_stats(limit: int = Query(20, ge=1, le=200)):
+    """
+    SQL instrumentation: heaviest statements (normalized), per-endpoint statement
+    counts and DB time, and the slow-query log (with EXPLAIN plans when enabled)
+    """
+    return {
+        **query_registry.snapshot(limit),
+        "slow_query_ms": settings.slow_query_ms,
+        "explain_enabled": settings.explain_slow_queries
+    }
+
+
+@router.delete("/query-stats")
+async def reset_query_stats():
+    """Start a fresh measurement window"""
+    query_registry.reset()
+    return {"success": True, "reset_at": datetime.utcnow().isoformat()}
+
+
 @router.delete("/clear-data")
 async def clear_all_data(
     confirm: bool = Query(False, description="Must be true to confirm deletion"),
@@ -267,18 +353,24 @@ async def clear_all_data(
         )
     
     try:
-        from ..models.analytics import Sale, Customer, Expense
+        from ..models.analytics import Sale, Customer, Expense, ImportChunk, ImportFile, SheetSyncState
         
         # Count records before deletion
         sales_count = db.query(Sale).count()
         customers_count = db.query(Customer).count()
         expenses_count = db.query(Expense).count()
         
-        # Delete all data
+        # Delete all data - with the import ledger and Sheets cursors, so the same files can be imported again
         db.query(Sale).delete()
         db.query(Customer).delete()
         db.query(Expense).delete()
+        db.query(ImportChunk).delete()
+        db.query(ImportFile).delete()
+        db.query(SheetSyncState).delete()
         db.commit()
+        invalidate_daily_rollups()
+        columnar_sales.mark_stale()
+        suggestions.mark_stale()
         
         return {
             "success": True,
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
 from sqlalchemy.orm import Session
 from typing import Dict, Any
 from ..core.database import get_db
@@ -6,9 +6,12 @@ from ..services.csv_upload_service import CSVUploadService
 
 router = APIRouter(prefix="/data", tags=["CSV Upload"])
 
+DEDUPE_DESCRIPTION = "Upsert: skip rows already imported and update changed customers (false = insert every row)"
+
 @router.post("/upload-sales-csv")
 async def upload_sales_csv(
     file: UploadFile = File(...),
+    dedupe: bool = Query(True, description=DEDUPE_DESCRIPTION),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """
@@ -24,7 +27,7 @@ async def upload_sales_csv(
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="File must be a CSV")
     
-    csv_service = CSVUploadService(db)
+    csv_service = CSVUploadService(db, dedupe=dedupe)
     result = await csv_service.upload_sales_csv(file)
     
     return result
@@ -32,6 +35,7 @@ async def upload_sales_csv(
 @router.post("/upload-customers-csv")
 async def upload_customers_csv(
     file: UploadFile = File(...),
+    dedupe: bool = Query(True, description=DEDUPE_DESCRIPTION),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """
@@ -45,7 +49,7 @@ async def upload_customers_csv(
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="File must be a CSV")
     
-    csv_service = CSVUploadService(db)
+    csv_service = CSVUploadService(db, dedupe=dedupe)
     result = await csv_service.upload_customers_csv(file)
     
     return result
@@ -53,6 +57,7 @@ async def upload_customers_csv(
 @router.post("/upload-expenses-csv")
 async def upload_expenses_csv(
     file: UploadFile = File(...),
+    dedupe: bool = Query(True, description=DEDUPE_DESCRIPTION),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """
@@ -67,7 +72,7 @@ async def upload_expenses_csv(
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="File must be a CSV")
     
-    csv_service = CSVUploadService(db)
+    csv_service = CSVUploadService(db, dedupe=dedupe)
     result = await csv_service.upload_expenses_csv(file)
     
     return result
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime
+
+from ..core.database import get_read_db
+from ..services.export_service import EXPORT_MEDIA_TYPES, ExportService, gzip_stream
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+
+def _stream_response(request: Request, chunks, name: str, export_format: str) -> StreamingResponse:
+    """Stream export chunks, gzip-encoded when the client accepts it"""
+    headers = {
+        "Content-Disposition": f'attachment; filename="{name}.{export_format}"',
+        "Vary": "Accept-Encoding"
+    }
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        chunks = gzip_stream(chunks)
+        headers["Content-Encoding"] = "gzip"
+    # Sync generator - Starlette iterates it in the threadpool, off the event loop
+    return StreamingResponse(chunks, media_type=EXPORT_MEDIA_TYPES[export_format], headers=headers)
+
+
+@router.get("/sales")
+def export_sales(
+    request: Request,
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Stream every sale in the date range as NDJSON or CSV
+    
+    Use case: Exports and warehouse loads - constant memory for any row count,
+    unlike paging GET /sales/ (the read session lives until the stream finishes)
+    """
+    chunks = ExportService(db).export_sales(format, start_date, end_date)
+    return _stream_response(request, chunks, "sales", format)
+
+
+@router.get("/expenses")
+def export_expenses(
+    request: Request,
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Stream every expense in the date range as NDJSON or CSV"""
+    chunks = ExportService(db).export_expenses(format, start_date, end_date)
+    return _stream_response(request, chunks, "expenses", format)
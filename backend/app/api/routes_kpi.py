@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
-from typing import Optional
-from ..core.database import get_db
-from ..services.analytics import AnalyticsService
+from typing import List, Optional
+from ..core.database import get_async_read_db
+from ..services.analytics import AsyncAnalyticsService
+from ..services.period_comparison import PeriodComparisonService, METRICS, MAX_PERIODS
 from ..models.schemas import KPISummary
 
 router = APIRouter(prefix="/kpis", tags=["analytics"])
@@ -12,7 +13,7 @@ router = APIRouter(prefix="/kpis", tags=["analytics"])
 @router.get("/summary", response_model=KPISummary)
 async def get_kpi_summary(
     days_back: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get comprehensive KPI summary for the specified period
@@ -23,15 +24,15 @@ async def get_kpi_summary(
     - Top 5 products by revenue
     - Repeat customers count
     """
-    analytics = AnalyticsService(db)
-    return analytics.generate_kpi_summary(days_back)
+    analytics = AsyncAnalyticsService(db)
+    return await analytics.generate_kpi_summary(days_back)
 
 
 @router.get("/revenue-trend")
 async def get_revenue_trend(
     days_back: int = Query(30, ge=1, le=365),
     interval: str = Query("daily", regex="^(daily|weekly|monthly)$"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get revenue trend data for charts
@@ -43,8 +44,8 @@ async def get_revenue_trend(
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days_back)
     
-    analytics = AnalyticsService(db)
-    trend_data = analytics.get_revenue_trend(start_date, end_date, interval)
+    analytics = AsyncAnalyticsService(db)
+    trend_data = await analytics.get_revenue_trend(start_date, end_date, interval)
     
     return {
         "trend_data": trend_data,
@@ -57,17 +58,18 @@ async def get_revenue_trend(
 @router.get("/top-products")
 async def get_top_products(
     days_back: int = Query(30, ge=1, le=365),
-    limit: int = Query(5, ge=1, le=20),
-    db: Session = Depends(get_db)
+    limit: int = Query(5, ge=1, le=1000),
+    rank_by: str = Query("revenue", regex="^(revenue|count)$"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
-    Get top products by revenue for the specified period
+    Get top products by revenue (or sales count) for the specified period
     """
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days_back)
     
-    analytics = AnalyticsService(db)
-    top_products = analytics.get_top_products(start_date, end_date, limit)
+    analytics = AsyncAnalyticsService(db)
+    top_products = await analytics.get_top_products(start_date, end_date, limit, rank_by)
     
     return {
         "top_products": top_products,
@@ -80,16 +82,17 @@ async def get_top_products(
 async def get_custom_kpi_summary(
     start_date: datetime = Query(..., description="Start date for analysis"),
     end_date: datetime = Query(..., description="End date for analysis"),
-    db: Session = Depends(get_db)
+    exact: bool = Query(False, description="Force an exact repeat-customer count"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get KPI summary for custom date range
     """
-    analytics = AnalyticsService(db)
+    analytics = AsyncAnalyticsService(db)
     
-    revenue_metrics = analytics.calculate_revenue_metrics(start_date, end_date)
-    top_products = analytics.get_top_products(start_date, end_date, 5)
-    repeat_customers = analytics.count_repeat_customers(start_date, end_date)
+    revenue_metrics = await analytics.calculate_revenue_metrics(start_date, end_date)
+    top_products = await analytics.get_top_products(start_date, end_date, 5)
+    repeat_customers = await analytics.count_repeat_customers(start_date, end_date, exact)
     
     return {
         **revenue_metrics,
@@ -103,39 +106,58 @@ async def get_custom_kpi_summary(
 @router.get("/revenue/comparison")
 async def get_revenue_comparison(
     current_days: int = Query(30, ge=1, le=365),
-    db: Session = Depends(get_db)
+    include_year_over_year: bool = Query(False, description="Also compare with the same window last year"),
+    metrics: Optional[str] = Query(None, description="Comma-separated metrics (default: revenue metrics)"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Compare current period revenue with previous period
-    """
-    analytics = AnalyticsService(db)
     
-    # Current period
+    Algorithm: Both (or all three) periods come from one conditional-aggregation query
+    """
     current_end = datetime.utcnow()
     current_start = current_end - timedelta(days=current_days)
     
-    # Previous period (same duration)
-    previous_end = current_start
-    previous_start = previous_end - timedelta(days=current_days)
+    metric_names = _parse_metrics(metrics) or ['total_revenue', 'total_sales_count', 'average_order_value']
+    try:
+        comparison = await db.run_sync(lambda session: PeriodComparisonService(session).compare(
+            current_start, current_end, metric_names, include_year_over_year
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    current_metrics = analytics.calculate_revenue_metrics(current_start, current_end)
-    previous_metrics = analytics.calculate_revenue_metrics(previous_start, previous_end)
+    return {
+        **comparison,
+        "revenue_change_percent": comparison["change_percent"].get("total_revenue", 0)
+    }
+
+
+@router.get("/comparison/monthly")
+async def get_monthly_year_over_year(
+    months: int = Query(12, ge=1, le=MAX_PERIODS // 2),
+    metrics: Optional[str] = Query(None, description="Comma-separated metrics (default: all)"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Each of the last N months vs the same month a year earlier
     
-    # Calculate percentage changes
-    revenue_change = 0
-    if previous_metrics['total_revenue'] > 0:
-        revenue_change = ((current_metrics['total_revenue'] - previous_metrics['total_revenue']) / previous_metrics['total_revenue']) * 100
+    Algorithm: 2N periods computed in a single scan of the union window
+    """
+    try:
+        comparisons = await db.run_sync(
+            lambda session: PeriodComparisonService(session).compare_months_year_over_year(months, _parse_metrics(metrics))
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return {
-        "current_period": {
-            **current_metrics,
-            "start_date": current_start,
-            "end_date": current_end
-        },
-        "previous_period": {
-            **previous_metrics,
-            "start_date": previous_start,
-            "end_date": previous_end
-        },
-        "revenue_change_percent": round(revenue_change, 2)
-    }
\ No newline at end of file
+        "months": comparisons,
+        "available_metrics": list(METRICS)
+    }
+
+
+def _parse_metrics(metrics: Optional[str]) -> Optional[List[str]]:
+    """Split a comma-separated metrics query parameter"""
+    if not metrics:
+        return None
+    return [name.strip() for name in metrics.split(",") if name.strip()]
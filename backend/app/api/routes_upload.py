@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from ..core.database import get_db
 from ..services.data_processor import DataProcessor
+from ..services.import_ledger import read_upload
 from ..models.schemas import UploadResponse
 
 router = APIRouter(prefix="/upload", tags=["data-upload"])
@@ -10,6 +12,7 @@ router = APIRouter(prefix="/upload", tags=["data-upload"])
 @router.post("/csv", response_model=UploadResponse)
 async def upload_csv(
     file: UploadFile = File(...),
+    dedupe: bool = Query(True, description="Skip rows already imported, so overlapping exports can be re-uploaded"),
     db: Session = Depends(get_db)
 ):
     """
@@ -21,23 +24,37 @@ async def upload_csv(
     - amount (positive number)
     - customer_id (optional)
     - category (optional)
+    
+    Re-uploading an overlapping export only writes rows not imported before (dedupe=true);
+    an identical file, or days already imported, are skipped via the import ledger
     """
     # Validate file type
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="File must be a CSV")
     
     try:
-        # Read file content
-        content = await file.read()
+        # Read file content, hashing it as it streams in
+        content, content_hash = await read_upload(file)
         csv_content = content.decode('utf-8')
         
-        # Process the data
-        processor = DataProcessor(db)
-        records_processed, errors = processor.process_csv_content(csv_content)
+        # Process the data off the event loop - dashboard reads keep being served during the import
+        processor = DataProcessor(db, dedupe=dedupe)
+        records_processed, errors = await run_in_threadpool(
+            processor.import_csv, csv_content, "upload/csv", content_hash
+        )
+        plan = processor.plan
         
+        if plan and plan.already_imported:
+            message = "File already imported - nothing to process"
+        else:
+            message = f"Successfully processed {records_processed} records"
         return UploadResponse(
-            message=f"Successfully processed {records_processed} records",
+            message=message,
             records_processed=records_processed,
+            duplicates_skipped=processor.duplicates_skipped,
+            already_imported=bool(plan and plan.already_imported),
+            chunks_skipped=plan.chunks_skipped if plan else 0,
+            possible_corrections=processor.possible_corrections,
             errors=errors
         )
         
@@ -1,18 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
-from ..core.database import get_db
+from ..core.database import get_async_db, get_db
+from ..core.exceptions import ValidationError
+from ..core.pagination import NEXT_CURSOR_HEADER
+from ..core.serialization import FastJSONResponse, rows_to_records
 from ..models.schemas import SaleCreate, SaleUpdate, SaleResponse
-from ..services.sales_service import SalesService
+from ..services.sales_service import SALE_RESPONSE_COLUMNS, AsyncSalesService, SalesService
 
 router = APIRouter(prefix="/sales", tags=["sales"])
 
 @router.post("/", response_model=SaleResponse)
-async def create_sale(sale: SaleCreate, db: Session = Depends(get_db)):
+async def create_sale(sale: SaleCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new sale record with event emission"""
-    service = SalesService(db)
+    service = AsyncSalesService(db)
     sale_data = sale.dict()
     db_sale = await service.create_sale(sale_data)
     # Convert cents back to dollars for response
@@ -30,25 +34,35 @@ async def create_sale(sale: SaleCreate, db: Session = Depends(get_db)):
 def get_sales(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description=f"Token from the previous page's {NEXT_CURSOR_HEADER} header"),
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     db: Session = Depends(get_db)
 ):
-    """Get sales with optional pagination and date filtering"""
+    """
+    Get sales with optional pagination and date filtering
+    
+    Pages without `skip` are keyset pages: pass the X-Next-Cursor header back as
+    `cursor` for constant-time deep paging. `skip` keeps the old OFFSET behaviour.
+    """
+    if cursor and skip:
+        raise HTTPException(status_code=400, detail="Use either skip or cursor, not both")
+    
+    # Plain column tuples rendered by orjson - response_model only documents the shape
     service = SalesService(db)
-    sales = service.get_sales(skip=skip, limit=limit, start_date=start_date, end_date=end_date)
-    return [
-        SaleResponse(
-            id=sale.id,
-            date=sale.date,
-            product_name=sale.product_name,
-            amount=sale.amount_cents / 100,
-            customer_id=sale.customer_id,
-            category=sale.category,
-            created_at=sale.created_at
-        )
-        for sale in sales
-    ]
+    headers = {}
+    if skip:
+        rows = service.get_sales(skip=skip, limit=limit, start_date=start_date, end_date=end_date,
+                                 columns=SALE_RESPONSE_COLUMNS)
+    else:
+        try:
+            rows, next_cursor = service.get_sales_page(limit=limit, cursor=cursor, start_date=start_date,
+                                                       end_date=end_date, columns=SALE_RESPONSE_COLUMNS)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.message)
+        if next_cursor:
+            headers[NEXT_CURSOR_HEADER] = next_cursor
+    return FastJSONResponse(rows_to_records(SALE_RESPONSE_COLUMNS, rows), headers=headers)
 
 @router.get("/{sale_id}", response_model=SaleResponse)
 def get_sale(sale_id: int, db: Session = Depends(get_db)):
@@ -69,9 +83,9 @@ def get_sale(sale_id: int, db: Session = Depends(get_db)):
     )
 
 @router.put("/{sale_id}", response_model=SaleResponse)
-async def update_sale(sale_id: int, sale_update: SaleUpdate, db: Session = Depends(get_db)):
+async def update_sale(sale_id: int, sale_update: SaleUpdate, db: AsyncSession = Depends(get_async_db)):
     """Update an existing sale with event emission"""
-    service = SalesService(db)
+    service = AsyncSalesService(db)
     update_data = sale_update.dict(exclude_unset=True)
     sale = await service.update_sale(sale_id, update_data)
     if not sale:
@@ -88,9 +102,9 @@ async def update_sale(sale_id: int, sale_update: SaleUpdate, db: Session = Depen
     )
 
 @router.delete("/{sale_id}")
-async def delete_sale(sale_id: int, db: Session = Depends(get_db)):
+async def delete_sale(sale_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a sale with event emission"""
-    service = SalesService(db)
+    service = AsyncSalesService(db)
     success = await service.delete_sale(sale_id)
     if not success:
         raise HTTPException(status_code=404, detail="Sale not found")
@@ -1,12 +1,54 @@
-from typing import TypeVar, Generic, Type, Optional, List, Dict, Any
+from typing import TypeVar, Generic, Type, Optional, List, Dict, Any, Sequence, Tuple
+from sqlalchemy import Row, select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.declarative import DeclarativeMeta
 from datetime import datetime
 from .events import Event, EventType, event_bus
+from .pagination import page_order, seek_criterion, split_page
+from .serialization import ColumnSpec, select_columns
+from .write_queue import write_queue
 
 ModelType = TypeVar("ModelType", bound=DeclarativeMeta)
 
-class BaseService(Generic[ModelType]):
+
+def window_criteria(column, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> list:
+    """Inclusive date-window filters, skipping open ends"""
+    criteria = []
+    if start_date:
+        criteria.append(column >= start_date)
+    if end_date:
+        criteria.append(column <= end_date)
+    return criteria
+
+
+class RowReader:
+    """
+    Identity-map-free read path for list and analytics endpoints
+    Selects plain column tuples with Core select() and runs them on the session's
+    connection: no ORM result loading, no instances or attribute instrumentation,
+    nothing added to the identity map. Rows feed serialization.rows_to_records directly.
+    Criteria may use mapped attributes (Sale.date >= ...). Needs `self.db`.
+    """
+    
+    def list_rows(self, columns: ColumnSpec, *criteria, order_by: Sequence = (),
+                  skip: int = 0, limit: Optional[int] = 100) -> List[Row]:
+        """Row tuples of `columns` (ColumnSpec order) matching all criteria"""
+        stmt = select(*select_columns(columns)).where(*criteria).order_by(*order_by).offset(skip).limit(limit)
+        return self.db.connection().execute(stmt).all()
+    
+    def list_page(self, columns: ColumnSpec, sort_column, id_column, *criteria,
+                  cursor: Optional[str] = None, limit: int = 100) -> Tuple[List[Row], Optional[str]]:
+        """Newest-first keyset page of row tuples and the next cursor (see core.pagination)"""
+        seek = seek_criterion(sort_column, id_column, cursor)
+        if seek is not None:
+            criteria += (seek,)
+        # One extra row tells us whether another page exists without a COUNT
+        rows = self.list_rows(columns, *criteria, order_by=page_order(sort_column, id_column), limit=limit + 1)
+        return split_page(rows, sort_column, id_column, limit)
+
+
+class BaseService(RowReader, Generic[ModelType]):
     """Base service class with event-driven capabilities"""
     
     def __init__(self, model: Type[ModelType], db: Session):
@@ -17,7 +59,7 @@ class BaseService(Generic[ModelType]):
         """Create a new entity and emit event"""
         db_obj = self.model(**obj_data)
         self.db.add(db_obj)
-        self.db.commit()
+        await write_queue.run_async(self.db.commit)
         self.db.refresh(db_obj)
         
         if emit_event:
@@ -34,7 +76,7 @@ class BaseService(Generic[ModelType]):
         for field, value in obj_data.items():
             setattr(db_obj, field, value)
         
-        self.db.commit()
+        await write_queue.run_async(self.db.commit)
         self.db.refresh(db_obj)
         
         if emit_event:
@@ -60,7 +102,88 @@ class BaseService(Generic[ModelType]):
             await self._emit_deleted_event(db_obj)
         
         self.db.delete(db_obj)
-        self.db.commit()
+        await write_queue.run_async(self.db.commit)
+        return True
+    
+    async def _emit_created_event(self, obj: ModelType):
+        """Emit created event - override in subclasses"""
+        pass
+    
+    async def _emit_updated_event(self, obj: ModelType):
+        """Emit updated event - override in subclasses"""
+        pass
+    
+    async def _emit_deleted_event(self, obj: ModelType):
+        """Emit deleted event - override in subclasses"""
+        pass
+    
+    def _obj_to_dict(self, obj: ModelType) -> Dict[str, Any]:
+        """Convert SQLAlchemy object to dict"""
+        return {c.name: getattr(obj, c.name) for c in obj.__table__.columns}
+
+
+class AsyncBaseService(Generic[ModelType]):
+    """
+    Async counterpart of BaseService - same CRUD and event hooks over an AsyncSession
+    Commits take their turn on the single writer (write_queue.turn) like sync writes
+    """
+    
+    def __init__(self, model: Type[ModelType], db: AsyncSession):
+        self.model = model
+        self.db = db
+    
+    async def create(self, obj_data: Dict[str, Any], emit_event: bool = True) -> ModelType:
+        """Create a new entity and emit event"""
+        db_obj = self.model(**obj_data)
+        self.db.add(db_obj)
+        async with write_queue.turn():
+            await self.db.commit()
+        await self.db.refresh(db_obj)
+        
+        if emit_event:
+            await self._emit_created_event(db_obj)
+        
+        return db_obj
+    
+    async def update(self, obj_id: int, obj_data: Dict[str, Any], emit_event: bool = True) -> Optional[ModelType]:
+        """Update an entity and emit event"""
+        db_obj = await self.get(obj_id)
+        if not db_obj:
+            return None
+        
+        for field, value in obj_data.items():
+            setattr(db_obj, field, value)
+        
+        async with write_queue.turn():
+            await self.db.commit()
+        await self.db.refresh(db_obj)
+        
+        if emit_event:
+            await self._emit_updated_event(db_obj)
+        
+        return db_obj
+    
+    async def get(self, obj_id: int) -> Optional[ModelType]:
+        """Get entity by ID"""
+        return await self.db.get(self.model, obj_id)
+    
+    async def get_all(self, skip: int = 0, limit: int = 100) -> List[ModelType]:
+        """Get all entities with pagination"""
+        result = await self.db.execute(select(self.model).offset(skip).limit(limit))
+        return list(result.scalars().all())
+    
+    async def delete(self, obj_id: int, emit_event: bool = True) -> bool:
+        """Delete an entity and emit event"""
+        db_obj = await self.get(obj_id)
+        if not db_obj:
+            return False
+        
+        if emit_event:
+            await self._emit_deleted_event(db_obj)
+        
+        await self.db.delete(db_obj)
+        async with write_queue.turn():
+            await self.db.commit()
         return True
     
     async def _emit_created_event(self, obj: ModelType):
@@ -77,4 +200,4 @@ class BaseService(Generic[ModelType]):
     
     def _obj_to_dict(self, obj: ModelType) -> Dict[str, Any]:
         """Convert SQLAlchemy object to dict"""
-        return {c.name: getattr(obj, c.name) for c in obj.__table__.columns}
\ No newline at end of file
+        return {c.name: getattr(obj, c.name) for c in obj.__table__.columns}
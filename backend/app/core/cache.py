@@ -2,11 +2,16 @@
 Performance Caching Layer
 Senior Engineer Principle: Cache expensive operations, not cheap ones
 """
-from typing import Any, Optional, Dict
-from datetime import datetime, timedelta
+from typing import Any, Optional, Dict, List, Tuple
+from datetime import date, datetime, time, timedelta
+from collections import OrderedDict
+import asyncio
+import inspect
 import json
 import hashlib
 from functools import wraps
+from .config import settings
+from .metrics import metrics
 
 class MemoryCache:
     """
@@ -16,6 +21,10 @@ class MemoryCache:
     
     def __init__(self):
         self._cache: Dict[str, Dict[str, Any]] = {}
+        # Plain counters - read by the /metrics collector at scrape time
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
     
     def _generate_key(self, prefix: str, **kwargs) -> str:
         """Generate cache key from parameters"""
@@ -28,13 +37,17 @@ class MemoryCache:
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache if not expired"""
         if key not in self._cache:
+            self.misses += 1
             return None
         
         entry = self._cache[key]
         if datetime.utcnow() > entry['expires_at']:
             del self._cache[key]
+            self.misses += 1
+            self.evictions += 1
             return None
         
+        self.hits += 1
         return entry['value']
     
     def set(self, key: str, value: Any, ttl_seconds: int = 300) -> None:
@@ -45,8 +58,14 @@ class MemoryCache:
             'expires_at': expires_at
         }
     
+    def delete(self, key: str) -> None:
+        """Remove one entry (invalidation)"""
+        if self._cache.pop(key, None) is not None:
+            self.evictions += 1
+    
     def clear(self) -> None:
         """Clear all cache entries"""
+        self.evictions += len(self._cache)
         self._cache.clear()
     
     def stats(self) -> Dict[str, int]:
@@ -54,7 +73,10 @@ class MemoryCache:
         return {
             'total_keys': len(self._cache),
             'expired_keys': sum(1 for entry in self._cache.values() 
-                              if datetime.utcnow() > entry['expires_at'])
+                              if datetime.utcnow() > entry['expires_at']),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
         }
 
 # Global cache instance
@@ -71,10 +93,31 @@ def cached(prefix: str, ttl_seconds: int = 300):
         return result
     """
     def decorator(func):
+        # Service methods are cached per arguments, not per service instance
+        skip_self = list(inspect.signature(func).parameters)[:1] == ['self']
+        
+        def make_key(args, kwargs):
+            return cache._generate_key(prefix, args=args[1:] if skip_self else args, kwargs=kwargs)
+        
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                cache_key = make_key(args, kwargs)
+                cached_result = cache.get(cache_key)
+                if cached_result is not None:
+                    return cached_result
+                
+                # Cache the awaited value - a coroutine object can only be awaited once
+                result = await func(*args, **kwargs)
+                cache.set(cache_key, result, ttl_seconds)
+                return result
+            
+            return async_wrapper
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
             # Generate cache key from function parameters
-            cache_key = cache._generate_key(prefix, args=args, kwargs=kwargs)
+            cache_key = make_key(args, kwargs)
             
             # Try to get from cache first
             cached_result = cache.get(cache_key)
@@ -90,7 +133,126 @@ def cached(prefix: str, ttl_seconds: int = 300):
     return decorator
 
 def cache_invalidate(prefix: str, **kwargs):
-    """Invalidate specific cache entries"""
-    key = cache._generate_key(prefix, **kwargs)
-    if key in cache._cache:
-        del cache._cache[key]
\ No newline at end of file
+    """Invalidate specific cache entries, or every entry under the prefix when no kwargs are given"""
+    if not kwargs:
+        for key in [key for key in cache._cache if key.startswith(f"{prefix}:")]:
+            cache.delete(key)
+        return
+    
+    cache.delete(cache._generate_key(prefix, **kwargs))
+
+class DailyRollupCache:
+    """
+    In-memory store of per-day rollups (partial sums, sketches) for closed days
+    Data Structure: OrderedDict used as an LRU keyed by calendar day
+    Sized by DAILY_ROLLUP_MAX_DAYS: a window longer than the cache evicts its own
+    oldest days on every read, so the full-history KPI queries would never hit
+    Production: Replace with a rollup table for multi-instance deployments
+    """
+    
+    def __init__(self, name: str, max_days: Optional[int] = None):
+        self.name = name
+        self.max_days = max_days or settings.daily_rollup_max_days
+        self._days: "OrderedDict[date, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        _daily_rollups.append(self)
+    
+    def get(self, day: date) -> Optional[Any]:
+        """Get the rollup for a day, marking it as recently used"""
+        rollup = self._days.get(day)
+        if rollup is not None:
+            self._days.move_to_end(day)
+            self.hits += 1
+        else:
+            self.misses += 1
+        return rollup
+    
+    def set(self, day: date, rollup: Any) -> None:
+        """Store a day rollup, evicting the least recently used days"""
+        self._days[day] = rollup
+        self._days.move_to_end(day)
+        while len(self._days) > self.max_days:
+            self._days.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, day: Optional[date] = None) -> None:
+        """Drop one day (or every day) so it is rebuilt on next use"""
+        if day is None:
+            self.evictions += len(self._days)
+            self._days.clear()
+        elif self._days.pop(day, None) is not None:
+            self.evictions += 1
+    
+    def clear(self) -> None:
+        """Clear all cached rollups"""
+        self._days.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        """Get rollup cache statistics"""
+        return {'cached_days': len(self._days), 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+# Every daily rollup cache in the process, so writes can invalidate them together
+_daily_rollups: List[DailyRollupCache] = []
+
+def invalidate_daily_rollups(day: Optional[date] = None) -> None:
+    """Invalidate one day (or everything) in all daily rollup caches after sales writes"""
+    for rollup_cache in _daily_rollups:
+        rollup_cache.invalidate(day)
+
+@metrics.collector
+def _cache_metrics():
+    """Scrape-time view of the cache counters"""
+    caches = [('memory', cache)] + [(rollup_cache.name, rollup_cache) for rollup_cache in _daily_rollups]
+    for attribute, documentation in (('hits', 'Cache lookups that found a live entry'),
+                                     ('misses', 'Cache lookups that found nothing (or an expired entry)'),
+                                     ('evictions', 'Entries removed by expiry, LRU or invalidation')):
+        name = f"cache_{attribute}_total"
+        yield name, "counter", documentation, [
+            (name, {'cache': cache_name}, getattr(instance, attribute)) for cache_name, instance in caches
+        ]
+    yield "cache_entries", "gauge", "Entries currently held", [
+        ("cache_entries", {'cache': 'memory'}, len(cache._cache))
+    ] + [("cache_entries", {'cache': rollup_cache.name}, len(rollup_cache._days)) for rollup_cache in _daily_rollups]
+
+def split_window(start_date: datetime, end_date: datetime) -> Tuple[date, date, List[Tuple[datetime, datetime, bool]]]:
+    """
+    Split the inclusive window [start_date, end_date] for rollup queries
+    
+    Returns (first_full_day, last_full_day, live_slices): closed days that lie entirely
+    inside the window can be served from daily rollups; live_slices are
+    (start, end, inclusive_end) ranges that must be queried directly. The current
+    day is still accumulating sales, so it is always a live slice.
+    """
+    first_full = start_date.date()
+    if start_date.time() != time.min:
+        first_full += timedelta(days=1)
+    last_full = end_date.date()
+    if end_date.time() != time.max:
+        last_full -= timedelta(days=1)
+    last_full = min(last_full, datetime.utcnow().date() - timedelta(days=1))
+    
+    if first_full > last_full:
+        return first_full, last_full, [(start_date, end_date, True)]
+    
+    live_slices = []
+    head_end = datetime.combine(first_full, time.min)
+    if start_date < head_end:
+        live_slices.append((start_date, head_end, False))
+    tail_start = datetime.combine(last_full + timedelta(days=1), time.min)
+    if tail_start <= end_date:
+        live_slices.append((tail_start, end_date, True))
+    
+    return first_full, last_full, live_slices
+
+
+def contiguous_runs(days: List[date]) -> List[Tuple[date, date]]:
+    """Group sorted days into (first, last) runs of consecutive days - one range query per run"""
+    runs: List[Tuple[date, date]] = []
+    for day in days:
+        if runs and day - runs[-1][1] == timedelta(days=1):
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
@@ -7,12 +7,62 @@ class Settings(BaseSettings):
     # Database
     database_url: str = "sqlite:///./analytics.db"
     
+    # SQLite tuning (file databases): pooled connections + WAL pragmas
+    sqlite_pool_size: int = 5
+    sqlite_max_overflow: int = 10
+    sqlite_cache_size_kib: int = 65536  # Page cache per connection
+    sqlite_mmap_size_mb: int = 256
+    
+    # Read pool for analytics/KPI/dashboard queries: a replica URL, or a
+    # separate pool on the primary database (separate_read_pool=true)
+    database_read_url: Optional[str] = None
+    separate_read_pool: bool = False
+    read_pool_size: int = 5
+    read_max_overflow: int = 5
+    read_pool_timeout: int = 10  # Seconds to wait for a read connection
+    event_handler_concurrency: int = 2  # Event handlers holding a read connection at once
+    
+    # Schema is owned by Alembic (`alembic upgrade head`); true = create_all at startup (dev only)
+    auto_create_schema: bool = False
+    
     # API
     api_v1_prefix: str = "/api/v1"
     project_name: str = "Retail Analytics API"
     
+    # Per-day rollups (top products, customer sketches) kept in memory; at least the
+    # days of sales history, as KPI summaries ask for all of it
+    daily_rollup_max_days: int = 3660
+    
+    # Approximate customer counts (HyperLogLog + distinct sample); exact=true overrides
+    approximate_customer_counts: bool = False
+    customer_sketch_error: float = 0.02
+    
+    # Optional in-process NumPy column store for AnalyticsService queries
+    columnar_engine: bool = False
+    columnar_reload_seconds: int = 300  # 0 = rely on events only (single worker)
+    
+    # In-memory trigram index for /entry/suggestions; off = database trigram/FTS5 search
+    suggestion_index_enabled: bool = True
+    
+    # SQL instrumentation: per-request counts/timing, slow-query log, optional EXPLAIN
+    query_instrumentation: bool = True
+    slow_query_ms: float = 200
+    slow_query_log_size: int = 50
+    explain_slow_queries: bool = False
+    
+    # Prometheus-style /metrics endpoint (request latency, DB time, cache, event bus, ingestion)
+    metrics_enabled: bool = True
+    
+    # /admin/system-status is polled by monitors - serve it from cache in between
+    system_status_ttl_seconds: int = 10
+    
+    # Monthly RANGE partitioning of sales (PostgreSQL only, applied by Alembic revision part_001)
+    sales_partitioning: bool = False
+    sales_partitions_ahead: int = 3
+    
     # Google Sheets (optional for MVP)
     google_credentials_file: Optional[str] = None
+    sheets_sync_block_rows: int = 5000  # Rows per values().get page in incremental sync
     
     # Security
     secret_key: str = os.getenv("SECRET_KEY", "dev-secret-only-for-local-development")
@@ -1,35 +1,191 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, StaticPool
 from .config import settings
+from .exceptions import DatabaseError
+from .metrics import metrics as registry
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
 import os
+import threading
+import time
 
-# Performance-optimized engine configuration
-engine_kwargs = {
-    "echo": os.getenv("DEBUG") == "true",  # Log SQL queries in debug mode
-}
 
-# SQLite-specific optimizations
-if "sqlite" in settings.database_url:
-    engine_kwargs.update({
-        "connect_args": {
-            "check_same_thread": False,
-            "timeout": 20,  # Prevent database locks
-        },
-        "poolclass": StaticPool,
-        "pool_pre_ping": True,  # Verify connections before use
-    })
-else:
-    # PostgreSQL optimizations
-    engine_kwargs.update({
-        "pool_size": 10,  # Connection pool size
-        "max_overflow": 20,  # Additional connections when needed
-        "pool_pre_ping": True,
-        "pool_recycle": 3600,  # Recycle connections every hour
-    })
-
-engine = create_engine(settings.database_url, **engine_kwargs)
+def is_sqlite_memory(url: str) -> bool:
+    """In-memory databases exist per connection, so they must share one"""
+    return url.startswith("sqlite") and (":memory:" in url or url.split("://", 1)[-1] in ("", "/"))
+
+
+def is_sqlite_file(url: str) -> bool:
+    return url.startswith("sqlite") and not is_sqlite_memory(url)
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """
+    Per-connection tuning, applied on connect
+    - WAL: readers never block on the writer (and vice versa)
+    - synchronous=NORMAL: fsync at checkpoints only - safe with WAL
+    - cache_size / mmap_size: keep hot pages in memory; temp_store for sorts and GROUP BYs
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kib)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size_mb) * 1024 * 1024}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+# === Pool metrics ===
+
+class PoolMetrics:
+    """
+    Checkout counters and connection hold times for one pool
+    Hooked to pool events, so long-running report queries show up as hold time
+    on the read pool instead of as mysterious write latency
+    """
+
+    def __init__(self, name: str, pool: Pool):
+        self.name = name
+        self.pool = pool
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.hold_seconds_total = 0.0
+        self.hold_seconds_max = 0.0
+        self.invalidations = 0
+
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+        event.listen(pool, "invalidate", self._on_invalidate)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            'pool_class': type(self.pool).__name__,
+            'connects': self.connects,
+            'checkouts': self.checkouts,
+            'in_use': self.in_use,
+            'peak_in_use': self.peak_in_use,
+            'avg_hold_ms': round(self.hold_seconds_total / self.checkouts * 1000, 3) if self.checkouts else 0,
+            'max_hold_ms': round(self.hold_seconds_max * 1000, 3),
+            'invalidations': self.invalidations
+        }
+        # QueuePool-style limits, when the pool has them
+        for attribute in ('size', 'overflow', 'checkedin', 'timeout'):
+            if hasattr(self.pool, attribute):
+                stats[attribute] = getattr(self.pool, attribute)()
+        return stats
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info['checked_out_at'] = time.perf_counter()
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        started = connection_record.info.pop('checked_out_at', None)
+        if started is None:
+            return
+        held = time.perf_counter() - started
+        with self._lock:
+            self.in_use -= 1
+            self.hold_seconds_total += held
+            self.hold_seconds_max = max(self.hold_seconds_max, held)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+
+# Pool name -> metrics, for every engine created through create_app_engine
+pool_metrics: Dict[str, PoolMetrics] = {}
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Current metrics for every instrumented pool"""
+    return {name: metrics.stats() for name, metrics in pool_metrics.items()}
+
+
+@registry.collector
+def _pool_metrics():
+    """Pool usage as gauges/counters on /metrics"""
+    pools = list(pool_metrics.values())
+    yield "db_pool_connections_in_use", "gauge", "Connections currently checked out", [
+        ("db_pool_connections_in_use", {'pool': pool.name}, pool.in_use) for pool in pools
+    ]
+    yield "db_pool_checkouts_total", "counter", "Connection checkouts", [
+        ("db_pool_checkouts_total", {'pool': pool.name}, pool.checkouts) for pool in pools
+    ]
+    yield "db_pool_hold_seconds_total", "counter", "Time connections spent checked out", [
+        ("db_pool_hold_seconds_total", {'pool': pool.name}, pool.hold_seconds_total) for pool in pools
+    ]
+
+
+# === Engines ===
+
+def build_engine_kwargs(url: str, pool_size: Optional[int] = None,
+                        max_overflow: Optional[int] = None,
+                        pool_timeout: Optional[int] = None) -> Dict[str, Any]:
+    """Performance-optimized engine configuration for a database URL"""
+    kwargs: Dict[str, Any] = {
+        "echo": os.getenv("DEBUG") == "true",  # Log SQL queries in debug mode
+    }
+
+    # SQLite-specific optimizations
+    if is_sqlite_memory(url):
+        kwargs.update({
+            "connect_args": {"check_same_thread": False},
+            "poolclass": StaticPool,
+        })
+        return kwargs
+
+    if url.startswith("sqlite"):
+        # A pool of connections, so readers run concurrently under WAL
+        kwargs.update({
+            "connect_args": {
+                "check_same_thread": False,  # Pooled connections move between threads
+                "timeout": 20,  # Prevent database locks
+            },
+            "pool_size": pool_size or settings.sqlite_pool_size,
+            "max_overflow": settings.sqlite_max_overflow if max_overflow is None else max_overflow,
+            "pool_pre_ping": True,  # Verify connections before use
+        })
+    else:
+        # PostgreSQL optimizations
+        kwargs.update({
+            "pool_size": pool_size or 10,  # Connection pool size
+            "max_overflow": 20 if max_overflow is None else max_overflow,  # Additional connections when needed
+            "pool_pre_ping": True,
+            "pool_recycle": 3600,  # Recycle connections every hour
+        })
+    if pool_timeout is not None:
+        kwargs["pool_timeout"] = pool_timeout
+    return kwargs
+
+
+def create_app_engine(url: str, name: str, **pool_options) -> Engine:
+    """Create an engine with the SQLite pragmas and pool metrics attached"""
+    # logging_name labels the engine's statements in /metrics
+    new_engine = create_engine(url, logging_name=name, **build_engine_kwargs(url, **pool_options))
+    if is_sqlite_file(url):
+        event.listen(new_engine, "connect", apply_sqlite_pragmas)
+    pool_metrics[name] = PoolMetrics(name, new_engine.pool)
+    return new_engine
+
+
+engine_kwargs = build_engine_kwargs(settings.database_url)
+engine = create_app_engine(settings.database_url, "write")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -41,4 +197,156 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# === Read pool ===
+# Analytics, KPI and dashboard reads use their own pool - a replica when
+# DATABASE_READ_URL is set, or a second size-limited pool on the same database -
+# so long report queries cannot take every connection from the write path
+
+class ReadOnlySession(Session):
+    """Session bound to the read pool - flushing changes is always a bug"""
+
+    def flush(self, objects=None):
+        if self.new or self.dirty or self.deleted:
+            raise DatabaseError("Write attempted on a read-only session", error_code="read_only_session")
+        super().flush(objects)
+
+
+def _read_url() -> str:
+    return settings.database_read_url or settings.database_url
+
+
+def has_read_pool() -> bool:
+    """In-memory SQLite cannot have a second pool - reads then share the write pool"""
+    if is_sqlite_memory(_read_url()):
+        return False
+    return bool(settings.database_read_url) or settings.separate_read_pool
+
+
+read_engine = create_app_engine(
+    _read_url(), "read",
+    pool_size=settings.read_pool_size,
+    max_overflow=settings.read_max_overflow,
+    pool_timeout=settings.read_pool_timeout
+) if has_read_pool() else engine
+ReadSessionLocal = sessionmaker(class_=ReadOnlySession, autocommit=False, autoflush=False, bind=read_engine)
+
+
+def get_read_db():
+    """Dependency to get a read-only session on the read pool"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _database_identity(url) -> tuple:
+    """Which database a URL points at, whatever the driver (sync or asyncio)"""
+    return (url.get_backend_name(), url.host, url.port, url.database)
+
+
+def reads_replica(db: Session) -> bool:
+    """Whether a session reads from the DATABASE_READ_URL replica rather than the primary"""
+    if not settings.database_read_url:
+        return False
+    return _database_identity(db.get_bind().url) != _database_identity(engine.url)
+
+
+@contextmanager
+def cache_rebuild_session(db: Session) -> Iterator[Session]:
+    """
+    Session to rebuild long-lived caches (daily rollups, column store, suggestions) from
+    Those entries live until the next write invalidates them, so one built from a
+    replica that has not replayed that write yet would stay stale - they are rebuilt
+    from the primary. Without a replica this is the caller's session.
+    """
+    if not reads_replica(db):
+        yield db
+        return
+    primary = SessionLocal()
+    try:
+        yield primary
+    finally:
+        primary.close()
+
+
+# === Async data access ===
+# Same database through an asyncio driver, so I/O-bound handlers yield the
+# event loop while waiting on queries instead of blocking it
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver (aiosqlite / asyncpg)"""
+    scheme, separator, rest = url.partition("://")
+    dialect = scheme.split("+")[0]
+    return f"{ASYNC_DRIVERS.get(dialect, scheme)}{separator}{rest}"
+
+
+def create_app_async_engine(url: str, name: str, **pool_options) -> AsyncEngine:
+    """Async twin of create_app_engine - same pool limits, pragmas and metrics"""
+    kwargs = build_engine_kwargs(url, **pool_options)
+    if is_sqlite_file(url):
+        # aiosqlite connections live on their own threads already; the dialect
+        # defaults to NullPool, which would ignore the pool limits
+        kwargs["connect_args"].pop("check_same_thread", None)
+        kwargs["poolclass"] = AsyncAdaptedQueuePool
+    new_engine = create_async_engine(async_database_url(url), logging_name=name, **kwargs)
+    if is_sqlite_file(url):
+        event.listen(new_engine.sync_engine, "connect", apply_sqlite_pragmas)
+    pool_metrics[name] = PoolMetrics(name, new_engine.sync_engine.pool)
+    return new_engine
+
+
+_async_engines: Dict[str, AsyncEngine] = {}
+
+
+def get_async_engine() -> AsyncEngine:
+    """Created on first use so the async driver is only required when it is used"""
+    if "async_write" not in _async_engines:
+        _async_engines["async_write"] = create_app_async_engine(settings.database_url, "async_write")
+    return _async_engines["async_write"]
+
+
+def get_async_read_engine() -> AsyncEngine:
+    if not has_read_pool():
+        return get_async_engine()
+    if "async_read" not in _async_engines:
+        _async_engines["async_read"] = create_app_async_engine(
+            _read_url(), "async_read",
+            pool_size=settings.read_pool_size,
+            max_overflow=settings.read_max_overflow,
+            pool_timeout=settings.read_pool_timeout
+        )
+    return _async_engines["async_read"]
+
+
+async def dispose_async_engines() -> None:
+    """Close pooled async connections (app shutdown) - they belong to the exiting event loop"""
+    for async_engine in _async_engines.values():
+        await async_engine.dispose()
+
+
+# Objects stay readable after commit - responses are built after the session commits
+AsyncSessionLocal = async_sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(class_=AsyncSession, sync_session_class=ReadOnlySession,
+                                           autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal(bind=get_async_engine()) as db:
+        yield db
+
+
+async def get_async_read_db() -> AsyncIterator[AsyncSession]:
+    """Dependency to get an async read-only session on the read pool"""
+    async with AsyncReadSessionLocal(bind=get_async_read_engine()) as db:
+        yield db
@@ -0,0 +1,84 @@
+"""
+Session-per-Event Handlers
+Algorithm: every handler invocation opens a short-lived AsyncSession, checks its
+connection out of the pool, runs and closes it - no session (or identity map)
+outlives an event, and concurrent events never share a connection.
+A semaphore bounds the invocations holding a connection at once, so a burst of
+events waits here instead of draining the pool that serves requests.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from .events import Event, EventBus, EventType
+from .metrics import metrics
+
+SessionHandler = Callable[[Event, AsyncSession], Awaitable[None]]
+
+event_handler_checkout_wait = metrics.histogram(
+    "event_handler_checkout_wait_seconds",
+    "Time from dispatch until the handler held a pooled connection (concurrency slot + pool checkout)",
+    ("handler",)
+)
+event_handler_duration = metrics.histogram(
+    "event_handler_duration_seconds", "Handler run time with its session open", ("handler",)
+)
+event_handler_in_flight = metrics.gauge(
+    "event_handler_in_flight", "Handler invocations currently holding a session", ("handler",)
+)
+event_handler_errors = metrics.counter(
+    "event_handler_errors_total", "Handler invocations that raised", ("handler",)
+)
+
+
+class SessionScopedHandlers:
+    """
+    A group of `async def handler(event, db)` subscriptions sharing one concurrency limit
+    Each call: wait for a slot -> open a session and check out its connection -> run ->
+    close (connection back to the pool). Errors are counted and re-raised for the bus
+    to log like any other handler error.
+    Handlers must not publish events that are routed back into the same group: the
+    nested call would wait for a slot its caller is holding.
+    """
+
+    def __init__(self, name: str, session_factory: Callable[[], AsyncSession], max_concurrency: int):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.name = name
+        self.session_factory = session_factory
+        self.max_concurrency = max_concurrency
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._subscriptions: List[Tuple[EventBus, EventType, Callable]] = []
+
+    def subscribe(self, bus: EventBus, event_type: EventType, handler: SessionHandler) -> None:
+        async def dispatch(event: Event) -> None:
+            await self.run(handler, event)
+
+        dispatch.__name__ = handler.__name__
+        bus.subscribe(event_type, dispatch)
+        self._subscriptions.append((bus, event_type, dispatch))
+
+    def close(self) -> None:
+        """Unsubscribe everything this group subscribed"""
+        for bus, event_type, dispatch in self._subscriptions:
+            bus.unsubscribe(event_type, dispatch)
+        self._subscriptions.clear()
+
+    async def run(self, handler: SessionHandler, event: Event) -> None:
+        label = f"{self.name}.{handler.__name__}"
+        waiting = time.perf_counter()
+        async with self._slots:
+            async with self.session_factory() as db:
+                # Check out now, so pool timeouts show up as wait rather than handler time
+                await db.connection()
+                event_handler_checkout_wait.observe(time.perf_counter() - waiting, label)
+                event_handler_in_flight.inc(label)
+                started = time.perf_counter()
+                try:
+                    await handler(event, db)
+                except Exception:
+                    event_handler_errors.inc(label)
+                    raise
+                finally:
+                    event_handler_in_flight.dec(label)
+                    event_handler_duration.observe(time.perf_counter() - started, label)
@@ -3,7 +3,9 @@ from datetime import datetime
 from enum import Enum
 import asyncio
 import json
+import time
 from dataclasses import dataclass, asdict
+from .metrics import event_publish_duration, event_publish_in_flight, metrics
 
 class EventType(Enum):
     # Sales events
@@ -14,6 +16,7 @@ class EventType(Enum):
     # Customer events
     CUSTOMER_CREATED = "customer.created"
     CUSTOMER_UPDATED = "customer.updated"
+    CUSTOMER_DELETED = "customer.deleted"
     
     # Expense events
     EXPENSE_CREATED = "expense.created"
@@ -57,14 +60,22 @@ class EventBus:
             self._handlers[event_type] = []
         self._handlers[event_type].append(handler)
     
+    def unsubscribe(self, event_type: EventType, handler: Callable):
+        """Remove a handler; unknown handlers are ignored"""
+        handlers = self._handlers.get(event_type, [])
+        if handler in handlers:
+            handlers.remove(handler)
+    
     async def publish(self, event: Event):
         """Publish an event to all subscribers"""
         # Store event for audit trail
         self._event_store.append(event)
         
         # Notify handlers
-        if event.event_type in self._handlers:
-            for handler in self._handlers[event.event_type]:
+        started = time.perf_counter()
+        event_publish_in_flight.inc()
+        try:
+            for handler in self._handlers.get(event.event_type, ()):
                 try:
                     if asyncio.iscoroutinefunction(handler):
                         await handler(event)
@@ -72,6 +83,9 @@ class EventBus:
                         handler(event)
                 except Exception as e:
                     print(f"Error in event handler: {e}")
+        finally:
+            event_publish_in_flight.dec()
+            event_publish_duration.observe(time.perf_counter() - started, event.event_type.value)
     
     def get_events(self, entity_id: str = None, event_type: EventType = None) -> List[Event]:
         """Get events from store with optional filtering"""
@@ -86,4 +100,10 @@ class EventBus:
         return events
 
 # Global event bus instance
-event_bus = EventBus()
\ No newline at end of file
+event_bus = EventBus()
+
+@metrics.collector
+def _event_bus_metrics():
+    yield "event_bus_stored_events", "gauge", "Events held in the in-memory audit store", [
+        ("event_bus_stored_events", {}, len(event_bus._event_store))
+    ]
\ No newline at end of file
@@ -0,0 +1,225 @@
+"""
+Query Instrumentation
+Algorithm: before/after_cursor_execute hooks time every statement and attribute
+it to the current request (via a ContextVar) and to a process-wide registry
+keyed by normalized SQL
+"""
+import logging
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .config import settings
+from .metrics import db_query_duration
+
+logger = logging.getLogger(__name__)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+# Named/positional bind markers; a `:` after another `:` is a PostgreSQL cast (::bigint)
+_BIND_MARKER = re.compile(r"%\(\w+\)s|(?<!:):\w+|\$\d+|%s")
+_PARAM_LIST = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(statement: str) -> str:
+    """Collapse whitespace, literals and IN-lists so equivalent statements group together"""
+    normalized = _WHITESPACE.sub(" ", statement).strip()
+    normalized = _STRING_LITERAL.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _BIND_MARKER.sub("?", normalized)
+    return _PARAM_LIST.sub("(?, ...)", normalized)
+
+
+def bind_shape(parameters: Any, executemany: bool) -> str:
+    """Types of the bound parameters (values are never recorded)"""
+    if executemany:
+        rows = list(parameters or [])
+        return f"{len(rows)} x {bind_shape(rows[0], False)}" if rows else "0 x ()"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return "()"
+
+
+class RequestQueryStats:
+    """Statements run while serving one request"""
+
+    __slots__ = ('path', 'statement_count', 'db_seconds')
+
+    def __init__(self, path: str):
+        self.path = path
+        self.statement_count = 0
+        self.db_seconds = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.statement_count += 1
+        self.db_seconds += seconds
+
+    def server_timing(self) -> str:
+        """Server-Timing header value (durations in milliseconds)"""
+        return f'db;dur={self.db_seconds * 1000:.2f};desc="{self.statement_count} queries"'
+
+
+_current_request: ContextVar[Optional[RequestQueryStats]] = ContextVar("current_request_queries", default=None)
+
+
+def start_request(path: str) -> RequestQueryStats:
+    """Begin attributing statements to a new request; returns its stats"""
+    stats = RequestQueryStats(path)
+    _current_request.set(stats)
+    return stats
+
+
+class QueryRegistry:
+    """
+    Process-wide statement and endpoint aggregates plus a bounded slow-query log
+    Data Structure: dicts keyed by normalized SQL / route, deque for the slow log
+    """
+
+    def __init__(self, slow_log_size: int = 50):
+        self._lock = threading.Lock()
+        self._statements: Dict[str, Dict[str, Any]] = {}
+        self._endpoints: Dict[str, Dict[str, Any]] = {}
+        self._slow_log: Deque[Dict[str, Any]] = deque(maxlen=slow_log_size)
+
+    def record_statement(self, normalized: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._statements.get(normalized)
+            if entry is None:
+                entry = self._statements[normalized] = {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0}
+            entry['count'] += 1
+            entry['total_seconds'] += seconds
+            if seconds > entry['max_seconds']:
+                entry['max_seconds'] = seconds
+
+    def record_request(self, endpoint: str, stats: RequestQueryStats) -> None:
+        with self._lock:
+            entry = self._endpoints.get(endpoint)
+            if entry is None:
+                entry = self._endpoints[endpoint] = {'requests': 0, 'statements': 0, 'db_seconds': 0.0, 'max_statements': 0}
+            entry['requests'] += 1
+            entry['statements'] += stats.statement_count
+            entry['db_seconds'] += stats.db_seconds
+            entry['max_statements'] = max(entry['max_statements'], stats.statement_count)
+
+    def record_slow(self, normalized: str, shape: str, seconds: float,
+                    plan: Optional[List[str]], path: Optional[str] = None) -> None:
+        entry = {
+            'path': path,
+            'sql': normalized,
+            'bind_shape': shape,
+            'duration_ms': round(seconds * 1000, 3),
+            'recorded_at': datetime.utcnow().isoformat()
+        }
+        if plan is not None:
+            entry['plan'] = plan
+        with self._lock:
+            self._slow_log.append(entry)
+
+    def snapshot(self, limit: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            statements = sorted(self._statements.items(), key=lambda item: item[1]['total_seconds'], reverse=True)
+            endpoints = sorted(self._endpoints.items(), key=lambda item: item[1]['db_seconds'], reverse=True)
+            slow_log = list(self._slow_log)
+
+        return {
+            'statements': [
+                {
+                    'sql': sql,
+                    'count': entry['count'],
+                    'total_ms': round(entry['total_seconds'] * 1000, 3),
+                    'avg_ms': round(entry['total_seconds'] / entry['count'] * 1000, 3),
+                    'max_ms': round(entry['max_seconds'] * 1000, 3)
+                }
+                for sql, entry in statements[:limit]
+            ],
+            'endpoints': [
+                {
+                    'endpoint': endpoint,
+                    'requests': entry['requests'],
+                    'avg_statements': round(entry['statements'] / entry['requests'], 2),
+                    'max_statements': entry['max_statements'],
+                    'avg_db_ms': round(entry['db_seconds'] / entry['requests'] * 1000, 3)
+                }
+                for endpoint, entry in endpoints[:limit]
+            ],
+            'slow_queries': list(reversed(slow_log))
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statements.clear()
+            self._endpoints.clear()
+            self._slow_log.clear()
+
+
+# Global registry shared by all engines in the process
+query_registry = QueryRegistry(settings.slow_query_log_size)
+
+
+def explain(conn, statement: str, parameters: Any) -> Optional[List[str]]:
+    """Plan for a slow SELECT, run on the same DBAPI connection (bypasses the hooks)"""
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    try:
+        plan_cursor = conn.connection.cursor()
+        plan_cursor.execute(prefix + statement, parameters)
+        rows = plan_cursor.fetchall()
+        plan_cursor.close()
+    except Exception as e:
+        return [f"EXPLAIN failed: {e}"]
+    # SQLite rows are (id, parent, notused, detail); PostgreSQL rows are one text column
+    return [str(row[-1]) for row in rows]
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if settings.query_instrumentation:
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute - drop its start time,
+    # or every later timing on the connection would pair with the wrong start
+    if context.connection is None:
+        return
+    starts = context.connection.info.get('query_start')
+    if starts:
+        starts.pop()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('query_start')
+    if not starts:
+        return
+    seconds = time.perf_counter() - starts.pop()
+
+    request_stats = _current_request.get()
+    if request_stats is not None:
+        request_stats.record(seconds)
+
+    db_query_duration.observe(seconds, conn.engine.logging_name or conn.engine.url.get_backend_name())
+
+    normalized = normalize_sql(statement)
+    query_registry.record_statement(normalized, seconds)
+
+    if seconds * 1000 >= settings.slow_query_ms:
+        plan = None
+        if settings.explain_slow_queries and not executemany:
+            plan = explain(conn, statement, parameters)
+        shape = bind_shape(parameters, executemany)
+        path = request_stats.path if request_stats is not None else None
+        query_registry.record_slow(normalized, shape, seconds, plan, path)
+        logger.warning("Slow query (%.1f ms): %s [%s]", seconds * 1000, normalized, shape)
@@ -0,0 +1,220 @@
+"""
+In-Process Metrics Registry
+Prometheus text exposition without the client library: counters and fixed-bucket
+histograms updated in-process, plus collectors that read existing counters
+(cache, pools, memory) only when /metrics is scraped
+Performance: an observation is a bisect + two adds under an uncontended lock
+"""
+import os
+import sys
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+# Seconds - from sub-millisecond cache-served requests to slow report queries
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+
+    def _label_dict(self, values: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.label_names, values))
+
+
+class Counter(_Metric):
+    """Monotonic counter, optionally labeled"""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        for values, total in items:
+            yield self.name, self._label_dict(values), total
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    metric_type = "gauge"
+
+    def set(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram(_Metric):
+    """
+    Fixed-bucket histogram
+    Data Structure: per label set, a list of non-cumulative bucket counts plus sum;
+    buckets are made cumulative only at render time
+    """
+
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., +Inf count], sum
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = [(values, list(counts), total[0]) for values, (counts, total) in self._series.items()]
+        for values, counts, total in items:
+            labels = self._label_dict(values)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_count", labels, cumulative
+            yield f"{self.name}_sum", labels, total
+
+
+class MetricsRegistry:
+    """Owns metrics and scrape-time collectors; renders the text exposition format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Iterable[Sample]]]]] = []
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def collector(self, collect: Callable[[], Iterable[Tuple[str, str, str, Iterable[Sample]]]]):
+        """Register a function yielding (name, type, help, samples) at scrape time"""
+        self._collectors.append(collect)
+        return collect
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.header())
+            lines.extend(self._sample_lines(metric.samples()))
+        for collect in self._collectors:
+            for name, metric_type, documentation, samples in collect():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                lines.extend(self._sample_lines(samples))
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        existing: Optional[_Metric] = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    @staticmethod
+    def _sample_lines(samples: Iterable[Sample]) -> List[str]:
+        return [f"{name}{_format_labels(labels)} {_format_value(value)}" for name, labels, value in samples]
+
+
+# Global registry and the application's metrics
+metrics = MetricsRegistry()
+
+http_request_duration = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+db_query_duration = metrics.histogram(
+    "db_query_duration_seconds", "Duration of individual SQL statements", ("engine",)
+)
+event_publish_duration = metrics.histogram(
+    "event_bus_publish_duration_seconds", "Time to run all handlers for a published event", ("event_type",)
+)
+event_publish_in_flight = metrics.gauge(
+    "event_bus_publish_in_flight", "Events currently being dispatched to handlers"
+)
+ingested_rows = metrics.counter(
+    "ingested_rows_total", "Rows written by bulk imports - use rate() for rows/sec", ("source",)
+)
+
+
+def process_rss_bytes() -> int:
+    """Current resident set size (peak RSS where /proc is unavailable, 0 on Windows)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource  # POSIX only
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, KiB elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@metrics.collector
+def _process_metrics():
+    yield "process_resident_memory_bytes", "gauge", "Resident memory size", [
+        ("process_resident_memory_bytes", {}, process_rss_bytes())
+    ]
+    yield "process_cpu_seconds_total", "counter", "User and system CPU time", [
+        ("process_cpu_seconds_total", {}, sum(os.times()[:2]))
+    ]
@@ -0,0 +1,207 @@
+"""
+Monthly Sales Partitioning (PostgreSQL)
+Data Structure: `sales` as a RANGE-partitioned table, one partition per calendar
+month plus a DEFAULT partition for stray dates. Every service query filters on
+the raw `sales.date` column, so the planner prunes to the partitions overlapping
+the window - at plan time for literals, at execution time for bound parameters -
+and index maintenance only touches the current month.
+
+SQLite has no partition pruning: a UNION ALL view over monthly tables is
+scanned branch by branch and cannot take ORM inserts, so SQLite keeps the single
+table, where the date index already turns windows into range scans.
+"""
+import logging
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLE = "sales"
+DEFAULT_PARTITION = "sales_default"
+
+# Rebuilt on the partitioned parent - PostgreSQL cascades them to every partition
+SALES_INDEXES = (
+    ("ix_sales_date", "(date)"),
+    ("ix_sales_product_id", "(product_id)"),
+    ("ix_sales_date_customer", "(date, customer_id)"),
+    ("ix_sales_date_product_amount", "(date, product_id, amount_cents) INCLUDE (id)"),
+    ("ix_sales_customer_date_amount",
+     "(customer_id, date, amount_cents) INCLUDE (id) WHERE customer_id IS NOT NULL"),
+)
+# ON CONFLICT targets of deduplicating imports; unique indexes on the parent must include date
+SALES_UNIQUE_INDEXES = (
+    ("ux_sales_date_row_hash", "(date, row_hash)"),
+)
+# The current sales schema - migrations keep their own copies, fixed at their revision
+SALES_COLUMNS = ("id, date, product_name, amount_cents, customer_id, category, product_id, category_id, "
+                 "created_at, row_hash")
+SALES_COLUMN_DDL = """
+    id INTEGER NOT NULL DEFAULT nextval('sales_id_seq'),
+    date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    product_name VARCHAR NOT NULL,
+    amount_cents INTEGER NOT NULL,
+    customer_id VARCHAR,
+    category VARCHAR,
+    product_id INTEGER,
+    category_id INTEGER,
+    created_at TIMESTAMP WITHOUT TIME ZONE,
+    row_hash VARCHAR(32)
+"""
+
+
+# === Month arithmetic ===
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_range(start, end) -> List[date]:
+    """First days of every month overlapping [start, end]"""
+    months = []
+    month = month_start(start)
+    while month <= month_start(end):
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITIONED_TABLE}_y{month.year}m{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Inverse of partition_name; None for the default partition"""
+    try:
+        year, month = name.rsplit("_y", 1)[1].split("m")
+        return date(int(year), int(month), 1)
+    except (IndexError, ValueError):
+        return None
+
+
+def partition_ddl(month: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {PARTITIONED_TABLE} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def partitions_for_window(partition_names: Iterable[str], start: datetime, end: datetime) -> List[str]:
+    """Partitions a [start, end] window reads after pruning (the default partition always qualifies)"""
+    wanted = set(month_range(start, end))
+    return [name for name in partition_names
+            if name == DEFAULT_PARTITION or partition_month(name) in wanted]
+
+
+# === Catalog ===
+
+def supports_partitioning(conn: Connection) -> bool:
+    return conn.dialect.name == "postgresql"
+
+
+def is_partitioned(conn: Connection) -> bool:
+    if not supports_partitioning(conn):
+        return False
+    return bool(conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :table_name)"
+    ), {"table_name": PARTITIONED_TABLE}).scalar())
+
+
+def list_partitions(conn: Connection) -> List[Dict]:
+    """Partitions of sales with their bounds and planner row estimates"""
+    if not is_partitioned(conn):
+        return []
+    rows = conn.execute(text(
+        "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid), child.reltuples::bigint "
+        "FROM pg_inherits i JOIN pg_class parent ON parent.oid = i.inhparent "
+        "JOIN pg_class child ON child.oid = i.inhrelid "
+        "WHERE parent.relname = :table_name ORDER BY child.relname"
+    ), {"table_name": PARTITIONED_TABLE}).all()
+    return [{'name': name, 'bounds': bounds, 'estimated_rows': max(int(rows_estimate), 0)}
+            for name, bounds, rows_estimate in rows]
+
+
+# === Maintenance ===
+
+def ensure_upcoming_partitions(conn: Connection, months_ahead: int = 3,
+                               today: Optional[date] = None) -> List[str]:
+    """
+    Create this month's and the next `months_ahead` partitions if missing
+    Idempotent - run at startup and from the admin maintenance endpoint
+    """
+    if not is_partitioned(conn):
+        return []
+    existing = {partition['name'] for partition in list_partitions(conn)}
+    current = month_start(today or datetime.utcnow())
+    created = []
+    for month in month_range(current, add_months(current, months_ahead)):
+        if partition_name(month) not in existing:
+            # Fails if the default partition already holds rows for that month - logged, not fatal
+            try:
+                with conn.begin_nested():
+                    conn.execute(text(partition_ddl(month)))
+                created.append(partition_name(month))
+            except Exception as e:
+                logger.warning("Could not create partition %s: %s", partition_name(month), e)
+    return created
+
+
+def _create_sales_indexes(conn: Connection, indexes: Sequence[Tuple[str, str]],
+                          unique_indexes: Sequence[Tuple[str, str]]) -> None:
+    conn.execute(text("ALTER TABLE sales ADD CONSTRAINT fk_sales_product_id "
+                      "FOREIGN KEY (product_id) REFERENCES products (id)"))
+    conn.execute(text("ALTER TABLE sales ADD CONSTRAINT fk_sales_category_id "
+                      "FOREIGN KEY (category_id) REFERENCES categories (id)"))
+    for index_name, definition in unique_indexes:
+        conn.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {index_name} ON sales {definition}"))
+    for index_name, definition in indexes:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON sales {definition}"))
+
+
+def partition_sales_table(conn: Connection, months_ahead: int = 3, columns: str = SALES_COLUMNS,
+                          column_ddl: str = SALES_COLUMN_DDL,
+                          indexes: Sequence[Tuple[str, str]] = SALES_INDEXES,
+                          unique_indexes: Sequence[Tuple[str, str]] = SALES_UNIQUE_INDEXES) -> None:
+    """
+    Rebuild `sales` as a monthly RANGE-partitioned table
+    Rows are copied before keys and indexes exist, so the copy is a plain append;
+    the primary key becomes (id, date) because it must include the partition key.
+    The layout defaults to the current schema; a migration passes the one of its revision
+    """
+    conn.execute(text("ALTER TABLE sales RENAME TO sales_unpartitioned"))
+    conn.execute(text(f"CREATE TABLE sales ({column_ddl}) PARTITION BY RANGE (date)"))
+
+    bounds = conn.execute(text("SELECT min(date) FROM sales_unpartitioned")).scalar()
+    current = month_start(datetime.utcnow())
+    for month in month_range(min(bounds, datetime.utcnow()) if bounds else current,
+                             add_months(current, months_ahead)):
+        conn.execute(text(partition_ddl(month)))
+    conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF sales DEFAULT"))
+
+    conn.execute(text(f"INSERT INTO sales ({columns}) SELECT {columns} FROM sales_unpartitioned"))
+    # Keep the id sequence alive when the old table goes
+    conn.execute(text("ALTER SEQUENCE sales_id_seq OWNED BY sales.id"))
+    conn.execute(text("DROP TABLE sales_unpartitioned"))
+    conn.execute(text("ALTER TABLE sales ADD CONSTRAINT sales_pkey PRIMARY KEY (id, date)"))
+    _create_sales_indexes(conn, indexes, unique_indexes)
+
+
+def unpartition_sales_table(conn: Connection, columns: str = SALES_COLUMNS,
+                            column_ddl: str = SALES_COLUMN_DDL,
+                            indexes: Sequence[Tuple[str, str]] = SALES_INDEXES,
+                            unique_indexes: Sequence[Tuple[str, str]] = SALES_UNIQUE_INDEXES) -> None:
+    """Inverse of partition_sales_table - back to one heap table keyed on id"""
+    conn.execute(text("ALTER TABLE sales RENAME TO sales_partitioned"))
+    conn.execute(text(f"CREATE TABLE sales ({column_ddl})"))
+    conn.execute(text(f"INSERT INTO sales ({columns}) SELECT {columns} FROM sales_partitioned"))
+    conn.execute(text("ALTER SEQUENCE sales_id_seq OWNED BY sales.id"))
+    conn.execute(text("DROP TABLE sales_partitioned CASCADE"))
+    conn.execute(text("ALTER TABLE sales ADD CONSTRAINT sales_pkey PRIMARY KEY (id)"))
+    _create_sales_indexes(conn, indexes, unique_indexes)
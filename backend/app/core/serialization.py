@@ -0,0 +1,66 @@
+"""
+Fast Response Serialization
+Listing endpoints select plain column tuples, turn them into dicts in one pass
+and render with orjson - no ORM objects, no per-row pydantic models, and no
+second validation against response_model (the declared model still drives OpenAPI)
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # stdlib json fallback - same output, slower
+    orjson = None
+
+# (field name, column) pairs - the order of a selected row
+ColumnSpec = Sequence[Tuple[str, Any]]
+
+
+def select_columns(columns: ColumnSpec) -> List[Any]:
+    return [column for _, column in columns]
+
+
+def to_cents(amount: Any) -> int:
+    """
+    Dollars (float, str or Decimal) -> integer cents, rounded to the nearest cent
+    int(amount * 100) truncates: 19.99 is 19.989999... as a float and became 1998
+    """
+    return int(round(Decimal(str(amount)) * 100))
+
+
+def rows_to_records(columns: ColumnSpec, rows: Sequence[Tuple],
+                    cents_field: Optional[str] = "amount") -> List[Dict[str, Any]]:
+    """Row tuples -> response dicts; the cents column becomes dollars like the pydantic schemas"""
+    fields = [field for field, _ in columns]
+    if cents_field is None:
+        return [dict(zip(fields, row)) for row in rows]
+    amount_index = fields.index(cents_field)
+    records = []
+    for row in rows:
+        values = list(row)
+        values[amount_index] = values[amount_index] / 100
+        records.append(dict(zip(fields, values)))
+    return records
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact JSON bytes; datetimes as ISO 8601 like pydantic"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_json_default, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,129 @@
+"""
+Single-Writer Queue
+SQLite allows one write transaction at a time. Instead of letting writers race
+for the lock (and spin on SQLITE_BUSY until the busy timeout), sync writes are
+queued FIFO onto one dedicated thread. With WAL, reads never wait for it.
+Async code awaits its turn (run_async, turn) instead of blocking the event loop.
+"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, TypeVar
+from .config import settings
+
+T = TypeVar("T")
+
+
+class WriteQueue:
+    """
+    Data Structure: Single-worker executor - its internal FIFO is the write queue
+    Work items are plain callables; the caller blocks (or awaits) until its item
+    has run, so passing a Session into the callable is safe (only one thread uses
+    it at a time). Disabled (inline execution) for databases with real concurrent writers.
+    """
+
+    def __init__(self, enabled: bool = True, name: str = "sqlite-writer"):
+        self.enabled = enabled
+        self.name = name
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._writer_thread = None
+        self._submitted = 0
+        self._completed = 0
+
+    def run(self, work: Callable[..., T], *args: Any) -> T:
+        """Run a write on the writer thread and return its result (exceptions propagate)"""
+        if not self.enabled or threading.current_thread() is self._writer_thread:
+            # Nested writes are already on the writer thread - queueing them would deadlock
+            return work(*args)
+        if _on_event_loop():
+            # Blocking here could wait on an async commit (turn) that needs this very loop;
+            # coroutines use run_async - a sync write left on the loop runs inline, as before the queue
+            return work(*args)
+        return self.submit(work, *args).result()
+
+    async def run_async(self, work: Callable[..., T], *args: Any) -> T:
+        """run() for coroutines: the event loop keeps serving requests while the write waits its turn"""
+        if not self.enabled or threading.current_thread() is self._writer_thread:
+            return work(*args)
+        return await asyncio.wrap_future(self.submit(work, *args))
+
+    @asynccontextmanager
+    async def turn(self) -> AsyncIterator[None]:
+        """
+        Hold the writer while the event loop writes (AsyncSession commits run on the
+        loop, not on the writer thread): a placeholder item occupies the writer
+        thread until the block exits, so async commits queue FIFO with sync writes
+        """
+        if not self.enabled:
+            yield
+            return
+        loop = asyncio.get_running_loop()
+        started = loop.create_future()
+        released = threading.Event()
+
+        def hold() -> None:
+            loop.call_soon_threadsafe(_set_done, started)
+            released.wait()
+
+        self.submit(hold)
+        try:
+            await started
+            yield
+        finally:
+            released.set()
+
+    def submit(self, work: Callable[..., T], *args: Any) -> "Future[T]":
+        """Queue a write without waiting for it"""
+        self._submitted += 1
+        # Run in the caller's context so per-request instrumentation sees queued writes
+        context = contextvars.copy_context()
+        return self._get_executor().submit(context.run, self._execute, work, *args)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'queued': self._submitted - self._completed,
+            'completed': self._completed
+        }
+
+    def shutdown(self) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+                self._writer_thread = None
+
+    def _execute(self, work: Callable[..., T], *args: Any) -> T:
+        self._writer_thread = threading.current_thread()
+        try:
+            return work(*args)
+        finally:
+            self._completed += 1
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created on first use so importing the app does not start a thread
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.name)
+        return self._executor
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _set_done(future: "asyncio.Future[None]") -> None:
+    if not future.done():  # Cancelled while waiting for its turn
+        future.set_result(None)
+
+
+# Global write queue - only SQLite needs writes serialized in-process
+write_queue = WriteQueue(enabled="sqlite" in settings.database_url)
@@ -1,17 +1,54 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from .core.config import settings
-from .core.database import engine, Base, get_db
+from .core.database import engine, Base, AsyncSessionLocal, dispose_async_engines, get_async_engine
 from .core.events import event_bus
+from .core.partitioning import ensure_upcoming_partitions
+from .core.instrumentation import query_registry, start_request
+from .core.metrics import http_request_duration, metrics
+from .core.pagination import NEXT_CURSOR_HEADER
 from .services.analytics_event_handler import AnalyticsEventHandler
-from .api import routes_upload, routes_kpi, routes_admin, sales, customers, expenses, routes_csv_upload, dashboard, data_entry
+from .services.columnar_store import columnar_sales
+from .services.suggestions import suggestions
+from .api import routes_upload, routes_kpi, routes_admin, sales, customers, expenses, routes_csv_upload, dashboard, data_entry, routes_export
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Keep the optional in-memory column store current from sale events
+if settings.columnar_engine:
+    columnar_sales.attach(event_bus)
+
+# Autocomplete names and popularity follow sale/customer events
+if settings.suggestion_index_enabled:
+    suggestions.attach(event_bus)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup/shutdown work, run by the server: importing the app (workers, tests,
+    tooling) opens no connections
+    Schema: `alembic upgrade head` is the deployment step; AUTO_CREATE_SCHEMA=true
+    runs create_all instead (local development only)
+    """
+    if settings.auto_create_schema:
+        Base.metadata.create_all(bind=engine)
+
+    # Partitioned sales (PostgreSQL): make sure the coming months have partitions
+    if settings.sales_partitioning:
+        with engine.begin() as conn:
+            ensure_upcoming_partitions(conn, settings.sales_partitions_ahead)
+
+    # KPI recalculation on events: one primary session per event - a lagging replica
+    # would cache the pre-write KPIs for the full kpi_summary TTL
+    analytics_handler = AnalyticsEventHandler(lambda: AsyncSessionLocal(bind=get_async_engine()))
+    try:
+        yield
+    finally:
+        analytics_handler.close()
+        await dispose_async_engines()
 
-# Initialize analytics event handler
-db = next(get_db())
-analytics_handler = AnalyticsEventHandler(db)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -19,7 +56,8 @@ app = FastAPI(
     description="Analytics API for retail businesses",
     version="1.0.0",
     docs_url="/docs",  # Swagger UI
-    redoc_url="/redoc"  # ReDoc UI
+    redoc_url="/redoc",  # ReDoc UI
+    lifespan=lifespan
 )
 
 # CORS middleware for frontend integration
@@ -29,8 +67,46 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["Content-Type", "Authorization"],
+    expose_headers=[NEXT_CURSOR_HEADER],  # Keyset pagination token must be readable by the frontend
 )
 
+@app.middleware("http")
+async def instrument_queries(request: Request, call_next):
+    """Attribute SQL statements to the request; report them in Server-Timing"""
+    if not settings.query_instrumentation:
+        return await call_next(request)
+    
+    stats = start_request(request.url.path)
+    response = await call_next(request)
+    
+    route = request.scope.get("route")
+    endpoint = f"{request.method} {getattr(route, 'path', request.url.path)}"
+    query_registry.record_request(endpoint, stats)
+    response.headers["Server-Timing"] = stats.server_timing()
+    response.headers["X-DB-Query-Count"] = str(stats.statement_count)
+    return response
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Request latency histogram, labeled by route template to keep cardinality bounded"""
+    if not settings.metrics_enabled:
+        return await call_next(request)
+    
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        http_request_duration.observe(
+            time.perf_counter() - started,
+            request.method, getattr(route, "path", "unmatched"), str(status)
+        )
+
+
 # Include API routes
 app.include_router(routes_upload.router, prefix=settings.api_v1_prefix)
 app.include_router(routes_csv_upload.router, prefix=settings.api_v1_prefix)
@@ -41,6 +117,7 @@ app.include_router(routes_admin.router, prefix=settings.api_v1_prefix)
 app.include_router(sales.router, prefix=settings.api_v1_prefix)
 app.include_router(customers.router, prefix=settings.api_v1_prefix)
 app.include_router(expenses.router, prefix=settings.api_v1_prefix)
+app.include_router(routes_export.router, prefix=settings.api_v1_prefix)
 
 
 @app.get("/")
@@ -60,4 +137,10 @@ async def health_check():
         "status": "healthy",
         "database": "connected",
         "version": "1.0.0"
-    }
\ No newline at end of file
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus text exposition of the in-process metrics registry"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
@@ -1,4 +1,4 @@
-# Import from analytics.py which has the optimized models
-from .analytics import Sale, Customer, Expense
+# analytics.py is the single model set for every table
+from .analytics import Sale, Customer, Expense, Product, Category
 
-__all__ = ["Sale", "Customer", "Expense"]
\ No newline at end of file
+__all__ = ["Sale", "Customer", "Expense", "Product", "Category"]
\ No newline at end of file
@@ -1,23 +1,50 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..core.database import Base
 
 
+class Product(Base):
+    __tablename__ = "products"
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+
+
+class Category(Base):
+    __tablename__ = "categories"
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+
+
 class Sale(Base):
     __tablename__ = "sales"
     
-    id = Column(Integer, primary_key=True, index=True)
-    date = Column(DateTime, nullable=False, index=True)  # Index for time-series queries
+    id = Column(Integer, primary_key=True)
+    date = Column(DateTime, nullable=False, index=True)  # Index for time-series queries and (date, id) pages
     product_name = Column(String, nullable=False)
     amount_cents = Column(Integer, nullable=False)  # Store as cents to avoid float issues
-    customer_id = Column(String, nullable=True, index=True)  # Index for repeat customer analysis
+    customer_id = Column(String, nullable=True)  # Looked up via ix_sales_customer_date_amount
     category = Column(String, nullable=True)
+    # Integer surrogate keys resolved from the names above - analytics group by these
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=True, index=True)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    row_hash = Column(String(32), nullable=True)  # Content digest set by deduplicating imports (services/upserts.py)
     
     # Composite index for common queries
     __table_args__ = (
         Index('ix_sales_date_customer', 'date', 'customer_id'),
+        # Covering indexes for the analytics shapes (see alembic covering_indexes.py)
+        Index('ix_sales_date_product_amount', 'date', 'product_id', 'amount_cents',
+              postgresql_include=['id']),
+        Index('ix_sales_customer_date_amount', 'customer_id', 'date', 'amount_cents',
+              postgresql_include=['id'],
+              postgresql_where=text('customer_id IS NOT NULL'),
+              sqlite_where=text('customer_id IS NOT NULL')),
+        # ON CONFLICT target for re-imports; includes date, the partition key
+        Index('ux_sales_date_row_hash', 'date', 'row_hash', unique=True),
     )
 
 
@@ -28,14 +55,67 @@ class Customer(Base):
     name = Column(String, nullable=True)
     email = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Keyset pagination order - (created_at, id) newest first
+    __table_args__ = (
+        Index('ix_customers_created_at_id', 'created_at', 'id'),
+    )
 
 
 class Expense(Base):
     __tablename__ = "expenses"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     date = Column(DateTime, nullable=False, index=True)
     description = Column(String, nullable=False)
     amount_cents = Column(Integer, nullable=False)
     category = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+    row_hash = Column(String(32), nullable=True)  # Content digest set by deduplicating imports
+    
+    # Covering index for expense totals by window and category
+    __table_args__ = (
+        Index('ix_expenses_date_category_amount', 'date', 'category', 'amount_cents'),
+        Index('ux_expenses_row_hash', 'row_hash', unique=True),
+    )
+
+
+class ImportFile(Base):
+    """One imported file or Sheets range, by content hash (services/import_ledger.py)"""
+    __tablename__ = "import_files"
+    
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)  # sales / customers / expenses
+    source = Column(String, nullable=False)  # Endpoint, or sheets:<spreadsheet id>:<range>
+    content_hash = Column(String(32), nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    total_rows = Column(Integer, nullable=False)
+    chunks = Column(Integer, nullable=False)
+    chunks_processed = Column(Integer, nullable=False)  # Chunks not seen in an earlier import
+    records_written = Column(Integer, nullable=False)
+    imported_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('ux_import_files_kind_hash', 'kind', 'content_hash', unique=True),
+    )
+
+
+class ImportChunk(Base):
+    """Hash of an imported chunk of rows - a later file containing it skips those rows"""
+    __tablename__ = "import_chunks"
+    
+    kind = Column(String, primary_key=True)
+    chunk_hash = Column(String(32), primary_key=True)
+    file_id = Column(Integer, ForeignKey("import_files.id"), nullable=False)
+
+
+class SheetSyncState(Base):
+    """Incremental Google Sheets sync cursor, one per sheet (services/sheets_connector.py)"""
+    __tablename__ = "sheet_sync_state"
+    
+    spreadsheet_id = Column(String, primary_key=True)
+    sheet_name = Column(String, primary_key=True)
+    header = Column(String, nullable=False)  # Header row as synced - a changed header restarts from row 2
+    last_row = Column(Integer, nullable=False)  # Every sheet row up to this one is synced (1 = header only)
+    rows_synced = Column(Integer, nullable=False, default=0)
+    synced_at = Column(DateTime, default=datetime.utcnow)
@@ -1,15 +0,0 @@
-from sqlalchemy import Column, Integer, String, DateTime
-from sqlalchemy.orm import relationship
-from ..core.database import Base
-from datetime import datetime
-
-class Customer(Base):
-    __tablename__ = "customers"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, nullable=False)
-    email = Column(String, unique=True, nullable=True)
-    phone = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    
-    sales = relationship("Sale", back_populates="customer")
\ No newline at end of file
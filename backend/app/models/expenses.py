@@ -1,13 +0,0 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
-from ..core.database import Base
-from datetime import datetime
-
-class Expense(Base):
-    __tablename__ = "expenses"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    category = Column(String, nullable=False)
-    description = Column(String, nullable=True)
-    amount = Column(Float, nullable=False)
-    expense_date = Column(DateTime, default=datetime.utcnow)
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
@@ -1,18 +0,0 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
-from ..core.database import Base
-from datetime import datetime
-
-class Sale(Base):
-    __tablename__ = "sales"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    product_name = Column(String, nullable=False)
-    quantity = Column(Integer, nullable=False)
-    unit_price = Column(Float, nullable=False)
-    total_amount = Column(Float, nullable=False)
-    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=True)
-    sale_date = Column(DateTime, default=datetime.utcnow)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    
-    customer = relationship("Customer", back_populates="sales")
\ No newline at end of file
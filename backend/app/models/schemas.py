@@ -137,6 +137,10 @@ class KPISummary(BaseModel):
 class UploadResponse(BaseModel):
     message: str
     records_processed: int
+    duplicates_skipped: int = 0  # Rows already imported (deduplicating imports)
+    already_imported: bool = False  # Identical file found in the import ledger - nothing processed
+    chunks_skipped: int = 0  # Chunks of rows the ledger had seen in earlier imports
+    possible_corrections: List[str] = []  # Written rows differing from an earlier import on the same natural key
     errors: List[str] = []
 
 # === ERROR SCHEMAS ===
@@ -1,9 +1,13 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
-from ..models.analytics import Sale, Customer
+from typing import Dict, List, Optional, Tuple
+from ..core.config import settings
 from collections import defaultdict
+from .top_products import TopProductsService
+from .customer_sketches import CustomerSketchService, VIP_THRESHOLD_CENTS
+from .columnar_store import ColumnarSalesStore, columnar_sales
+from .statements import TREND_PERIODS, statements
 
 
 class AnalyticsService:
@@ -20,14 +24,13 @@ class AnalyticsService:
         Algorithm: Single-pass aggregation with SQL optimization
         Data Structure: Dictionary for O(1) lookups
         """
+        columnar = self._columnar()
+        if columnar is not None:
+            return columnar.revenue_metrics(start_date, end_date)
+        
         # Use SQL aggregation instead of Python loops - much faster for large datasets
-        revenue_query = self.db.query(
-            func.sum(Sale.amount_cents).label('total_cents'),
-            func.count(Sale.id).label('total_sales'),
-            func.avg(Sale.amount_cents).label('avg_cents')
-        ).filter(
-            Sale.date >= start_date,
-            Sale.date <= end_date
+        revenue_query = statements.execute(
+            self.db, "revenue_metrics", start_date=start_date, end_date=end_date
         ).first()
         
         total_cents = revenue_query.total_cents or 0
@@ -40,53 +43,68 @@ class AnalyticsService:
             'average_order_value': avg_cents / 100 if avg_cents else 0
         }
     
-    def get_top_products(self, start_date: datetime, end_date: datetime, limit: int = 5) -> List[Dict]:
+    def get_top_products(self, start_date: datetime, end_date: datetime, limit: int = 5,
+                         rank_by: str = 'revenue') -> List[Dict]:
         """
-        Algorithm: SQL GROUP BY with ORDER BY - database does the heavy lifting
-        Why this approach: Let the database engine optimize the sorting
+        Algorithm: Cached per-day partials merged with a bounded heap
+        Why this approach: Avoids re-grouping the whole window on every call
         """
-        top_products = self.db.query(
-            Sale.product_name,
-            func.sum(Sale.amount_cents).label('total_revenue_cents'),
-            func.count(Sale.id).label('sales_count')
-        ).filter(
-            Sale.date >= start_date,
-            Sale.date <= end_date
-        ).group_by(
-            Sale.product_name
-        ).order_by(
-            desc('total_revenue_cents')
-        ).limit(limit).all()
-        
-        return [
-            {
-                'product_name': product.product_name,
-                'total_revenue': product.total_revenue_cents / 100,
-                'sales_count': product.sales_count
-            }
-            for product in top_products
-        ]
+        columnar = self._columnar()
+        if columnar is not None:
+            return columnar.top_products(start_date, end_date, limit, rank_by)
+        return TopProductsService(self.db).get_top_products(start_date, end_date, limit, rank_by)
     
-    def count_repeat_customers(self, start_date: datetime, end_date: datetime) -> int:
+    def count_repeat_customers(self, start_date: datetime, end_date: datetime, exact: bool = False) -> int:
         """
         Algorithm: SQL subquery to count customers with multiple purchases
         Data Structure: Set operations handled by database
+        Approximate mode: merged per-day sketches, unless exact=True
         """
-        # Find customers who made more than 1 purchase in the period
-        repeat_customers = self.db.query(
-            Sale.customer_id,
-            func.count(Sale.id).label('purchase_count')
-        ).filter(
-            Sale.date >= start_date,
-            Sale.date <= end_date,
-            Sale.customer_id.isnot(None)  # Only count identified customers
-        ).group_by(
-            Sale.customer_id
-        ).having(
-            func.count(Sale.id) > 1
-        ).count()
+        if self._use_sketches(exact):
+            return CustomerSketchService(self.db).count_repeat_customers(start_date, end_date)
+        columnar = self._columnar()
+        if columnar is not None:
+            return columnar.count_repeat_customers(start_date, end_date)
         
-        return repeat_customers
+        # Identified customers who made more than 1 purchase in the period
+        return statements.execute(
+            self.db, "repeat_customers", start_date=start_date, end_date=end_date
+        ).scalar()
+    
+    def get_customer_summary(self, start_date: Optional[datetime] = None,
+                             end_date: Optional[datetime] = None, exact: bool = False) -> Dict[str, int]:
+        """
+        Total/new/repeat/VIP customer counts, all-time when no window is given
+        Algorithm: One GROUP BY customer_id subquery aggregated with CASE, or
+        merged per-day sketches in approximate mode
+        """
+        if self._use_sketches(exact):
+            if start_date is None or end_date is None:
+                bounds = statements.execute(self.db, "sales_date_bounds").first()
+                if not bounds or bounds[0] is None:
+                    return {'total_customers': 0, 'new_customers': 0, 'repeat_customers': 0, 'vip_customers': 0}
+                start_date = start_date or bounds[0]
+                end_date = end_date or bounds[1]
+            return CustomerSketchService(self.db).customer_summary(start_date, end_date)
+        
+        # One prepared variant per window shape
+        if start_date is not None and end_date is not None:
+            name = "customer_summary"
+        elif start_date is not None:
+            name = "customer_summary_since"
+        elif end_date is not None:
+            name = "customer_summary_until"
+        else:
+            name = "customer_summary_all_time"
+        result = statements.execute(self.db, name, start_date=start_date, end_date=end_date,
+                                    vip_threshold=VIP_THRESHOLD_CENTS).first()
+        
+        return {
+            'total_customers': result.total_customers or 0,
+            'new_customers': result.new_customers or 0,
+            'repeat_customers': result.repeat_customers or 0,
+            'vip_customers': result.vip_customers or 0
+        }
     
     def get_revenue_trend(self, start_date: datetime, end_date: datetime, 
                          interval: str = 'daily') -> List[Dict]:
@@ -94,25 +112,13 @@ class AnalyticsService:
         Algorithm: Time-series aggregation with date truncation
         Performance: Single query instead of multiple date range queries
         """
-        if interval == 'daily':
-            date_trunc = func.date(Sale.date)
-        elif interval == 'weekly':
-            # SQLite doesn't have date_trunc, so we use a simpler approach
-            date_trunc = func.strftime('%Y-%W', Sale.date)
-        else:  # monthly
-            date_trunc = func.strftime('%Y-%m', Sale.date)
+        columnar = self._columnar()
+        if columnar is not None:
+            return columnar.revenue_trend(start_date, end_date, interval)
         
-        trend_data = self.db.query(
-            date_trunc.label('period'),
-            func.sum(Sale.amount_cents).label('revenue_cents')
-        ).filter(
-            Sale.date >= start_date,
-            Sale.date <= end_date
-        ).group_by(
-            date_trunc
-        ).order_by(
-            date_trunc
-        ).all()
+        # SQLite doesn't have date_trunc - daily/weekly/monthly strftime variants (anything else is monthly)
+        name = f"revenue_trend_{interval if interval in TREND_PERIODS else 'monthly'}"
+        trend_data = statements.execute(self.db, name, start_date=start_date, end_date=end_date).all()
         
         return [
             {
@@ -141,4 +147,50 @@ class AnalyticsService:
             'repeat_customers_count': repeat_customers,
             'period_start': start_date,
             'period_end': end_date
-        }
\ No newline at end of file
+        }
+    
+    def _columnar(self) -> Optional[ColumnarSalesStore]:
+        """The loaded in-memory column store, when the columnar engine is enabled"""
+        if not settings.columnar_engine:
+            return None
+        return columnar_sales.ensure_loaded(self.db)
+    
+    @staticmethod
+    def _use_sketches(exact: bool) -> bool:
+        """Approximate mode is opt-in via settings and always overridable per call"""
+        return settings.approximate_customer_counts and not exact
+
+
+class AsyncAnalyticsService:
+    """
+    AnalyticsService for async handlers
+    Why this approach: The query logic runs unchanged inside AsyncSession.run_sync,
+    so both paths share one implementation while the event loop stays free during I/O
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def calculate_revenue_metrics(self, start_date: datetime, end_date: datetime) -> Dict:
+        return await self._run('calculate_revenue_metrics', start_date, end_date)
+    
+    async def get_top_products(self, start_date: datetime, end_date: datetime, limit: int = 5,
+                               rank_by: str = 'revenue') -> List[Dict]:
+        return await self._run('get_top_products', start_date, end_date, limit, rank_by)
+    
+    async def count_repeat_customers(self, start_date: datetime, end_date: datetime, exact: bool = False) -> int:
+        return await self._run('count_repeat_customers', start_date, end_date, exact)
+    
+    async def get_customer_summary(self, start_date: Optional[datetime] = None,
+                                   end_date: Optional[datetime] = None, exact: bool = False) -> Dict[str, int]:
+        return await self._run('get_customer_summary', start_date, end_date, exact)
+    
+    async def get_revenue_trend(self, start_date: datetime, end_date: datetime,
+                                interval: str = 'daily') -> List[Dict]:
+        return await self._run('get_revenue_trend', start_date, end_date, interval)
+    
+    async def generate_kpi_summary(self, days_back: int = 30) -> Dict:
+        return await self._run('generate_kpi_summary', days_back)
+    
+    async def _run(self, method: str, *args):
+        return await self.db.run_sync(lambda session: getattr(AnalyticsService(session), method)(*args))
@@ -1,78 +1,86 @@
 from datetime import datetime
-from sqlalchemy.orm import Session
+from typing import Callable, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.config import settings
+from ..core.event_handlers import SessionScopedHandlers
 from ..core.events import Event, EventType, event_bus
-from .kpi_service import KPIService
+from .kpi_service import AsyncKPIService
 
 class AnalyticsEventHandler:
-    """Handles analytics-related events and triggers KPI recalculation"""
+    """
+    Handles analytics-related events and triggers KPI recalculation
+    Each event runs on its own short-lived session (SessionScopedHandlers); at most
+    max_concurrency recalculations hold a connection at once
+    """
     
-    def __init__(self, db: Session):
-        self.db = db
-        self.kpi_service = KPIService(db)
+    def __init__(self, session_factory: Callable[[], AsyncSession], max_concurrency: Optional[int] = None):
+        self.handlers = SessionScopedHandlers(
+            "analytics", session_factory, max_concurrency or settings.event_handler_concurrency
+        )
         self._setup_event_handlers()
     
     def _setup_event_handlers(self):
         """Subscribe to relevant events"""
         # Sales events trigger KPI recalculation
-        event_bus.subscribe(EventType.SALE_CREATED, self.handle_sales_change)
-        event_bus.subscribe(EventType.SALE_UPDATED, self.handle_sales_change)
-        event_bus.subscribe(EventType.SALE_DELETED, self.handle_sales_change)
+        self._subscribe(EventType.SALE_CREATED, self.handle_sales_change)
+        self._subscribe(EventType.SALE_UPDATED, self.handle_sales_change)
+        self._subscribe(EventType.SALE_DELETED, self.handle_sales_change)
+        # Deduplicating imports publish one event per import instead of one per row
+        self._subscribe(EventType.DATA_SYNC_COMPLETED, self.handle_sales_change)
         
         # Expense events trigger profit margin recalculation
-        event_bus.subscribe(EventType.EXPENSE_CREATED, self.handle_expense_change)
-        event_bus.subscribe(EventType.EXPENSE_UPDATED, self.handle_expense_change)
+        self._subscribe(EventType.EXPENSE_CREATED, self.handle_expense_change)
+        self._subscribe(EventType.EXPENSE_UPDATED, self.handle_expense_change)
         
         # Customer events for repeat customer analysis
-        event_bus.subscribe(EventType.CUSTOMER_CREATED, self.handle_customer_change)
-        event_bus.subscribe(EventType.CUSTOMER_UPDATED, self.handle_customer_change)
+        self._subscribe(EventType.CUSTOMER_CREATED, self.handle_customer_change)
+        self._subscribe(EventType.CUSTOMER_UPDATED, self.handle_customer_change)
+        self._subscribe(EventType.CUSTOMER_DELETED, self.handle_customer_change)
+    
+    def _subscribe(self, event_type: EventType, handler) -> None:
+        self.handlers.subscribe(event_bus, event_type, handler)
+    
+    def close(self) -> None:
+        """Unsubscribe from the bus (app shutdown) - no session outlives an event"""
+        self.handlers.close()
+    
+    # Errors propagate: SessionScopedHandlers counts them and the bus logs them
     
-    async def handle_sales_change(self, event: Event):
+    async def handle_sales_change(self, event: Event, db: AsyncSession):
         """Handle sales-related events"""
-        try:
-            # Trigger KPI recalculation
-            await self._recalculate_sales_kpis()
-            
-            # Emit KPI calculated event
-            await self._emit_kpi_calculated_event("sales_kpis", event.entity_id)
-            
-        except Exception as e:
-            print(f"Error handling sales change event: {e}")
+        # Trigger KPI recalculation
+        await self._recalculate_sales_kpis(db)
+        
+        # Emit KPI calculated event
+        await self._emit_kpi_calculated_event("sales_kpis", event.entity_id)
     
-    async def handle_expense_change(self, event: Event):
+    async def handle_expense_change(self, event: Event, db: AsyncSession):
         """Handle expense-related events"""
-        try:
-            # Trigger profit margin recalculation
-            await self._recalculate_profit_margins()
-            
-            # Emit KPI calculated event
-            await self._emit_kpi_calculated_event("profit_margins", event.entity_id)
-            
-        except Exception as e:
-            print(f"Error handling expense change event: {e}")
+        # Trigger profit margin recalculation
+        await self._recalculate_profit_margins(db)
+        
+        # Emit KPI calculated event
+        await self._emit_kpi_calculated_event("profit_margins", event.entity_id)
     
-    async def handle_customer_change(self, event: Event):
+    async def handle_customer_change(self, event: Event, db: AsyncSession):
         """Handle customer-related events"""
-        try:
-            # Trigger customer analytics recalculation
-            await self._recalculate_customer_analytics()
-            
-            # Emit KPI calculated event
-            await self._emit_kpi_calculated_event("customer_analytics", event.entity_id)
-            
-        except Exception as e:
-            print(f"Error handling customer change event: {e}")
+        # Trigger customer analytics recalculation
+        await self._recalculate_customer_analytics(db)
+        
+        # Emit KPI calculated event
+        await self._emit_kpi_calculated_event("customer_analytics", event.entity_id)
     
-    async def _recalculate_sales_kpis(self):
+    async def _recalculate_sales_kpis(self, db: AsyncSession):
         """Recalculate sales-related KPIs"""
-        await self.kpi_service.calculate_all_kpis()
+        await AsyncKPIService(db).calculate_all_kpis()
     
-    async def _recalculate_profit_margins(self):
+    async def _recalculate_profit_margins(self, db: AsyncSession):
         """Recalculate profit margins"""
-        await self.kpi_service.calculate_all_kpis()
+        await AsyncKPIService(db).calculate_all_kpis()
     
-    async def _recalculate_customer_analytics(self):
+    async def _recalculate_customer_analytics(self, db: AsyncSession):
         """Recalculate customer analytics"""
-        await self.kpi_service.calculate_all_kpis()
+        await AsyncKPIService(db).calculate_all_kpis()
     
     async def _emit_kpi_calculated_event(self, kpi_type: str, trigger_entity_id: str):
         """Emit event when KPIs are recalculated"""
@@ -0,0 +1,272 @@
+"""
+Columnar In-Memory Sales Engine
+Algorithm: Sales held as NumPy column arrays; every query is a vectorized
+mask + bincount instead of a database round trip
+"""
+import threading
+import time as time_module
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..core.database import cache_rebuild_session
+from ..core.events import Event, EventType, EventBus
+from ..models.analytics import Sale
+
+EPOCH = datetime(1970, 1, 1)
+MICROS_PER_DAY = 86_400_000_000
+LOAD_BATCH_SIZE = 50_000
+
+
+def _to_micros(value: datetime) -> int:
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+class _Dictionary:
+    """Dictionary encoding for a string column - code -1 means NULL"""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def encode(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+
+class ColumnarSalesStore:
+    """
+    In-process column store for the sales table
+    Data Structure: Parallel NumPy arrays sorted by sale id, with a liveness mask
+    - ts:        int64 epoch microseconds (range filters)
+    - day:       int64 epoch days (daily/weekly/monthly grouping)
+    - amount:    int64 cents
+    - product, customer, category: int32 dictionary codes
+    Kept current from SALE_* events; bulk imports mark it stale for a reload.
+    Production: Per-process copy - set columnar_reload_seconds for multi-worker setups
+    """
+
+    COLUMNS = (('id', np.int64), ('ts', np.int64), ('day', np.int64), ('amount', np.int64),
+               ('product', np.int32), ('customer', np.int32), ('category', np.int32), ('alive', np.bool_))
+
+    def __init__(self, reload_seconds: Optional[int] = None):
+        self.reload_seconds = reload_seconds if reload_seconds is not None else settings.columnar_reload_seconds
+        self._lock = threading.RLock()
+        self._reset()
+
+    # === Loading and maintenance ===
+
+    def ensure_loaded(self, db: Session) -> "ColumnarSalesStore":
+        """Load (or reload) from the database if empty, stale or past its refresh interval"""
+        expired = self.reload_seconds and time_module.monotonic() - self._loaded_at > self.reload_seconds
+        if not self._loaded or self._stale or expired:
+            # Kept until the next reload, so never loaded from a lagging replica
+            with cache_rebuild_session(db) as primary:
+                self.load(primary)
+        return self
+
+    def load(self, db: Session) -> None:
+        """Full load in id order, streamed in batches"""
+        with self._lock:
+            self._reset()
+            stmt = select(
+                Sale.id, Sale.date, Sale.amount_cents, Sale.product_name, Sale.customer_id, Sale.category
+            ).order_by(Sale.id).execution_options(yield_per=LOAD_BATCH_SIZE)
+
+            for batch in db.execute(stmt).partitions():
+                ids, dates, amounts, products, customers, categories = zip(*batch)
+                self._append_batch(
+                    np.array(ids, dtype=np.int64),
+                    np.array(dates, dtype='datetime64[us]').astype(np.int64),
+                    np.array(amounts, dtype=np.int64),
+                    np.array([self._products.encode(v) for v in products], dtype=np.int32),
+                    np.array([self._customers.encode(v) for v in customers], dtype=np.int32),
+                    np.array([self._categories.encode(v) for v in categories], dtype=np.int32),
+                )
+
+            self._loaded = True
+            self._stale = False
+            self._loaded_at = time_module.monotonic()
+
+    def mark_stale(self) -> None:
+        """Force a reload on next use (bulk writes that bypass events)"""
+        self._stale = True
+
+    def attach(self, bus: EventBus) -> None:
+        """Subscribe to sale events so the store stays current without reloads"""
+        bus.subscribe(EventType.SALE_CREATED, self.handle_sale_event)
+        bus.subscribe(EventType.SALE_UPDATED, self.handle_sale_event)
+        bus.subscribe(EventType.SALE_DELETED, self.handle_sale_event)
+
+    def handle_sale_event(self, event: Event) -> None:
+        """Apply a committed sale create/update/delete to the arrays"""
+        if not self._loaded:
+            return
+        data = event.data
+        sale_id = int(data.get('id', event.entity_id))
+
+        with self._lock:
+            row = self._row_for_id(sale_id)
+            if event.event_type == EventType.SALE_DELETED:
+                if row is not None:
+                    self._alive[row] = False
+                return
+
+            ts = _to_micros(data['date'])
+            amount = int(data['amount_cents'])
+            product = self._products.encode(data.get('product_name'))
+            customer = self._customers.encode(data.get('customer_id'))
+            category = self._categories.encode(data.get('category'))
+
+            if row is not None:
+                self._ts[row] = ts
+                self._day[row] = ts // MICROS_PER_DAY
+                self._amount[row] = amount
+                self._product[row] = product
+                self._customer[row] = customer
+                self._category[row] = category
+                self._alive[row] = True
+            elif self._size == 0 or sale_id > self._id[self._size - 1]:
+                self._append_batch(*(np.array([value]) for value in
+                                     (sale_id, ts, amount, product, customer, category)))
+            else:
+                # Out-of-order id we never saw - ids must stay sorted, so reload instead
+                self._stale = True
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'loaded': self._loaded,
+            'rows': int(np.count_nonzero(self._alive[:self._size])),
+            'products': len(self._products.values),
+            'customers': len(self._customers.values),
+            'memory_bytes': sum(getattr(self, f"_{name}").nbytes for name, _ in self.COLUMNS)
+        }
+
+    # === Queries ===
+
+    def revenue_metrics(self, start_date: datetime, end_date: datetime) -> Dict:
+        cols = self._select(start_date, end_date)
+        amount = cols['amount']
+        count = len(amount)
+        total_cents = int(amount.sum())
+        return {
+            'total_revenue': total_cents / 100,
+            'total_sales_count': count,
+            'average_order_value': total_cents / count / 100 if count else 0
+        }
+
+    def top_products(self, start_date: datetime, end_date: datetime,
+                     limit: int = 5, rank_by: str = 'revenue') -> List[Dict]:
+        """Algorithm: bincount per product code, argpartition for the top k"""
+        if rank_by not in ('revenue', 'count'):
+            raise ValueError("rank_by must be one of: revenue, count")
+        cols = self._select(start_date, end_date)
+        if len(cols['product']) == 0 or limit <= 0:
+            return []
+
+        revenue = np.bincount(cols['product'], weights=cols['amount']).round().astype(np.int64)
+        counts = np.bincount(cols['product'])
+        primary = revenue if rank_by == 'revenue' else counts
+        present = np.flatnonzero(counts)
+
+        limit = min(limit, len(present))
+        candidates = present[np.argpartition(-primary[present], limit - 1)[:limit]]
+        secondary = counts if rank_by == 'revenue' else revenue
+        order = candidates[np.lexsort((-secondary[candidates], -primary[candidates]))]
+
+        return [
+            {
+                'product_name': self._products.values[code],
+                'total_revenue': int(revenue[code]) / 100,
+                'sales_count': int(counts[code])
+            }
+            for code in order
+        ]
+
+    def count_repeat_customers(self, start_date: datetime, end_date: datetime) -> int:
+        customers = self._select(start_date, end_date)['customer']
+        customers = customers[customers >= 0]
+        if len(customers) == 0:
+            return 0
+        return int(np.count_nonzero(np.bincount(customers) > 1))
+
+    def revenue_trend(self, start_date: datetime, end_date: datetime,
+                      interval: str = 'daily') -> List[Dict]:
+        """Group by day, then relabel days into the SQL service's period strings"""
+        cols = self._select(start_date, end_date)
+        if len(cols['day']) == 0:
+            return []
+
+        days, inverse = np.unique(cols['day'], return_inverse=True)
+        day_revenue = np.bincount(inverse, weights=cols['amount'])
+
+        period_format = {'daily': '%Y-%m-%d', 'weekly': '%Y-%W'}.get(interval, '%Y-%m')
+        totals: Dict[str, float] = {}
+        for epoch_day, revenue_cents in zip(days.tolist(), day_revenue.tolist()):
+            period = (date(1970, 1, 1) + timedelta(days=epoch_day)).strftime(period_format)
+            totals[period] = totals.get(period, 0) + revenue_cents
+
+        return [{'period': period, 'revenue': round(cents) / 100} for period, cents in totals.items()]
+
+    # === Internals ===
+
+    def _reset(self) -> None:
+        self._size = 0
+        for name, dtype in self.COLUMNS:
+            setattr(self, f"_{name}", np.zeros(0, dtype=dtype))
+        self._products = _Dictionary()
+        self._customers = _Dictionary()
+        self._categories = _Dictionary()
+        self._loaded = False
+        self._stale = False
+        self._loaded_at = 0.0
+
+    def _append_batch(self, ids, ts, amount, product, customer, category) -> None:
+        count = len(ids)
+        needed = self._size + count
+        if needed > len(self._id):
+            capacity = max(needed, 2 * len(self._id), 1024)
+            for name, dtype in self.COLUMNS:
+                old = getattr(self, f"_{name}")
+                grown = np.zeros(capacity, dtype=dtype)
+                grown[:self._size] = old[:self._size]
+                setattr(self, f"_{name}", grown)
+
+        rows = slice(self._size, needed)
+        self._id[rows] = ids
+        self._ts[rows] = ts
+        self._day[rows] = ts // MICROS_PER_DAY
+        self._amount[rows] = amount
+        self._product[rows] = product
+        self._customer[rows] = customer
+        self._category[rows] = category
+        self._alive[rows] = True
+        self._size = needed
+
+    def _row_for_id(self, sale_id: int) -> Optional[int]:
+        ids = self._id[:self._size]
+        row = int(np.searchsorted(ids, sale_id))
+        if row < len(ids) and ids[row] == sale_id:
+            return row
+        return None
+
+    def _select(self, start_date: datetime, end_date: datetime) -> Dict[str, np.ndarray]:
+        """Vectorized filter for an inclusive window over live rows"""
+        with self._lock:
+            size = self._size
+            cols = {name: getattr(self, f"_{name}")[:size]
+                    for name in ('ts', 'day', 'amount', 'product', 'customer', 'alive')}
+        mask = cols.pop('alive') & (cols['ts'] >= _to_micros(start_date)) & (cols['ts'] <= _to_micros(end_date))
+        return {name: column[mask] for name, column in cols.items()}
+
+
+# Global columnar store - only loaded when settings.columnar_engine is enabled
+columnar_sales = ColumnarSalesStore()
@@ -1,18 +1,55 @@
-import pandas as pd
-from typing import Dict, List, Any, Optional
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Tuple
 from datetime import datetime
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from io import StringIO
+from ..core.cache import cache_invalidate
+from ..core.events import Event, EventType, event_bus
+from ..core.serialization import to_cents
+from ..core.write_queue import write_queue
+from ..models.analytics import Expense
+from .data_processor import DataProcessor
+from .import_ledger import ImportLedger, ImportPlan, read_upload
 from .sales_service import SalesService
 from .customers_service_v2 import CustomersService
 from .expenses_service_v2 import ExpensesService
+from .suggestions import suggestions
+from .upserts import (
+    EXPENSE_CONFLICT_KEY, EXPENSE_CORRECTION_KEY, EXPENSE_HASH_FIELDS, RowHasher, correction_warning,
+    find_corrections, insert_new, upsert_customers
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def _read_csv(text: str, row_index: Optional[List[int]] = None) -> "pd.DataFrame":
+    # pandas is imported on first upload, not with the app
+    import pandas as pd
+    # As text, so a ledger chunk of a file parses exactly like the whole file; empty cells stay ''
+    df = pd.read_csv(StringIO(text), dtype=str, keep_default_na=False)
+    if row_index is not None:
+        df.index = row_index  # Positions in the uploaded file, for error messages
+    return df
+
 
 class CSVUploadService:
-    """Service for handling CSV uploads with validation and bulk operations"""
+    """
+    Service for handling CSV uploads with validation and bulk operations
+    dedupe=True (default): idempotent batched upserts, safe to re-upload overlapping
+    exports (services/upserts.py), behind the import ledger - identical files and
+    chunks imported before are skipped (services/import_ledger.py);
+    dedupe=False: one create + event per row
+    """
     
-    def __init__(self, db: Session):
+    # Rows per upsert statement/transaction
+    BATCH_SIZE = 1000
+    
+    def __init__(self, db: Session, dedupe: bool = True):
         self.db = db
+        self.dedupe = dedupe
         self.sales_service = SalesService(db)
         self.customers_service = CustomersService(db)
         self.expenses_service = ExpensesService(db)
@@ -21,8 +58,10 @@ class CSVUploadService:
         """Upload and process sales CSV file"""
         try:
             # Read CSV content
-            content = await file.read()
-            df = pd.read_csv(StringIO(content.decode('utf-8')))
+            plan, df = await self._read_upload(file, "sales", chunk_column="date")
+            if plan and plan.already_imported:
+                return await self._import_result(0, [], plan)
+            total_rows = plan.total_rows if plan else len(df)
             
             # Validate required columns
             required_columns = ['date', 'product_name', 'amount']
@@ -45,9 +84,12 @@ class CSVUploadService:
                     "success": False,
                     "errors": errors,
                     "processed_count": 0,
-                    "total_rows": len(df)
+                    "total_rows": total_rows
                 }
             
+            if self.dedupe:
+                return await self._upsert_sales(processed_data, plan)
+            
             # Bulk insert with events
             created_sales = []
             for sale_data in processed_data:
@@ -57,7 +99,7 @@ class CSVUploadService:
             return {
                 "success": True,
                 "processed_count": len(created_sales),
-                "total_rows": len(df),
+                "total_rows": total_rows,
                 "errors": []
             }
             
@@ -67,8 +109,10 @@ class CSVUploadService:
     async def upload_customers_csv(self, file: UploadFile) -> Dict[str, Any]:
         """Upload and process customers CSV file"""
         try:
-            content = await file.read()
-            df = pd.read_csv(StringIO(content.decode('utf-8')))
+            plan, df = await self._read_upload(file, "customers")
+            if plan and plan.already_imported:
+                return await self._import_result(0, [], plan)
+            total_rows = plan.total_rows if plan else len(df)
             
             required_columns = ['id', 'name']
             self._validate_columns(df, required_columns)
@@ -88,9 +132,16 @@ class CSVUploadService:
                     "success": False,
                     "errors": errors,
                     "processed_count": 0,
-                    "total_rows": len(df)
+                    "total_rows": total_rows
                 }
             
+            if self.dedupe:
+                written = await self._write_batches(upsert_customers, processed_data)
+                if written:
+                    suggestions.mark_stale()
+                    await self._publish_import("customer", written, len(processed_data))
+                return await self._import_result(written, processed_data, plan)
+            
             created_customers = []
             for customer_data in processed_data:
                 customer = await self.customers_service.create_customer(customer_data)
@@ -99,7 +150,7 @@ class CSVUploadService:
             return {
                 "success": True,
                 "processed_count": len(created_customers),
-                "total_rows": len(df),
+                "total_rows": total_rows,
                 "errors": []
             }
             
@@ -109,8 +160,10 @@ class CSVUploadService:
     async def upload_expenses_csv(self, file: UploadFile) -> Dict[str, Any]:
         """Upload and process expenses CSV file"""
         try:
-            content = await file.read()
-            df = pd.read_csv(StringIO(content.decode('utf-8')))
+            plan, df = await self._read_upload(file, "expenses", chunk_column="date")
+            if plan and plan.already_imported:
+                return await self._import_result(0, [], plan)
+            total_rows = plan.total_rows if plan else len(df)
             
             required_columns = ['date', 'description', 'amount']
             self._validate_columns(df, required_columns)
@@ -130,9 +183,12 @@ class CSVUploadService:
                     "success": False,
                     "errors": errors,
                     "processed_count": 0,
-                    "total_rows": len(df)
+                    "total_rows": total_rows
                 }
             
+            if self.dedupe:
+                return await self._upsert_expenses(processed_data, plan)
+            
             created_expenses = []
             for expense_data in processed_data:
                 expense = await self.expenses_service.create_expense(expense_data)
@@ -141,21 +197,115 @@ class CSVUploadService:
             return {
                 "success": True,
                 "processed_count": len(created_expenses),
-                "total_rows": len(df),
+                "total_rows": total_rows,
                 "errors": []
             }
             
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Error processing CSV: {str(e)}")
     
-    def _validate_columns(self, df: pd.DataFrame, required_columns: List[str]):
+    async def _read_upload(self, file: UploadFile, kind: str,
+                           chunk_column: Optional[str] = None) -> Tuple[Optional[ImportPlan], Optional["pd.DataFrame"]]:
+        """Parse the upload - with dedupe, only rows of chunks the import ledger has not seen"""
+        content, content_hash = await read_upload(file)
+        text = content.decode('utf-8')
+        if not self.dedupe:
+            return None, _read_csv(text)
+        plan = ImportLedger(self.db).plan(kind, f"data/upload-{kind}-csv", text, content_hash, chunk_column)
+        if plan.already_imported:
+            return plan, None
+        return plan, _read_csv(plan.content, plan.row_index)
+    
+    async def _upsert_sales(self, rows: List[Dict[str, Any]], plan: ImportPlan) -> Dict[str, Any]:
+        """Sales through DataProcessor's deduplicating writer (one hasher for the whole file)"""
+        for row in rows:
+            row['amount_cents'] = to_cents(row.pop('amount'))
+        processor = DataProcessor(self.db, source="csv_upload")
+        written = 0
+        for i in range(0, len(rows), self.BATCH_SIZE):
+            # write_sales waits for the single writer - off the event loop
+            written += await run_in_threadpool(processor.write_sales, rows[i:i + self.BATCH_SIZE])
+        if written:
+            self.sales_service._invalidate_analytics_cache()
+            await self._publish_import("sale", written, len(rows))
+        return await self._import_result(written, rows, plan, processor.possible_corrections)
+    
+    async def _upsert_expenses(self, rows: List[Dict[str, Any]], plan: ImportPlan) -> Dict[str, Any]:
+        hasher = RowHasher(EXPENSE_HASH_FIELDS)
+        for row in rows:
+            row['amount_cents'] = to_cents(row.pop('amount'))
+            row['row_hash'] = hasher(row)
+        before_id = self.db.execute(select(func.max(Expense.id))).scalar() or 0
+        written_rows: List[Dict[str, Any]] = []
+        
+        def write(connection, batch):
+            # Row hashes are unique within an import, so they identify the rows written
+            hashes = {row.row_hash for row in insert_new(
+                connection, Expense.__table__, batch, EXPENSE_CONFLICT_KEY, returning=("row_hash",))}
+            written_rows.extend(row for row in batch if row['row_hash'] in hashes)
+            return len(hashes)
+        
+        written = await self._write_batches(write, rows)
+        corrections = []
+        if written:
+            cache_invalidate("kpi_summary")
+            await self._publish_import("expense", written, len(rows))
+            if before_id:
+                corrections = [correction_warning(row, EXPENSE_CORRECTION_KEY) for row in find_corrections(
+                    self.db.connection(), Expense.__table__, written_rows, EXPENSE_CORRECTION_KEY,
+                    EXPENSE_HASH_FIELDS, before_id)]
+        return await self._import_result(written, rows, plan, corrections)
+    
+    async def _write_batches(self, write, rows: List[Dict[str, Any]]) -> int:
+        """Run write(connection, batch) per batch on the single writer, awaited; returns rows written"""
+        def write_batch(batch):
+            try:
+                written = write(self.db.connection(), batch)
+                self.db.commit()
+                return written
+            except Exception:
+                self.db.rollback()
+                raise
+        written = 0
+        for i in range(0, len(rows), self.BATCH_SIZE):
+            written += await write_queue.run_async(write_batch, rows[i:i + self.BATCH_SIZE])
+        return written
+    
+    async def _publish_import(self, entity_type: str, written: int, received: int) -> None:
+        """One event per import - per-row events would recalculate KPIs once per row"""
+        await event_bus.publish(Event(
+            event_type=EventType.DATA_SYNC_COMPLETED,
+            entity_id="csv_upload",
+            entity_type=entity_type,
+            data={'written': written, 'duplicates_skipped': received - written},
+            timestamp=datetime.utcnow()
+        ))
+    
+    async def _import_result(self, written: int, rows: List[Dict[str, Any]], plan: ImportPlan,
+                       possible_corrections: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Result of a deduplicating import, recorded in the ledger (it only gets here without row errors)"""
+        if not plan.already_imported:
+            await ImportLedger(self.db).record_async(plan, written)
+        return {
+            "success": True,
+            "processed_count": written,
+            "duplicates_skipped": len(rows) - written,
+            "already_imported": plan.already_imported,
+            "chunks_skipped": plan.chunks_skipped,
+            "total_rows": plan.total_rows,
+            "possible_corrections": possible_corrections or [],
+            "errors": []
+        }
+    
+    def _validate_columns(self, df: "pd.DataFrame", required_columns: List[str]):
         """Validate that required columns exist in DataFrame"""
         missing_columns = [col for col in required_columns if col not in df.columns]
         if missing_columns:
             raise ValueError(f"Missing required columns: {missing_columns}")
     
-    def _process_sale_row(self, row: pd.Series) -> Dict[str, Any]:
+    def _process_sale_row(self, row: "pd.Series") -> Dict[str, Any]:
         """Process and validate a single sale row"""
+        import pandas as pd
         return {
             "date": pd.to_datetime(row['date']),
             "product_name": str(row['product_name']).strip(),
@@ -164,7 +314,7 @@ class CSVUploadService:
             "category": str(row.get('category', '')).strip() or None
         }
     
-    def _process_customer_row(self, row: pd.Series) -> Dict[str, Any]:
+    def _process_customer_row(self, row: "pd.Series") -> Dict[str, Any]:
         """Process and validate a single customer row"""
         return {
             "id": str(row['id']).strip(),
@@ -172,8 +322,9 @@ class CSVUploadService:
             "email": str(row.get('email', '')).strip() or None
         }
     
-    def _process_expense_row(self, row: pd.Series) -> Dict[str, Any]:
+    def _process_expense_row(self, row: "pd.Series") -> Dict[str, Any]:
         """Process and validate a single expense row"""
+        import pandas as pd
         return {
             "date": pd.to_datetime(row['date']),
             "description": str(row['description']).strip(),
@@ -0,0 +1,236 @@
+"""
+Approximate Customer Counting
+Algorithm: Per-day mergeable sketches - HyperLogLog for distinct customers,
+bottom-k distinct sample with exact per-customer counts for repeat detection
+"""
+import hashlib
+import heapq
+import math
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from ..core.cache import DailyRollupCache, contiguous_runs, split_window
+from ..core.config import settings
+from ..core.database import cache_rebuild_session
+from ..models.analytics import Sale
+
+# Customers who spent more than this are counted as VIP (matches the exact query)
+VIP_THRESHOLD_CENTS = 50000
+
+
+def _hash64(customer_id: str) -> int:
+    """Stable 64-bit hash - Python's hash() is salted per process"""
+    return int.from_bytes(hashlib.blake2b(customer_id.encode(), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """
+    Distinct counter with relative standard error ~1.04 / sqrt(2^precision)
+    Data Structure: uint8 register array; merge is an element-wise max
+    """
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @classmethod
+    def for_error(cls, error: float) -> "HyperLogLog":
+        """Smallest sketch whose standard error is within the requested bound"""
+        precision = math.ceil(math.log2((1.04 / error) ** 2))
+        return cls(max(4, min(precision, 16)))
+
+    def add_hash(self, value_hash: int) -> None:
+        remaining_bits = 64 - self.precision
+        index = value_hash >> remaining_bits
+        rank = remaining_bits - (value_hash & ((1 << remaining_bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int32))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class CustomerSketch:
+    """
+    Mergeable summary of customer activity for a set of days
+
+    The bottom-k sample keeps the k customers with the smallest hashes together with
+    their exact purchase count and spend. A customer in the bottom-k of a union is in
+    the bottom-k of every day it appears in, so merged counts stay exact for the sample
+    and the repeat/VIP fractions of the sample estimate those of all customers.
+    """
+
+    def __init__(self, error: float):
+        self.error = error
+        self.sample_size = math.ceil(1 / error ** 2)
+        self.hll = HyperLogLog.for_error(error)
+        # customer hash -> [purchase_count, spent_cents]
+        self._sample: Dict[int, List[int]] = {}
+        self._sorted: Optional[List[Tuple[int, List[int]]]] = None
+
+    def add(self, customer_id: str, purchases: int, spent_cents: int) -> None:
+        """Add one customer's aggregated activity (call once per customer per sketch)"""
+        value_hash = _hash64(customer_id)
+        self.hll.add_hash(value_hash)
+        entry = self._sample.get(value_hash)
+        if entry is None:
+            self._sample[value_hash] = [purchases, spent_cents]
+        else:
+            entry[0] += purchases
+            entry[1] += spent_cents
+        self._sorted = None
+        if len(self._sample) > 2 * self.sample_size:
+            self._prune()
+
+    def merge(self, other: "CustomerSketch") -> None:
+        """Union another sketch into this one"""
+        self.hll.merge(other.hll)
+        threshold = self._threshold()
+        for value_hash, (purchases, spent_cents) in other._items():
+            if value_hash > threshold:
+                break  # other's items are hash-sorted, nothing further can qualify
+            entry = self._sample.get(value_hash)
+            if entry is None:
+                self._sample[value_hash] = [purchases, spent_cents]
+            else:
+                entry[0] += purchases
+                entry[1] += spent_cents
+        self._sorted = None
+        self._prune()
+
+    def summary(self) -> Dict[str, int]:
+        """Estimated total/new/repeat/VIP customer counts"""
+        self._prune()
+        sampled = len(self._sample)
+        if sampled == 0:
+            return {'total_customers': 0, 'new_customers': 0, 'repeat_customers': 0, 'vip_customers': 0}
+
+        repeat_sampled = sum(1 for purchases, _ in self._sample.values() if purchases > 1)
+        vip_sampled = sum(1 for _, spent in self._sample.values() if spent > VIP_THRESHOLD_CENTS)
+
+        if sampled < self.sample_size:
+            # Every customer is in the sample, so the counts are exact
+            total = sampled
+        else:
+            total = max(self.hll.count(), sampled)
+
+        repeat = int(round(total * repeat_sampled / sampled))
+        return {
+            'total_customers': total,
+            'new_customers': total - repeat,
+            'repeat_customers': repeat,
+            'vip_customers': int(round(total * vip_sampled / sampled))
+        }
+
+    def _threshold(self) -> float:
+        if len(self._sample) < self.sample_size:
+            return math.inf
+        return max(self._sample)
+
+    def _prune(self) -> None:
+        if len(self._sample) > self.sample_size:
+            keep = heapq.nsmallest(self.sample_size, self._sample)
+            self._sample = {value_hash: self._sample[value_hash] for value_hash in keep}
+            self._sorted = None
+
+    def _items(self) -> List[Tuple[int, List[int]]]:
+        if self._sorted is None:
+            self._sorted = sorted(self._sample.items())
+        return self._sorted
+
+
+# Per-day sketches stored alongside the other daily rollups
+customer_sketches = DailyRollupCache("customer_sketches")
+
+
+class CustomerSketchService:
+    """Answer customer count queries for any window by merging per-day sketches"""
+
+    def __init__(self, db: Session, error: Optional[float] = None,
+                 sketches: DailyRollupCache = customer_sketches):
+        self.db = db
+        self.error = error or settings.customer_sketch_error
+        self.sketches = sketches
+
+    def customer_summary(self, start_date: datetime, end_date: datetime) -> Dict[str, int]:
+        """Estimated total/new/repeat/VIP customers for the inclusive window"""
+        window = CustomerSketch(self.error)
+        if start_date > end_date:
+            return window.summary()
+
+        first_full, last_full, live_slices = split_window(start_date, end_date)
+        if first_full <= last_full:
+            for day_sketch in self._load_days(first_full, last_full):
+                window.merge(day_sketch)
+
+        for slice_start, slice_end, inclusive_end in live_slices:
+            slice_sketch = CustomerSketch(self.error)
+            end_filter = Sale.date <= slice_end if inclusive_end else Sale.date < slice_end
+            for row in self._customer_rows(Sale.date >= slice_start, end_filter):
+                slice_sketch.add(row.customer_id, row.purchases, row.spent_cents or 0)
+            window.merge(slice_sketch)
+
+        return window.summary()
+
+    def count_repeat_customers(self, start_date: datetime, end_date: datetime) -> int:
+        return self.customer_summary(start_date, end_date)['repeat_customers']
+
+    def _load_days(self, first_day: date, last_day: date) -> List[CustomerSketch]:
+        """Return sketches for every day in the range, building each run of misses in one query"""
+        days = [first_day + timedelta(days=offset)
+                for offset in range((last_day - first_day).days + 1)]
+        cached = {day: self.sketches.get(day) for day in days}
+        # A cached sketch built for a different error bound cannot be merged
+        missing = [day for day, sketch in cached.items()
+                   if sketch is None or sketch.error != self.error]
+
+        if missing:
+            built = {day: CustomerSketch(self.error) for day in missing}
+            day_bucket = func.date(Sale.date)
+            # Cached until the next write to the day, so never built from a lagging replica
+            rows = []
+            with cache_rebuild_session(self.db) as db:
+                for run_start, run_end in contiguous_runs(missing):
+                    rows += self._customer_rows(
+                        Sale.date >= datetime.combine(run_start, time.min),
+                        Sale.date < datetime.combine(run_end + timedelta(days=1), time.min),
+                        day_bucket=day_bucket, db=db
+                    )
+            for row in rows:
+                day = row.day if isinstance(row.day, date) else date.fromisoformat(str(row.day))
+                if day in built:
+                    built[day].add(row.customer_id, row.purchases, row.spent_cents or 0)
+
+            for day, sketch in built.items():
+                self.sketches.set(day, sketch)
+                cached[day] = sketch
+
+        return list(cached.values())
+
+    def _customer_rows(self, *filters, day_bucket=None, db: Optional[Session] = None):
+        columns = [
+            Sale.customer_id,
+            func.count(Sale.id).label('purchases'),
+            func.sum(Sale.amount_cents).label('spent_cents')
+        ]
+        group_by = [Sale.customer_id]
+        if day_bucket is not None:
+            columns.insert(0, day_bucket.label('day'))
+            group_by.insert(0, day_bucket)
+
+        return (db or self.db).query(*columns).filter(
+            Sale.customer_id.isnot(None),
+            *filters
+        ).group_by(*group_by).all()
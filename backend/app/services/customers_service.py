@@ -1,11 +1,20 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from ..models.analytics import Customer
 from ..models.schemas import CustomerCreate, CustomerUpdate
+from ..core.base_service import RowReader
+from ..core.pagination import keyset_page
+from ..core.serialization import ColumnSpec
+from .suggestions import suggestions
 from fastapi import HTTPException
 
-class CustomersService:
+# CustomerResponse fields, selected as plain columns by the list endpoint
+CUSTOMER_RESPONSE_COLUMNS: ColumnSpec = (
+    ("id", Customer.id), ("name", Customer.name), ("email", Customer.email), ("created_at", Customer.created_at),
+)
+
+class CustomersService(RowReader):
     def __init__(self, db: Session):
         self.db = db
     
@@ -24,6 +33,8 @@ class CustomersService:
             self.db.add(customer)
             self.db.commit()
             self.db.refresh(customer)
+            # This service emits no events - let the autocomplete index reload
+            suggestions.mark_stale()
             return customer
         except HTTPException:
             raise
@@ -35,10 +46,20 @@ class CustomersService:
         """Get customer by ID"""
         return self.db.query(Customer).filter(Customer.id == customer_id).first()
     
-    def get_customers(self, skip: int = 0, limit: int = 100) -> List[Customer]:
-        """Get all customers with pagination"""
+    def get_customers(self, skip: int = 0, limit: int = 100,
+                      columns: Optional[ColumnSpec] = None) -> List[Customer]:
+        """Get all customers with pagination (row tuples of `columns` via list_rows when given)"""
+        if columns:
+            return self.list_rows(columns, order_by=(desc(Customer.created_at),), skip=skip, limit=limit)
         return self.db.query(Customer).order_by(desc(Customer.created_at)).offset(skip).limit(limit).all()
     
+    def get_customers_page(self, limit: int = 100, cursor: Optional[str] = None,
+                           columns: Optional[ColumnSpec] = None) -> Tuple[List[Customer], Optional[str]]:
+        """Newest-first page keyed on (created_at, id); returns the customers and the next cursor"""
+        if columns:
+            return self.list_page(columns, Customer.created_at, Customer.id, cursor=cursor, limit=limit)
+        return keyset_page(self.db.query(Customer), Customer.created_at, Customer.id, cursor, limit)
+    
     def update_customer(self, customer_id: str, customer_data: CustomerUpdate) -> Optional[Customer]:
         """Update existing customer"""
         try:
@@ -52,6 +73,7 @@ class CustomersService:
             
             self.db.commit()
             self.db.refresh(customer)
+            suggestions.mark_stale()
             return customer
         except Exception as e:
             self.db.rollback()
@@ -66,6 +88,7 @@ class CustomersService:
             
             self.db.delete(customer)
             self.db.commit()
+            suggestions.mark_stale()
             return True
         except Exception as e:
             self.db.rollback()
@@ -76,7 +76,7 @@ class CustomersService(BaseService[Customer]):
     
     async def _emit_deleted_event(self, customer: Customer):
         event = Event(
-            event_type=EventType.CUSTOMER_UPDATED,
+            event_type=EventType.CUSTOMER_DELETED,
             entity_id=str(customer.id),
             entity_type="customer",
             data=self._obj_to_dict(customer),
@@ -1,9 +1,62 @@
-import pandas as pd
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import TYPE_CHECKING, Any, List, Dict, Optional, Tuple
 from ..models.analytics import Sale
 from io import StringIO
+from ..core.cache import invalidate_daily_rollups
+from ..core.metrics import ingested_rows
+from ..core.serialization import to_cents
+from ..core.write_queue import write_queue
+from .dimensions import resolve_sale_dimensions
+from .columnar_store import columnar_sales
+from .suggestions import suggestions
+from .import_ledger import ImportLedger, ImportPlan
+from .upserts import (
+    SALE_CONFLICT_KEY, SALE_CORRECTION_KEY, SALE_HASH_FIELDS, RowHasher, correction_warning, find_corrections,
+    insert_new
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# === Field validation (shared with the Google Sheets sync) ===
+
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y')
+
+
+def parse_sale_date(value: Any) -> datetime:
+    """Parse date with multiple format support"""
+    date_str = str(value).strip()
+    # Try common date formats
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, date_format)
+        except ValueError:
+            continue
+    raise ValueError(f"Date parsing error: Invalid date format: {date_str}")
+
+
+def parse_amount_cents(value: Any) -> int:
+    try:
+        amount = float(value)
+        if amount <= 0:
+            raise ValueError("Amount must be positive")
+        return to_cents(value)
+    except (ArithmeticError, ValueError, TypeError):
+        raise ValueError(f"Invalid amount: {value}")
+
+
+def parse_product_name(value: Any) -> str:
+    product_name = str(value).strip()
+    if not product_name or product_name.lower() == 'nan':
+        raise ValueError("Product name is required")
+    return product_name
+
+
+def optional_text(value: Any) -> Optional[str]:
+    return str(value).strip() or None
 
 
 class DataProcessor:
@@ -11,22 +64,58 @@ class DataProcessor:
     Handles CSV processing with robust error handling and validation
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, source: str = "csv", dedupe: bool = True):
         self.db = db
+        self.source = source  # Label for the ingested_rows_total metric
+        # Idempotent mode: rows already imported (same content) are skipped, see services/upserts.py
+        self.dedupe = dedupe
+        self.duplicates_skipped = 0
+        # Written rows that look like corrected versions of earlier imports (services/upserts.py)
+        self.possible_corrections: List[str] = []
+        self.plan: Optional[ImportPlan] = None  # Set by import_csv
+        self._hasher = RowHasher(SALE_HASH_FIELDS)
+        self._before_id: Optional[int] = None  # Newest sale id before this import's first write
+    
+    def import_csv(self, csv_content: str, source: str, content_hash: Optional[str] = None) -> Tuple[int, List[str]]:
+        """
+        process_csv_content behind the import ledger (deduplicating mode): a file
+        imported before returns at once, otherwise only rows of unseen day chunks
+        are processed. The ledger records the import only if no row failed.
+        """
+        if not self.dedupe:
+            return self.process_csv_content(csv_content)
+        ledger = ImportLedger(self.db)
+        self.plan = ledger.plan("sales", source, csv_content, content_hash, chunk_column="date")
+        if self.plan.already_imported:
+            return 0, []
+        records_processed, errors = self.process_csv_content(self.plan.content, self.plan.row_index)
+        if not errors:
+            ledger.record(self.plan, records_processed)
+        return records_processed, errors
     
-    def process_csv_content(self, csv_content: str) -> Tuple[int, List[str]]:
+    def process_csv_content(self, csv_content: str, row_index: Optional[List[int]] = None) -> Tuple[int, List[str]]:
         """
         Algorithm: Batch processing with validation
         Data Structure: List for errors (append-only), DataFrame for bulk operations
+        row_index: original row positions when csv_content is a subset of a file (import ledger)
         
-        Returns: (records_processed, errors_list)
+        Returns: (records_processed, errors_list) - rows written; duplicates_skipped holds the rest
         """
         errors = []
         records_processed = 0
+        self.duplicates_skipped = 0
+        self.possible_corrections = []
+        self._hasher = RowHasher(SALE_HASH_FIELDS)  # Ordinals of identical rows are per file
+        self._before_id = None
         
         try:
-            # Use pandas for efficient CSV parsing
-            df = pd.read_csv(StringIO(csv_content))
+            # Use pandas for efficient CSV parsing (imported here: it is slow to import and only uploads need it)
+            import pandas as pd
+            # As text: a chunk of a file then parses (and row-hashes) exactly like the whole file,
+            # and empty cells stay empty rather than becoming the string 'nan'
+            df = pd.read_csv(StringIO(csv_content), dtype=str, keep_default_na=False)
+            if row_index is not None:
+                df.index = row_index  # Errors report rows of the uploaded file
             
             # Validate required columns
             required_columns = ['date', 'product_name', 'amount']
@@ -45,12 +134,11 @@ class DataProcessor:
                     # Validate and convert each row
                     sale_data = self._validate_row(row, index)
                     if sale_data:
-                        sales_to_add.append(Sale(**sale_data))
+                        sales_to_add.append(sale_data)
                         
                         # Batch insert when we reach batch_size
                         if len(sales_to_add) >= batch_size:
-                            self._bulk_insert_sales(sales_to_add)
-                            records_processed += len(sales_to_add)
+                            records_processed += self.write_sales(sales_to_add)
                             sales_to_add = []
                             
                 except Exception as e:
@@ -58,72 +146,79 @@ class DataProcessor:
             
             # Insert remaining records
             if sales_to_add:
-                self._bulk_insert_sales(sales_to_add)
-                records_processed += len(sales_to_add)
+                records_processed += self.write_sales(sales_to_add)
             
         except Exception as e:
             errors.append(f"CSV parsing error: {str(e)}")
         
         return records_processed, errors
     
-    def _validate_row(self, row: pd.Series, row_index: int) -> Dict:
+    def _validate_row(self, row: "pd.Series", row_index: int) -> Dict:
         """
         Data validation with detailed error messages
         Algorithm: Early return on validation failure
         """
         try:
-            # Parse date with multiple format support
-            date_str = str(row['date']).strip()
-            try:
-                # Try common date formats
-                for date_format in ['%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y']:
-                    try:
-                        parsed_date = datetime.strptime(date_str, date_format)
-                        break
-                    except ValueError:
-                        continue
-                else:
-                    raise ValueError(f"Invalid date format: {date_str}")
-            except ValueError as e:
-                raise ValueError(f"Date parsing error: {e}")
-            
-            # Validate amount
-            try:
-                amount = float(row['amount'])
-                if amount <= 0:
-                    raise ValueError("Amount must be positive")
-                amount_cents = int(amount * 100)  # Convert to cents
-            except (ValueError, TypeError):
-                raise ValueError(f"Invalid amount: {row['amount']}")
-            
-            # Clean product name
-            product_name = str(row['product_name']).strip()
-            if not product_name or product_name.lower() == 'nan':
-                raise ValueError("Product name is required")
-            
-            # Optional fields with defaults
-            customer_id = str(row.get('customer_id', '')).strip() or None
-            category = str(row.get('category', '')).strip() or None
-            
             return {
-                'date': parsed_date,
-                'product_name': product_name,
-                'amount_cents': amount_cents,
-                'customer_id': customer_id,
-                'category': category
+                'date': parse_sale_date(row['date']),
+                'product_name': parse_product_name(row['product_name']),
+                'amount_cents': parse_amount_cents(row['amount']),
+                # Optional fields with defaults
+                'customer_id': optional_text(row.get('customer_id', '')),
+                'category': optional_text(row.get('category', ''))
             }
             
         except Exception as e:
             raise ValueError(str(e))
     
-    def _bulk_insert_sales(self, sales: List[Sale]) -> None:
+    def write_sales(self, sales: List[Dict[str, Any]]) -> int:
         """
         Bulk insert for performance
-        Algorithm: Single transaction for batch
+        Algorithm: Single transaction for batch, queued on the single writer so
+        concurrent imports interleave batch by batch instead of contending for the lock.
+        Deduplicating: INSERT ... ON CONFLICT DO NOTHING on (date, row_hash); written
+        rows that look like corrections of earlier imports go to possible_corrections.
+        Returns the number of rows written.
         """
+        if self.dedupe:
+            for sale in sales:
+                if 'row_hash' not in sale:  # Callers with their own row identity (Sheets sync) set it
+                    sale['row_hash'] = self._hasher(sale)
+            if self._before_id is None:
+                self._before_id = self.db.execute(select(func.max(Sale.id))).scalar() or 0
         try:
-            self.db.bulk_save_objects(sales)
-            self.db.commit()
+            written = write_queue.run(self._write_batch, sales)
+            written_days = [sale['date'].date() for sale in written]
+            ingested_rows.inc(self.source, amount=len(written))
+            self.duplicates_skipped += len(sales) - len(written)
+            if self.dedupe and written and self._before_id:
+                self.possible_corrections.extend(
+                    correction_warning(sale, SALE_CORRECTION_KEY) for sale in find_corrections(
+                        self.db.connection(), Sale.__table__, written, SALE_CORRECTION_KEY, SALE_HASH_FIELDS,
+                        self._before_id))
+            
+            # Cached daily rollups for the imported days are now stale - a re-import that wrote nothing keeps them
+            for day in set(written_days):
+                invalidate_daily_rollups(day)
+            if written_days:
+                columnar_sales.mark_stale()
+                suggestions.mark_stale()
+            return len(written_days)
         except Exception as e:
             self.db.rollback()
-            raise e
\ No newline at end of file
+            raise e
+    
+    def _write_batch(self, sales: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Write one batch; returns the rows written"""
+        # Core inserts skip flush hooks, so resolve surrogate keys here
+        resolve_sale_dimensions(self.db, sales)
+        if self.dedupe:
+            # Row hashes are unique within an import, so they identify the rows written
+            written_hashes = {row.row_hash for row in insert_new(
+                self.db.connection(), Sale.__table__, sales, SALE_CONFLICT_KEY, returning=("row_hash",))}
+            written = [sale for sale in sales if sale['row_hash'] in written_hashes]
+        else:
+            self.db.bulk_insert_mappings(Sale, sales)
+            written = sales
+        self.db.commit()
+        return written
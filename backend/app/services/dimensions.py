@@ -0,0 +1,139 @@
+"""
+Product and Category Dimensions
+Algorithm: Resolve free-text names to integer surrogate keys through an in-memory dictionary
+"""
+from typing import Dict, Iterable, Type
+from sqlalchemy import event, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from ..models.analytics import Sale, Product, Category
+
+# Keep IN (...) lists under SQLite's bound-parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+
+class DimensionCache:
+    """
+    Two-way name <-> id dictionary for a dimension table
+    Data Structure: Plain dicts for O(1) lookups in both directions
+    Production: Per-process cache; ids are immutable so it never goes stale
+    """
+
+    def __init__(self, model: Type):
+        self.model = model
+        self._ids: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+
+    def resolve(self, db: Session, names: Iterable[str]) -> Dict[str, int]:
+        """
+        Map names to ids, creating missing dimension rows
+        Algorithm: Cache hit -> batched SELECT -> INSERT ... ON CONFLICT DO NOTHING -> SELECT
+        """
+        wanted = {name for name in names if name}
+        missing = [name for name in wanted if name not in self._ids]
+
+        if missing:
+            # Core statements on the session's connection: safe inside a flush
+            connection = db.connection()
+            self._load(connection, missing)
+
+            still_missing = [name for name in missing if name not in self._ids]
+            if still_missing:
+                table = self.model.__table__
+                dialect = connection.dialect.name
+                if dialect == "postgresql":
+                    stmt = postgresql.insert(table).on_conflict_do_nothing(index_elements=["name"])
+                elif dialect == "sqlite":
+                    stmt = sqlite.insert(table).on_conflict_do_nothing(index_elements=["name"])
+                else:
+                    stmt = table.insert()
+                connection.execute(stmt, [{"name": name} for name in still_missing])
+                self._load(connection, still_missing)
+
+        return {name: self._ids[name] for name in wanted}
+
+    def names(self, db: Session, ids: Iterable[int]) -> Dict[int, str]:
+        """Map ids back to names - used only for the final top-N rows"""
+        wanted = {dim_id for dim_id in ids if dim_id is not None}
+        missing = [dim_id for dim_id in wanted if dim_id not in self._names]
+
+        if missing:
+            table = self.model.__table__
+            connection = db.connection()
+            for i in range(0, len(missing), LOOKUP_CHUNK_SIZE):
+                chunk = missing[i:i + LOOKUP_CHUNK_SIZE]
+                for dim_id, name in connection.execute(
+                    select(table.c.id, table.c.name).where(table.c.id.in_(chunk))
+                ):
+                    self._remember(name, dim_id)
+
+        return {dim_id: self._names[dim_id] for dim_id in wanted if dim_id in self._names}
+
+    def clear(self) -> None:
+        """Clear cached mappings"""
+        self._ids.clear()
+        self._names.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache statistics"""
+        return {'cached_names': len(self._ids)}
+
+    def _load(self, connection, names: list) -> None:
+        table = self.model.__table__
+        for i in range(0, len(names), LOOKUP_CHUNK_SIZE):
+            chunk = names[i:i + LOOKUP_CHUNK_SIZE]
+            for dim_id, name in connection.execute(
+                select(table.c.id, table.c.name).where(table.c.name.in_(chunk))
+            ):
+                self._remember(name, dim_id)
+
+    def _remember(self, name: str, dim_id: int) -> None:
+        self._ids[name] = dim_id
+        self._names[dim_id] = name
+
+
+# Global dimension caches
+product_dimension = DimensionCache(Product)
+category_dimension = DimensionCache(Category)
+
+
+def resolve_sale_dimensions(db: Session, sales: list) -> None:
+    """Fill product_id/category_id on Sale objects (or sale dicts) in one batch"""
+    def _get(sale, field):
+        return sale.get(field) if isinstance(sale, dict) else getattr(sale, field)
+
+    def _set(sale, field, value):
+        if isinstance(sale, dict):
+            sale[field] = value
+        else:
+            setattr(sale, field, value)
+
+    product_ids = product_dimension.resolve(db, (_get(s, 'product_name') for s in sales))
+    category_ids = category_dimension.resolve(db, (_get(s, 'category') for s in sales))
+
+    for sale in sales:
+        _set(sale, 'product_id', product_ids.get(_get(sale, 'product_name')))
+        _set(sale, 'category_id', category_ids.get(_get(sale, 'category')))
+
+
+@event.listens_for(Session, "before_flush")
+def _resolve_dimensions_on_flush(session, flush_context, instances):
+    """Every ORM insert/rename of a Sale gets its surrogate keys before hitting the DB"""
+    pending = [obj for obj in session.new
+               if isinstance(obj, Sale) and obj.product_id is None]
+    for obj in session.dirty:
+        if isinstance(obj, Sale):
+            state = inspect(obj)
+            if (state.attrs.product_name.history.has_changes()
+                    or state.attrs.category.history.has_changes()):
+                pending.append(obj)
+
+    if pending:
+        resolve_sale_dimensions(session, pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_dimensions_on_rollback(session):
+    """Ids inserted by a rolled-back transaction no longer exist"""
+    product_dimension.clear()
+    category_dimension.clear()
@@ -1,12 +1,22 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, func
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from ..models.analytics import Expense
 from ..models.schemas import ExpenseCreate, ExpenseUpdate
+from ..core.base_service import RowReader, window_criteria
+from ..core.pagination import keyset_page
+from ..core.serialization import ColumnSpec, to_cents
 from fastapi import HTTPException
 
-class ExpensesService:
+# ExpenseResponse fields, selected as plain columns by the list and export endpoints
+EXPENSE_RESPONSE_COLUMNS: ColumnSpec = (
+    ("id", Expense.id), ("date", Expense.date), ("description", Expense.description),
+    ("amount", Expense.amount_cents), ("category", Expense.category),
+    ("created_at", Expense.created_at),
+)
+
+class ExpensesService(RowReader):
     def __init__(self, db: Session):
         self.db = db
     
@@ -16,7 +26,7 @@ class ExpensesService:
             expense = Expense(
                 date=expense_data.date,
                 description=expense_data.description,
-                amount_cents=int(expense_data.amount * 100),
+                amount_cents=to_cents(expense_data.amount),
                 category=expense_data.category
             )
             self.db.add(expense)
@@ -33,16 +43,23 @@ class ExpensesService:
     
     def get_expenses(self, skip: int = 0, limit: int = 100,
                     start_date: Optional[datetime] = None,
-                    end_date: Optional[datetime] = None) -> List[Expense]:
-        """Get expenses with optional date filtering"""
-        query = self.db.query(Expense)
-        
-        if start_date:
-            query = query.filter(Expense.date >= start_date)
-        if end_date:
-            query = query.filter(Expense.date <= end_date)
-            
-        return query.order_by(desc(Expense.date)).offset(skip).limit(limit).all()
+                    end_date: Optional[datetime] = None,
+                    columns: Optional[ColumnSpec] = None) -> List[Expense]:
+        """Get expenses with optional date filtering (row tuples of `columns` via list_rows when given)"""
+        criteria = window_criteria(Expense.date, start_date, end_date)
+        if columns:
+            return self.list_rows(columns, *criteria, order_by=(desc(Expense.date),), skip=skip, limit=limit)
+        return self.db.query(Expense).filter(*criteria).order_by(desc(Expense.date)).offset(skip).limit(limit).all()
+    
+    def get_expenses_page(self, limit: int = 100, cursor: Optional[str] = None,
+                          start_date: Optional[datetime] = None,
+                          end_date: Optional[datetime] = None,
+                          columns: Optional[ColumnSpec] = None) -> Tuple[List[Expense], Optional[str]]:
+        """Newest-first page keyed on (date, id); returns the expenses and the next cursor"""
+        criteria = window_criteria(Expense.date, start_date, end_date)
+        if columns:
+            return self.list_page(columns, Expense.date, Expense.id, *criteria, cursor=cursor, limit=limit)
+        return keyset_page(self.db.query(Expense).filter(*criteria), Expense.date, Expense.id, cursor, limit)
     
     def update_expense(self, expense_id: int, expense_data: ExpenseUpdate) -> Optional[Expense]:
         """Update existing expense"""
@@ -53,7 +70,7 @@ class ExpensesService:
             
             update_data = expense_data.dict(exclude_unset=True)
             if 'amount' in update_data:
-                update_data['amount_cents'] = int(update_data.pop('amount') * 100)
+                update_data['amount_cents'] = to_cents(update_data.pop('amount'))
             
             for field, value in update_data.items():
                 setattr(expense, field, value)
@@ -4,6 +4,7 @@ from typing import Dict, Any, Optional, List
 from ..models.analytics import Expense
 from ..core.base_service import BaseService
 from ..core.events import Event, EventType, event_bus
+from ..core.serialization import to_cents
 from fastapi import HTTPException
 
 class ExpensesService(BaseService[Expense]):
@@ -15,7 +16,7 @@ class ExpensesService(BaseService[Expense]):
         try:
             # Convert amount to cents if provided as float
             if 'amount' in expense_data:
-                expense_data['amount_cents'] = int(expense_data.pop('amount') * 100)
+                expense_data['amount_cents'] = to_cents(expense_data.pop('amount'))
             
             return await self.create(expense_data)
         except Exception as e:
@@ -40,7 +41,7 @@ class ExpensesService(BaseService[Expense]):
         try:
             # Convert amount to cents if provided as float
             if 'amount' in expense_data:
-                expense_data['amount_cents'] = int(expense_data.pop('amount') * 100)
+                expense_data['amount_cents'] = to_cents(expense_data.pop('amount'))
             
             return await self.update(expense_id, expense_data)
         except Exception as e:
@@ -0,0 +1,186 @@
+"""
+Import Ledger
+Algorithm: every deduplicating import records a hash of its whole content and of
+each chunk of rows it wrote.
+- Whole file: blake2b, streamed while the upload is read. A file already in the
+  ledger (same kind) is answered without parsing a row.
+- Chunks: rows grouped by day for dated imports (sales, expenses), else fixed runs
+  of CHUNK_ROWS. A chunk hash covers the header and the chunk's rows in sorted
+  order, so reordering a file changes nothing. Only rows of chunks the ledger has
+  not seen are handed to the importer - a daily re-export that repeats last
+  week's days processes just the new and changed days.
+Day chunks keep row hashes exact: identical rows share a date, so they always
+land in the same chunk and get the same ordinals as in a full import
+(services/upserts.py). Rows of a skipped chunk are trusted to be in the
+database - dedupe=false bypasses the ledger.
+"""
+import csv
+import hashlib
+import re
+from dataclasses import dataclass, field
+from io import StringIO
+from typing import Dict, List, Optional, Tuple
+from fastapi import UploadFile
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from ..core.write_queue import write_queue
+from ..models.analytics import ImportChunk, ImportFile
+from .upserts import insert_new
+
+# Rows per chunk when the import has no date column
+CHUNK_ROWS = 1000
+READ_BLOCK_SIZE = 1 << 20
+# Keep IN (...) lists under SQLite's bound-parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+
+def content_digest():
+    return hashlib.blake2b(digest_size=16)
+
+
+async def read_upload(file: UploadFile) -> Tuple[bytes, str]:
+    """Read an upload block by block, hashing as it streams; returns (content, hash)"""
+    digest = content_digest()
+    blocks = []
+    while True:
+        block = await file.read(READ_BLOCK_SIZE)
+        if not block:
+            break
+        digest.update(block)
+        blocks.append(block)
+    return b"".join(blocks), digest.hexdigest()
+
+
+def _day(value: str) -> str:
+    """Date part of a raw date/timestamp cell - chunks are per day, whatever the time"""
+    return re.split(r"[ T]", value.strip(), maxsplit=1)[0]
+
+
+@dataclass
+class ImportPlan:
+    """What an import must process: the header plus rows of unseen chunks"""
+    kind: str
+    source: str
+    content_hash: str
+    size_bytes: int
+    already_imported: bool = False
+    total_rows: int = 0
+    content: str = ""  # CSV of the rows to process
+    row_index: List[int] = field(default_factory=list)  # Their positions in the original file
+    chunk_hashes: List[str] = field(default_factory=list)  # Unseen chunks, recorded after the import
+    chunks: int = 0
+
+    @property
+    def chunks_skipped(self) -> int:
+        return self.chunks - len(self.chunk_hashes)
+
+
+class ImportLedger:
+    """Plans imports against the ledger and records them once they succeed"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def plan(self, kind: str, source: str, text: str, content_hash: Optional[str] = None,
+             chunk_column: Optional[str] = None) -> ImportPlan:
+        """
+        Split CSV text into chunks and keep the rows of chunks not imported before
+        Data Structure: dict of chunk key -> [(row position, record)] in file order
+        """
+        raw = text.encode("utf-8")
+        if content_hash is None:
+            digest = content_digest()
+            digest.update(raw)
+            content_hash = digest.hexdigest()
+        plan = ImportPlan(kind=kind, source=source, content_hash=content_hash, size_bytes=len(raw))
+
+        if self.db.execute(select(ImportFile.id).where(
+            ImportFile.kind == kind, ImportFile.content_hash == content_hash
+        )).first():
+            plan.already_imported = True
+            return plan
+
+        records = csv.reader(StringIO(text))
+        header = next(records, None)
+        if header is None:
+            plan.content = text
+            return plan
+        key_index = header.index(chunk_column) if chunk_column in header else None
+
+        groups: Dict[str, List[Tuple[int, List[str]]]] = {}
+        position = 0
+        for record in records:
+            if not any(cell.strip() for cell in record):
+                continue  # pandas skips blank lines, so they take no row position
+            if key_index is not None and key_index < len(record):
+                key = _day(record[key_index])
+            else:
+                key = str(position // CHUNK_ROWS)
+            groups.setdefault(key, []).append((position, record))
+            position += 1
+        plan.total_rows = position
+        plan.chunks = len(groups)
+
+        header_line = "\x1f".join(header)
+        hashes = {key: self._chunk_hash(header_line, rows) for key, rows in groups.items()}
+        seen = self._seen_chunks(kind, list(hashes.values()))
+
+        changed = [row for key, rows in groups.items() if hashes[key] not in seen for row in rows]
+        changed.sort(key=lambda row: row[0])
+        plan.chunk_hashes = [chunk_hash for chunk_hash in hashes.values() if chunk_hash not in seen]
+        plan.row_index = [position for position, _ in changed]
+
+        output = StringIO()
+        writer = csv.writer(output, lineterminator="\n")
+        writer.writerow(header)
+        writer.writerows(record for _, record in changed)
+        plan.content = output.getvalue()
+        return plan
+
+    def record(self, plan: ImportPlan, records_written: int) -> None:
+        """Remember a successful import (call only when no row failed)"""
+        write_queue.run(self._write, plan, records_written)
+
+    async def record_async(self, plan: ImportPlan, records_written: int) -> None:
+        """record() for coroutines - awaits the writer instead of blocking the event loop"""
+        await write_queue.run_async(self._write, plan, records_written)
+
+    def _write(self, plan: ImportPlan, records_written: int) -> None:
+        try:
+            import_file = ImportFile(
+                kind=plan.kind, source=plan.source, content_hash=plan.content_hash,
+                size_bytes=plan.size_bytes, total_rows=plan.total_rows, chunks=plan.chunks,
+                chunks_processed=len(plan.chunk_hashes), records_written=records_written
+            )
+            self.db.add(import_file)
+            self.db.flush()
+            # Concurrent imports of overlapping files may record the same chunk
+            insert_new(self.db.connection(), ImportChunk.__table__,
+                       [{'kind': plan.kind, 'chunk_hash': chunk_hash, 'file_id': import_file.id}
+                        for chunk_hash in plan.chunk_hashes],
+                       ("kind", "chunk_hash"), returning=("chunk_hash",))
+            self.db.commit()
+        except IntegrityError:
+            # The same file finished concurrently and is already recorded
+            self.db.rollback()
+        except Exception:
+            self.db.rollback()
+            raise
+
+    @staticmethod
+    def _chunk_hash(header_line: str, rows: List[Tuple[int, List[str]]]) -> str:
+        digest = content_digest()
+        digest.update(header_line.encode())
+        for line in sorted("\x1f".join(record) for _, record in rows):
+            digest.update(b"\x1e" + line.encode())
+        return digest.hexdigest()
+
+    def _seen_chunks(self, kind: str, chunk_hashes: List[str]) -> set:
+        seen = set()
+        for i in range(0, len(chunk_hashes), LOOKUP_CHUNK_SIZE):
+            seen.update(self.db.execute(select(ImportChunk.chunk_hash).where(
+                ImportChunk.kind == kind,
+                ImportChunk.chunk_hash.in_(chunk_hashes[i:i + LOOKUP_CHUNK_SIZE])
+            )).scalars())
+        return seen
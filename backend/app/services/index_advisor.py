@@ -0,0 +1,197 @@
+"""
+Index Advisor
+Algorithm: replay the analytics service methods with a statement listener on the
+engine, EXPLAIN every SELECT they issued (EXPLAIN QUERY PLAN on SQLite, EXPLAIN on
+PostgreSQL) and report per query which indexes the planner chose, whether they
+covered the query, and what still scans a whole table or sorts in a temp structure.
+
+Usage: python -m app.services.index_advisor [--days 30] [--json]
+Plans depend on table statistics - run it against a database with realistic data.
+"""
+import argparse
+import json
+import re
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from ..core.cache import cache, invalidate_daily_rollups
+from ..core.instrumentation import explain
+from .analytics import AnalyticsService
+from .expenses_service import ExpensesService
+from .kpi_service import KPIService
+from .period_comparison import PeriodComparisonService
+from .sales_service import SalesService
+from .top_products import TopProductsService
+
+# Index each workload step was designed around (alembic covering_indexes.py)
+EXPECTED_INDEXES: Dict[str, str] = {
+    'revenue_metrics': 'ix_sales_date_product_amount',
+    'revenue_trend': 'ix_sales_date_product_amount',
+    'top_products': 'ix_sales_date_product_amount',
+    'customer_summary': 'ix_sales_customer_date_amount',
+    'expenses_by_category': 'ix_expenses_date_category_amount',
+}
+ADVISED_TABLES = ("sales", "expenses", "customers")
+
+_SQLITE_INDEX = re.compile(r"^(SEARCH|SCAN) (\w+)(?: AS \w+)? USING (COVERING )?INDEX (\w+)")
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)$")
+_PG_INDEX = re.compile(r"(Index Only Scan|Index Scan|Bitmap Index Scan)(?: Backward)? (?:using|on) (\w+)(?: on (\w+))?")
+_PG_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+def analytics_workload(start: datetime, end: datetime) -> List[Tuple[str, Callable[[Session], Any]]]:
+    """(name, call) pairs for the queries behind the dashboard and listing endpoints"""
+    return [
+        ('revenue_metrics', lambda db: AnalyticsService(db).calculate_revenue_metrics(start, end)),
+        ('revenue_trend', lambda db: AnalyticsService(db).get_revenue_trend(start, end, 'daily')),
+        ('top_products', lambda db: TopProductsService(db).get_top_products(start, end)),
+        ('repeat_customers', lambda db: AnalyticsService(db).count_repeat_customers(start, end, exact=True)),
+        # The dashboard's customer summary is all-time
+        ('customer_summary', lambda db: AnalyticsService(db).get_customer_summary(exact=True)),
+        ('period_comparison', lambda db: PeriodComparisonService(db).compare(start, end)),
+        ('kpi_summary', lambda db: KPIService(db).collect_kpis((end - start).days or 1)),
+        ('sales_page', lambda db: SalesService(db).get_sales_page(limit=100, start_date=start, end_date=end)),
+        ('expenses_by_category', lambda db: ExpensesService(db).get_expenses_by_category(start, end)),
+    ]
+
+
+def summarize_plan(dialect: str, plan: List[str]) -> Dict[str, Any]:
+    """Indexes used (covering or with table lookups), full table scans and temp sorts in a plan"""
+    summary = {'covering': [], 'lookups': [], 'full_scans': [], 'full_index_scans': [], 'temp_sort': False}
+    for line in plan:
+        detail = line.strip().lstrip("->").strip()
+        if dialect == "sqlite":
+            match = _SQLITE_INDEX.match(detail)
+            if match:
+                access, _, covering, index_name = match.groups()
+                summary['covering' if covering else 'lookups'].append(index_name)
+                if access == "SCAN":
+                    summary['full_index_scans'].append(index_name)
+            elif _SQLITE_SCAN.match(detail):
+                summary['full_scans'].append(_SQLITE_SCAN.match(detail).group(1))
+            elif detail.startswith("USE TEMP B-TREE"):
+                summary['temp_sort'] = True
+        else:
+            match = _PG_INDEX.search(detail)
+            if match:
+                node, index_name, _ = match.groups()
+                summary['covering' if node == "Index Only Scan" else 'lookups'].append(index_name)
+            elif _PG_SCAN.search(detail):
+                summary['full_scans'].append(_PG_SCAN.search(detail).group(1))
+            elif detail.startswith("Sort"):
+                summary['temp_sort'] = True
+    return summary
+
+
+def capture_statements(db: Session, call: Callable[[Session], Any]) -> List[Tuple[str, Any]]:
+    """Run `call` and return the (SQL, DBAPI parameters) of every SELECT it executed"""
+    captured = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        call(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+    return captured
+
+
+class IndexAdvisor:
+    """Replays a workload and reports index usage per query"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.dialect = db.get_bind().dialect.name
+
+    def existing_indexes(self) -> Dict[str, List[str]]:
+        inspector = inspect(self.db.connection())
+        tables = set(inspector.get_table_names())
+        return {table: sorted(index['name'] for index in inspector.get_indexes(table))
+                for table in ADVISED_TABLES if table in tables}
+
+    def advise(self, workload: List[Tuple[str, Callable[[Session], Any]]]) -> Dict[str, Any]:
+        # Replay against the database, not the result caches
+        cache.clear()
+        invalidate_daily_rollups()
+
+        existing = self.existing_indexes()
+        all_indexes = {name for names in existing.values() for name in names}
+        used = set()
+        queries = []
+        for name, call in workload:
+            for statement, parameters in capture_statements(self.db, call):
+                plan = explain(self.db.connection(), statement, parameters) or []
+                summary = summarize_plan(self.dialect, plan)
+                # Scans of materialized subqueries (anon_1, ...) are not table scans
+                summary['full_scans'] = [table for table in summary['full_scans'] if table in existing]
+                used.update(summary['covering'], summary['lookups'])
+                queries.append({'name': name, 'sql': ' '.join(statement.split()), 'plan': plan, **summary})
+
+        findings = []
+        for name, index_name in EXPECTED_INDEXES.items():
+            steps = [query for query in queries if query['name'] == name]
+            if not steps:
+                continue
+            if index_name not in all_indexes:
+                findings.append(f"{name}: missing index {index_name}")
+            elif not any(index_name in query['covering'] + query['lookups'] for query in steps):
+                findings.append(f"{name}: {index_name} exists but the planner did not use it")
+        for query in queries:
+            for table in query['full_scans']:
+                findings.append(f"{query['name']}: full scan of {table}")
+
+        return {
+            'dialect': self.dialect,
+            'queries': queries,
+            'findings': findings,
+            'indexes': {
+                table: {'used': [n for n in names if n in used], 'unused': [n for n in names if n not in used]}
+                for table, names in existing.items()
+            },
+        }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"Index advisor ({report['dialect']})", ""]
+    for query in report['queries']:
+        indexes = [f"{name} (covering)" for name in query['covering']] + query['lookups']
+        flags = []
+        if query['full_scans']:
+            flags.append("full scan: " + ", ".join(query['full_scans']))
+        if query['full_index_scans']:
+            flags.append("full index scan: " + ", ".join(query['full_index_scans']))
+        if query['temp_sort']:
+            flags.append("temp sort")
+        lines.append(f"{query['name']:<22} {', '.join(indexes) or '-'}" + (f"  [{'; '.join(flags)}]" if flags else ""))
+    lines.append("")
+    for table, usage in report['indexes'].items():
+        lines.append(f"{table}: used {', '.join(usage['used']) or '-'}; unused {', '.join(usage['unused']) or '-'}")
+    lines.append("")
+    lines.extend(report['findings'] or ["No missing indexes or full table scans"])
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from ..core.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=30, help="analytics window ending now")
+    parser.add_argument("--json", action="store_true", help="print the full report with plans as JSON")
+    args = parser.parse_args(argv)
+
+    end = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        report = IndexAdvisor(db).advise(analytics_workload(end - timedelta(days=args.days), end))
+    finally:
+        db.close()
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from ..models.analytics import Sale, Customer, Expense
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..core.events import Event, EventType, event_bus
 from ..core.cache import cached, cache_invalidate
+from ..core.config import settings
+from .top_products import TopProductsService
+from .analytics import AnalyticsService
+from .statements import statements
 from datetime import datetime, timedelta
 from typing import Dict, List, Any
 
@@ -13,7 +16,15 @@ class KPIService:
     @cached("kpi_summary", ttl_seconds=300)  # Cache for 5 minutes
     async def calculate_all_kpis(self, days: int = 30) -> Dict[str, Any]:
         """Calculate all KPIs and emit event - CACHED VERSION"""
-        kpis = {
+        kpis = self.collect_kpis(days)
+        
+        # Emit KPI calculated event
+        await self._emit_kpi_event(kpis)
+        return kpis
+    
+    def collect_kpis(self, days: int = 30) -> Dict[str, Any]:
+        """All dashboard KPIs in one dict (no event)"""
+        return {
             "revenue": self.get_total_revenue(days),
             "profit_margin": self.get_profit_margin(days),
             "top_products": self.get_top_products(),
@@ -23,18 +34,12 @@ class KPIService:
             "calculated_at": datetime.utcnow().isoformat(),
             "period_days": days
         }
-        
-        # Emit KPI calculated event
-        await self._emit_kpi_event(kpis)
-        return kpis
     
     @cached("revenue", ttl_seconds=180)  # Cache for 3 minutes
     def get_total_revenue(self, days: int = 30) -> float:
         """Calculate total revenue for the last N days - CACHED"""
         cutoff_date = datetime.utcnow() - timedelta(days=days)
-        result = self.db.query(func.sum(Sale.amount_cents)).filter(
-            Sale.date >= cutoff_date
-        ).scalar()
+        result = statements.execute(self.db, "sales_total_since", since=cutoff_date).scalar()
         return (result or 0) / 100  # Convert cents to dollars
     
     def get_profit_margin(self, days: int = 30) -> float:
@@ -44,56 +49,47 @@ class KPIService:
             return 0.0
         
         cutoff_date = datetime.utcnow() - timedelta(days=days)
-        expenses = self.db.query(func.sum(Expense.amount_cents)).filter(
-            Expense.date >= cutoff_date
-        ).scalar() or 0
+        expenses = statements.execute(self.db, "expenses_total_since", since=cutoff_date).scalar() or 0
         
         expenses_dollars = expenses / 100
         profit = revenue - expenses_dollars
         return (profit / revenue) * 100
     
-    @cached("top_products", ttl_seconds=600)  # Cache for 10 minutes
-    def get_top_products(self, limit: int = 5) -> List[Dict]:
-        """Get top selling products by revenue - CACHED"""
-        results = self.db.query(
-            Sale.product_name,
-            func.count(Sale.id).label('total_sales'),
-            func.sum(Sale.amount_cents).label('total_revenue_cents')
-        ).group_by(Sale.product_name).order_by(
-            desc('total_revenue_cents')
-        ).limit(limit).all()
+    def get_top_products(self, limit: int = 5, rank_by: str = "revenue") -> List[Dict]:
+        """Get top selling products by revenue (or count) across all sales"""
+        bounds = statements.execute(self.db, "sales_date_bounds").first()
+        if not bounds or bounds[0] is None:
+            return []
         
+        results = TopProductsService(self.db).get_top_products(bounds[0], bounds[1], limit, rank_by)
         return [
             {
-                "product_name": result.product_name,
-                "total_sales": result.total_sales,
-                "total_revenue": result.total_revenue_cents / 100
+                "product_name": result["product_name"],
+                "total_sales": result["sales_count"],
+                "total_revenue": result["total_revenue"]
             }
             for result in results
         ]
     
-    def get_repeat_customers(self) -> int:
+    def get_repeat_customers(self, exact: bool = False) -> int:
         """Count customers with more than one purchase"""
-        result = self.db.query(Sale.customer_id).filter(
-            Sale.customer_id.isnot(None)
-        ).group_by(Sale.customer_id).having(
-            func.count(Sale.id) > 1
-        ).count()
-        return result
+        if settings.approximate_customer_counts and not exact:
+            return AnalyticsService(self.db).get_customer_summary()['repeat_customers']
+        
+        return statements.execute(self.db, "repeat_customers_all_time").scalar()
     
     def get_total_customers(self) -> int:
         """Get total unique customers"""
-        return self.db.query(Customer).count()
+        return statements.execute(self.db, "customer_count").scalar()
     
     def get_avg_order_value(self, days: int = 30) -> float:
         """Calculate average order value"""
         cutoff_date = datetime.utcnow() - timedelta(days=days)
-        result = self.db.query(func.avg(Sale.amount_cents)).filter(
-            Sale.date >= cutoff_date
-        ).scalar()
+        result = statements.execute(self.db, "sales_avg_since", since=cutoff_date).scalar()
         return (result or 0) / 100
     
-    async def _emit_kpi_event(self, kpis: Dict[str, Any]):
+    @staticmethod
+    async def _emit_kpi_event(kpis: Dict[str, Any]):
         """Emit KPI calculated event"""
         event = Event(
             event_type=EventType.KPI_CALCULATED,
@@ -102,4 +98,35 @@ class KPIService:
             data=kpis,
             timestamp=datetime.utcnow()
         )
-        await event_bus.publish(event)
\ No newline at end of file
+        await event_bus.publish(event)
+
+
+class AsyncKPIService:
+    """KPIService for async handlers - the sync queries run inside AsyncSession.run_sync"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    # Shares the "kpi_summary" prefix so sale writes invalidate both paths
+    @cached("kpi_summary", ttl_seconds=300)
+    async def calculate_all_kpis(self, days: int = 30) -> Dict[str, Any]:
+        """Calculate all KPIs and emit event - CACHED VERSION"""
+        kpis = await self._run('collect_kpis', days)
+        await KPIService._emit_kpi_event(kpis)
+        return kpis
+    
+    async def get_total_revenue(self, days: int = 30) -> float:
+        return await self._run('get_total_revenue', days)
+    
+    async def get_profit_margin(self, days: int = 30) -> float:
+        return await self._run('get_profit_margin', days)
+    
+    async def get_top_products(self, limit: int = 5, rank_by: str = "revenue") -> List[Dict]:
+        return await self._run('get_top_products', limit, rank_by)
+    
+    async def get_repeat_customers(self, exact: bool = False) -> int:
+        return await self._run('get_repeat_customers', exact)
+    
+    async def _run(self, method: str, *args):
+        return await self.db.run_sync(lambda session: getattr(KPIService(session), method)(*args))
+
@@ -1,66 +1,30 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, select
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from ..models.analytics import Sale
-from ..core.base_service import BaseService
+from ..core.base_service import AsyncBaseService, BaseService, window_criteria
 from ..core.events import Event, EventType, event_bus
-from ..core.cache import cache_invalidate
+from ..core.cache import cache_invalidate, invalidate_daily_rollups
+from ..core.pagination import keyset_page
+from ..core.serialization import ColumnSpec, to_cents
 from fastapi import HTTPException
 
-class SalesService(BaseService[Sale]):
-    def __init__(self, db: Session):
-        super().__init__(Sale, db)
-    
-    async def create_sale(self, sale_data: Dict[str, Any]) -> Sale:
-        """Create a new sale record with event emission"""
-        try:
-            # Convert amount to cents if provided as float
-            if 'amount' in sale_data:
-                sale_data['amount_cents'] = int(sale_data.pop('amount') * 100)
-            
-            return await self.create(sale_data)
-        except Exception as e:
-            self.db.rollback()
-            raise HTTPException(status_code=400, detail=f"Error creating sale: {str(e)}")
-    
-    def get_sales(self, skip: int = 0, limit: int = 100, 
-                  start_date: Optional[datetime] = None,
-                  end_date: Optional[datetime] = None) -> List[Sale]:
-        """Get sales with optional date filtering"""
-        query = self.db.query(Sale)
-        
-        if start_date:
-            query = query.filter(Sale.date >= start_date)
-        if end_date:
-            query = query.filter(Sale.date <= end_date)
-            
-        return query.order_by(desc(Sale.date)).offset(skip).limit(limit).all()
-    
-    async def update_sale(self, sale_id: int, sale_data: Dict[str, Any]) -> Optional[Sale]:
-        """Update existing sale with event emission"""
-        try:
-            # Convert amount to cents if provided as float
-            if 'amount' in sale_data:
-                sale_data['amount_cents'] = int(sale_data.pop('amount') * 100)
-            
-            return await self.update(sale_id, sale_data)
-        except Exception as e:
-            self.db.rollback()
-            raise HTTPException(status_code=400, detail=f"Error updating sale: {str(e)}")
-    
-    async def delete_sale(self, sale_id: int) -> bool:
-        """Delete sale with event emission"""
-        try:
-            return await self.delete(sale_id)
-        except Exception as e:
-            self.db.rollback()
-            raise HTTPException(status_code=400, detail=f"Error deleting sale: {str(e)}")
+# SaleResponse fields, selected as plain columns by the list and export endpoints
+SALE_RESPONSE_COLUMNS: ColumnSpec = (
+    ("id", Sale.id), ("date", Sale.date), ("product_name", Sale.product_name),
+    ("amount", Sale.amount_cents), ("customer_id", Sale.customer_id),
+    ("category", Sale.category), ("created_at", Sale.created_at),
+)
+
+class SaleEventsMixin:
+    """Sale event emission and cache invalidation shared by the sync and async services"""
     
     # Event emission methods
     async def _emit_created_event(self, sale: Sale):
         # Invalidate relevant caches when new sale is created
-        self._invalidate_analytics_cache()
+        self._invalidate_analytics_cache(sale)
         
         event = Event(
             event_type=EventType.SALE_CREATED,
@@ -86,7 +50,7 @@ class SalesService(BaseService[Sale]):
     
     async def _emit_deleted_event(self, sale: Sale):
         # Invalidate relevant caches when sale is deleted
-        self._invalidate_analytics_cache()
+        self._invalidate_analytics_cache(sale)
         
         event = Event(
             event_type=EventType.SALE_DELETED,
@@ -97,8 +61,121 @@ class SalesService(BaseService[Sale]):
         )
         await event_bus.publish(event)
     
-    def _invalidate_analytics_cache(self):
+    def _invalidate_analytics_cache(self, sale: Optional[Sale] = None):
         """Invalidate all analytics-related cache entries"""
         cache_invalidate("kpi_summary")
         cache_invalidate("revenue")
-        cache_invalidate("top_products")
\ No newline at end of file
+        cache_invalidate("top_products")
+        
+        # Updates may move a sale between days, so only creates/deletes are day-scoped
+        if sale is not None and sale.date is not None:
+            invalidate_daily_rollups(sale.date.date())
+        else:
+            invalidate_daily_rollups()
+
+class SalesService(SaleEventsMixin, BaseService[Sale]):
+    def __init__(self, db: Session):
+        super().__init__(Sale, db)
+    
+    async def create_sale(self, sale_data: Dict[str, Any]) -> Sale:
+        """Create a new sale record with event emission"""
+        try:
+            # Convert amount to cents if provided as float
+            if 'amount' in sale_data:
+                sale_data['amount_cents'] = to_cents(sale_data.pop('amount'))
+            
+            return await self.create(sale_data)
+        except Exception as e:
+            self.db.rollback()
+            raise HTTPException(status_code=400, detail=f"Error creating sale: {str(e)}")
+    
+    def get_sales(self, skip: int = 0, limit: int = 100, 
+                  start_date: Optional[datetime] = None,
+                  end_date: Optional[datetime] = None,
+                  columns: Optional[ColumnSpec] = None) -> List[Sale]:
+        """Get sales with optional date filtering (row tuples of `columns` via list_rows when given)"""
+        criteria = window_criteria(Sale.date, start_date, end_date)
+        if columns:
+            return self.list_rows(columns, *criteria, order_by=(desc(Sale.date),), skip=skip, limit=limit)
+        return self.db.query(Sale).filter(*criteria).order_by(desc(Sale.date)).offset(skip).limit(limit).all()
+    
+    def get_sales_page(self, limit: int = 100, cursor: Optional[str] = None,
+                       start_date: Optional[datetime] = None,
+                       end_date: Optional[datetime] = None,
+                       columns: Optional[ColumnSpec] = None) -> Tuple[List[Sale], Optional[str]]:
+        """Newest-first page keyed on (date, id); returns the sales and the next cursor"""
+        criteria = window_criteria(Sale.date, start_date, end_date)
+        if columns:
+            return self.list_page(columns, Sale.date, Sale.id, *criteria, cursor=cursor, limit=limit)
+        return keyset_page(self.db.query(Sale).filter(*criteria), Sale.date, Sale.id, cursor, limit)
+    
+    async def update_sale(self, sale_id: int, sale_data: Dict[str, Any]) -> Optional[Sale]:
+        """Update existing sale with event emission"""
+        try:
+            # Convert amount to cents if provided as float
+            if 'amount' in sale_data:
+                sale_data['amount_cents'] = to_cents(sale_data.pop('amount'))
+            
+            return await self.update(sale_id, sale_data)
+        except Exception as e:
+            self.db.rollback()
+            raise HTTPException(status_code=400, detail=f"Error updating sale: {str(e)}")
+    
+    async def delete_sale(self, sale_id: int) -> bool:
+        """Delete sale with event emission"""
+        try:
+            return await self.delete(sale_id)
+        except Exception as e:
+            self.db.rollback()
+            raise HTTPException(status_code=400, detail=f"Error deleting sale: {str(e)}")
+
+
+class AsyncSalesService(SaleEventsMixin, AsyncBaseService[Sale]):
+    """SalesService over an AsyncSession - used by the async API handlers"""
+    
+    def __init__(self, db: AsyncSession):
+        super().__init__(Sale, db)
+    
+    async def create_sale(self, sale_data: Dict[str, Any]) -> Sale:
+        """Create a new sale record with event emission"""
+        try:
+            if 'amount' in sale_data:
+                sale_data['amount_cents'] = to_cents(sale_data.pop('amount'))
+            
+            return await self.create(sale_data)
+        except Exception as e:
+            await self.db.rollback()
+            raise HTTPException(status_code=400, detail=f"Error creating sale: {str(e)}")
+    
+    async def get_sales(self, skip: int = 0, limit: int = 100,
+                        start_date: Optional[datetime] = None,
+                        end_date: Optional[datetime] = None) -> List[Sale]:
+        """Get sales with optional date filtering"""
+        query = select(Sale)
+        
+        if start_date:
+            query = query.where(Sale.date >= start_date)
+        if end_date:
+            query = query.where(Sale.date <= end_date)
+        
+        result = await self.db.execute(query.order_by(desc(Sale.date)).offset(skip).limit(limit))
+        return list(result.scalars().all())
+    
+    async def update_sale(self, sale_id: int, sale_data: Dict[str, Any]) -> Optional[Sale]:
+        """Update existing sale with event emission"""
+        try:
+            if 'amount' in sale_data:
+                sale_data['amount_cents'] = to_cents(sale_data.pop('amount'))
+            
+            return await self.update(sale_id, sale_data)
+        except Exception as e:
+            await self.db.rollback()
+            raise HTTPException(status_code=400, detail=f"Error updating sale: {str(e)}")
+    
+    async def delete_sale(self, sale_id: int) -> bool:
+        """Delete sale with event emission"""
+        try:
+            return await self.delete(sale_id)
+        except Exception as e:
+            await self.db.rollback()
+            raise HTTPException(status_code=400, detail=f"Error deleting sale: {str(e)}")
@@ -1,7 +1,86 @@
-from typing import List, Dict, Tuple, Optional
+from typing import Any, List, Dict, Tuple, Optional
+from datetime import datetime
 import json
 from sqlalchemy.orm import Session
-from .data_processor import DataProcessor
+from ..core.config import settings
+from ..core.write_queue import write_queue
+from ..models.analytics import SheetSyncState
+from .data_processor import (
+    DataProcessor, optional_text, parse_amount_cents, parse_product_name, parse_sale_date
+)
+from .import_ledger import ImportPlan
+from .upserts import SHEET_ROW_HASH_FIELDS, RowHasher
+
+
+def _a1_rows(sheet_name: str, first_row: int, last_row: int) -> str:
+    """A1 notation for whole rows of a sheet: 'Sheet 1'!2:5001"""
+    quoted = sheet_name.replace("'", "''")
+    return f"'{quoted}'!{first_row}:{last_row}"
+
+
+class SheetRowConverter:
+    """
+    Sheet values (list of row lists) -> sale dicts, without a CSV round trip
+    Data Structure: one list per column (column arrays), each validated in a single
+    pass with DataProcessor's field rules; rows are keyed by content + sheet position
+    """
+    
+    REQUIRED_COLUMNS = ('date', 'product_name', 'amount')
+    COLUMNS = REQUIRED_COLUMNS + ('customer_id', 'category')
+    
+    def __init__(self, header: List[str], sheet_key: str):
+        self.index = {str(name).strip(): position for position, name in enumerate(header)}
+        missing = [column for column in self.REQUIRED_COLUMNS if column not in self.index]
+        if missing:
+            raise ValueError(f"Missing required columns: {', '.join(missing)}")
+        self.sheet_key = sheet_key
+        self._hasher = RowHasher(SHEET_ROW_HASH_FIELDS)
+    
+    def convert(self, values: List[List[Any]], first_row: int) -> Tuple[List[Dict[str, Any]], List[str], Optional[int]]:
+        """
+        Convert a block of rows starting at sheet row `first_row`
+        Returns: (valid sales, errors, sheet row of the first invalid row or None)
+        """
+        columns = {name: self._column(values, name) for name in self.COLUMNS}
+        filled = [position for position, row in enumerate(values) if any(str(cell).strip() for cell in row)]
+        problems: Dict[int, str] = {}
+        
+        def validated(name: str, parse) -> Dict[int, Any]:
+            parsed = {}
+            for position in filled:
+                try:
+                    parsed[position] = parse(columns[name][position])
+                except ValueError as e:
+                    problems.setdefault(position, str(e))
+            return parsed
+        
+        dates = validated('date', parse_sale_date)
+        product_names = validated('product_name', parse_product_name)
+        amounts = validated('amount', parse_amount_cents)
+        
+        sales = []
+        for position in filled:
+            if position in problems:
+                continue
+            sale = {
+                'date': dates[position],
+                'product_name': product_names[position],
+                'amount_cents': amounts[position],
+                'customer_id': optional_text(columns['customer_id'][position]),
+                'category': optional_text(columns['category'][position]),
+            }
+            sale['row_hash'] = self._hasher(dict(sale, sheet_row=f"{self.sheet_key}/{first_row + position}"))
+            sales.append(sale)
+        
+        errors = [f"Row {first_row + position}: {message}" for position, message in sorted(problems.items())]
+        return sales, errors, (first_row + min(problems)) if problems else None
+    
+    def _column(self, values: List[List[Any]], name: str) -> List[str]:
+        # The API trims trailing empty cells, so short rows are padded here
+        index = self.index.get(name)
+        if index is None:
+            return [''] * len(values)
+        return [str(row[index]).strip() if index < len(row) else '' for row in values]
 
 
 class GoogleSheetsConnector:
@@ -10,10 +89,15 @@ class GoogleSheetsConnector:
     Senior Engineer Principle: Fail gracefully, provide clear error messages
     """
     
-    def __init__(self, db: Session, credentials_file: Optional[str] = None):
+    def __init__(self, db: Session, credentials_file: Optional[str] = None, service: Optional[Any] = None):
         self.db = db
-        self.credentials_file = credentials_file
-        self.service = None
+        self.credentials_file = credentials_file or settings.google_credentials_file
+        self.service = service  # A pre-built Sheets v4 client (tests pass a local fake)
+        # Last extract_sheet_data import: ledger plan and rows skipped as duplicates
+        self.plan: Optional[ImportPlan] = None
+        self.duplicates_skipped = 0
+        self.possible_corrections: List[str] = []
+        self.sync_state: Optional[SheetSyncState] = None  # Cursor after the last sync_sheet
         
     def _initialize_service(self):
         """
@@ -74,32 +158,111 @@ class GoogleSheetsConnector:
             # Convert to CSV format for processing
             csv_content = self._convert_to_csv(sheet_data)
             
-            # Use existing CSV processor
-            processor = DataProcessor(self.db)
-            records_processed, errors = processor.process_csv_content(csv_content)
+            # Use existing CSV processor - behind the import ledger, an unchanged range is not reprocessed
+            processor = DataProcessor(self.db, source="google_sheets")
+            records_processed, errors = processor.import_csv(
+                csv_content, source=f"sheets:{spreadsheet_id}:{range_name}"
+            )
+            self.plan = processor.plan
+            self.duplicates_skipped = processor.duplicates_skipped
+            self.possible_corrections = processor.possible_corrections
             
             return records_processed, errors
             
         except Exception as e:
             return 0, [f"Google Sheets extraction error: {str(e)}"]
     
+    def sync_sheet(self, spreadsheet_id: str, sheet_name: str = "Sheet1",
+                   block_rows: Optional[int] = None) -> Tuple[int, List[str]]:
+        """
+        Incremental sync of an append-only sheet (e.g. a POS log)
+        Algorithm: Page through the rows after the stored cursor, block_rows per
+        values().get call. Each block goes straight from the values list into column
+        arrays (SheetRowConverter) and through DataProcessor's deduplicating writer.
+        The cursor only passes rows that are synced, so it stops before the first
+        invalid row: that row is retried (and can be fixed in place), while valid rows
+        after it are written now and are no-ops when re-read.
+        Rows edited above the cursor are not seen - extract_sheet_data re-imports the range.
+        Keep one mode per sheet: full imports key rows by content, this sync by content
+        and row number (so a repeat sale appended later is not taken for a re-read row),
+        and a sheet switched between the two is imported again.
+        
+        Returns:
+            Tuple of (records_written, errors_list)
+        """
+        try:
+            if not self._initialize_service():
+                return 0, ["Failed to initialize Google Sheets connection"]
+            block_rows = block_rows or settings.sheets_sync_block_rows
+            
+            header_rows = self._fetch_rows(spreadsheet_id, _a1_rows(sheet_name, 1, 1))
+            if not header_rows:
+                return 0, ["No header row found in the sheet"]
+            header = [str(cell).strip() for cell in header_rows[0]]
+            converter = SheetRowConverter(header, f"{spreadsheet_id}/{sheet_name}")
+            
+            state = self.db.get(SheetSyncState, (spreadsheet_id, sheet_name))
+            header_line = "\x1f".join(header)
+            if state is None or state.header != header_line:
+                # New sheet or re-laid-out columns: start over (already-synced rows are no-ops)
+                state = state or SheetSyncState(spreadsheet_id=spreadsheet_id, sheet_name=sheet_name, rows_synced=0)
+                state.header = header_line
+                state.last_row = 1
+            
+            processor = DataProcessor(self.db, source="google_sheets")
+            records_written, errors = 0, []
+            cursor, blocked = state.last_row, False
+            first_row = state.last_row + 1
+            while True:
+                values = self._fetch_rows(spreadsheet_id, _a1_rows(sheet_name, first_row, first_row + block_rows - 1))
+                sales, block_errors, first_invalid = converter.convert(values, first_row)
+                if sales:
+                    records_written += processor.write_sales(sales)
+                errors.extend(block_errors)
+                if not blocked:
+                    blocked = first_invalid is not None
+                    cursor = first_invalid - 1 if blocked else first_row + len(values) - 1
+                # The API omits trailing empty rows - a short block is the end of the sheet
+                if len(values) < block_rows:
+                    break
+                first_row += block_rows
+            
+            state.last_row = max(cursor, 1)
+            state.rows_synced += records_written
+            state.synced_at = datetime.utcnow()
+            self.sync_state = state
+            write_queue.run(self._save_state, state)
+            self.duplicates_skipped = processor.duplicates_skipped
+            self.possible_corrections = processor.possible_corrections
+            return records_written, errors
+            
+        except Exception as e:
+            self.db.rollback()
+            return 0, [f"Google Sheets sync error: {str(e)}"]
+    
+    def _save_state(self, state: SheetSyncState) -> None:
+        self.db.add(state)
+        self.db.commit()
+    
     def _fetch_sheet_data(self, spreadsheet_id: str, range_name: str) -> List[List[str]]:
         """
         Fetch raw data from Google Sheets
         Algorithm: Single API call with error handling
         """
+        values = self._fetch_rows(spreadsheet_id, range_name)
+        if not values:
+            raise ConnectionError("Failed to fetch data: No data found in spreadsheet")
+        return values
+    
+    def _fetch_rows(self, spreadsheet_id: str, range_name: str) -> List[List[Any]]:
+        """One values().get call; an empty range is an empty list"""
         try:
             result = self.service.spreadsheets().values().get(
                 spreadsheetId=spreadsheet_id,
                 range=range_name
             ).execute()
             
-            values = result.get('values', [])
-            
-            if not values:
-                raise ValueError("No data found in spreadsheet")
-            
-            return values
+            return result.get('values', [])
             
         except Exception as e:
             if "not found" in str(e).lower():
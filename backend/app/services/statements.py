@@ -0,0 +1,114 @@
+"""
+Prepared Analytics Statements
+Algorithm: the hot parameterized analytics queries are built once, at import, as
+Core select()s over the tables with named bind parameters. A call only supplies
+values: no expression tree is rebuilt, the statement's cache key is memoized on
+the object, so SQLAlchemy's compiled cache answers with a single dict lookup, and
+running on the session's connection skips the ORM execution layer.
+Queries whose shape depends on an argument (trend interval, optional window) are
+registered once per variant.
+"""
+from typing import Any, Dict, Iterator
+from sqlalchemy import Executable, bindparam, case, func, select
+from sqlalchemy.engine import Result
+from sqlalchemy.orm import Session
+from ..models.analytics import Customer, Expense, Sale
+
+sales = Sale.__table__
+expenses = Expense.__table__
+customers = Customer.__table__
+
+
+class StatementRegistry:
+    """Name -> prebuilt statement; execute() binds parameters and runs it"""
+
+    def __init__(self):
+        self._statements: Dict[str, Executable] = {}
+
+    def register(self, name: str, statement: Executable) -> Executable:
+        if name in self._statements:
+            raise ValueError(f"Statement already registered: {name}")
+        self._statements[name] = statement
+        return statement
+
+    def get(self, name: str) -> Executable:
+        return self._statements[name]
+
+    def execute(self, db: Session, name: str, **params: Any) -> Result:
+        return db.connection().execute(self._statements[name], params)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._statements)
+
+    def __len__(self) -> int:
+        return len(self._statements)
+
+
+statements = StatementRegistry()
+
+
+def _window(column):
+    """Inclusive :start_date/:end_date range on `column`"""
+    return (column >= bindparam("start_date"), column <= bindparam("end_date"))
+
+
+# === KPIService: trailing windows (:since) ===
+
+statements.register("sales_total_since", select(func.sum(sales.c.amount_cents)).where(
+    sales.c.date >= bindparam("since")))
+statements.register("sales_avg_since", select(func.avg(sales.c.amount_cents)).where(
+    sales.c.date >= bindparam("since")))
+statements.register("expenses_total_since", select(func.sum(expenses.c.amount_cents)).where(
+    expenses.c.date >= bindparam("since")))
+statements.register("customer_count", select(func.count()).select_from(customers))
+statements.register("sales_date_bounds", select(func.min(sales.c.date), func.max(sales.c.date)))
+
+# === AnalyticsService: explicit windows (:start_date, :end_date) ===
+
+statements.register("revenue_metrics", select(
+    func.sum(sales.c.amount_cents).label("total_cents"),
+    func.count(sales.c.id).label("total_sales"),
+    func.avg(sales.c.amount_cents).label("avg_cents"),
+).where(*_window(sales.c.date)))
+
+
+def _repeat_customers(*criteria):
+    repeat = select(sales.c.customer_id).where(
+        sales.c.customer_id.isnot(None), *criteria
+    ).group_by(sales.c.customer_id).having(func.count(sales.c.id) > 1).subquery()
+    return select(func.count()).select_from(repeat)
+
+
+statements.register("repeat_customers", _repeat_customers(*_window(sales.c.date)))
+statements.register("repeat_customers_all_time", _repeat_customers())
+
+
+def _customer_summary(*criteria):
+    per_customer = select(
+        sales.c.customer_id,
+        func.count(sales.c.id).label("purchase_count"),
+        func.sum(sales.c.amount_cents).label("total_spent"),
+    ).where(sales.c.customer_id.isnot(None), *criteria).group_by(sales.c.customer_id).subquery()
+    return select(
+        func.count().label("total_customers"),
+        func.sum(case((per_customer.c.purchase_count == 1, 1), else_=0)).label("new_customers"),
+        func.sum(case((per_customer.c.purchase_count > 1, 1), else_=0)).label("repeat_customers"),
+        func.sum(case((per_customer.c.total_spent > bindparam("vip_threshold"), 1), else_=0)).label("vip_customers"),
+    ).select_from(per_customer)
+
+
+statements.register("customer_summary", _customer_summary(*_window(sales.c.date)))
+statements.register("customer_summary_all_time", _customer_summary())
+statements.register("customer_summary_since", _customer_summary(sales.c.date >= bindparam("start_date")))
+statements.register("customer_summary_until", _customer_summary(sales.c.date <= bindparam("end_date")))
+
+# SQLite date grouping, as AnalyticsService has always used
+TREND_PERIODS = {
+    'daily': func.date(sales.c.date),
+    'weekly': func.strftime('%Y-%W', sales.c.date),
+    'monthly': func.strftime('%Y-%m', sales.c.date),
+}
+for interval, period in TREND_PERIODS.items():
+    statements.register(f"revenue_trend_{interval}", select(
+        period.label("period"), func.sum(sales.c.amount_cents).label("revenue_cents")
+    ).where(*_window(sales.c.date)).group_by(period).order_by(period))
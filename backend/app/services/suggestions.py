@@ -0,0 +1,389 @@
+"""
+Autocomplete Suggestions
+Algorithm: in-memory trigram inverted index over distinct product and customer
+names, plus a sorted word list for 1-2 character queries (word prefixes);
+candidates are ranked by popularity (number of sales) with a bounded heap
+Kept current from SALE_* and CUSTOMER_* events; bulk imports mark it stale for a reload.
+Database fallback (index disabled): pg_trgm GIN index on PostgreSQL, FTS5 trigram table on SQLite
+"""
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from ..core.database import cache_rebuild_session
+from ..core.events import Event, EventBus, EventType
+from ..models.analytics import Customer, Product, Sale
+
+logger = logging.getLogger(__name__)
+
+MAX_SUGGESTIONS = 50
+# Queries matching more names than this walk the popularity order instead of ranking every match
+EXACT_RANK_LIMIT = 2000
+RERANK_SECONDS = 30
+_NO_KEYS: FrozenSet[str] = frozenset()
+# FTS5 tables created by the suggest_001 migration on SQLite
+FTS_TABLES = {"products": "products_name_fts", "customers": "customers_name_fts"}
+# pg_trgm GIN indexes created by the same migration on PostgreSQL
+TRGM_INDEXES = {"products": "ix_products_name_trgm", "customers": "ix_customers_name_trgm"}
+
+
+def normalize(value: str) -> str:
+    return " ".join(value.lower().split())
+
+
+def trigrams(value: str) -> Set[str]:
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+class SuggestionIndex:
+    """
+    Substring search over one set of names
+    Data Structure:
+    - entries:  key -> [label, normalized label, popularity]
+    - grams:    trigram -> keys containing it (inverted index)
+    - words:    sorted (word, key) pairs - 1-2 character queries are word-prefix range scans
+    - names:    sorted (normalized label, key) pairs - names starting with the query are one range
+    - ranked:   keys by popularity, re-sorted at most every RERANK_SECONDS
+    Complexity: selective queries intersect posting lists and rank the matches exactly
+    (O(m log k)); broad ones take the name-prefix range and walk `ranked` for the rest,
+    stopping once `limit` matches are found
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, List] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        self._words: List[Tuple[str, str]] = []
+        self._names: List[Tuple[str, str]] = []
+        self._ranked: List[str] = []
+        self._ranked_at = 0.0
+        self._rank_dirty = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def label(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def popularity(self, key: str) -> int:
+        entry = self._entries.get(key)
+        return entry[2] if entry else 0
+
+    @classmethod
+    def build(cls, items: Iterable[Tuple[str, str, int]]) -> "SuggestionIndex":
+        """Bulk load (key, label, popularity) triples - one sort instead of an insort per word"""
+        index = cls()
+        for key, label, popularity in items:
+            index._add(key, label, popularity, keep_sorted=False)
+        index._words.sort()
+        index._names.sort()
+        index._rerank()
+        return index
+
+    def _add(self, key: str, label: str, popularity: int, keep_sorted: bool = True) -> None:
+        normalized = normalize(label)
+        self._entries[key] = [label, normalized, max(0, popularity)]
+        for gram in trigrams(normalized):
+            self._grams.setdefault(gram, set()).add(key)
+        pairs = [(self._names, (normalized, key))] + [(self._words, (word, key)) for word in set(normalized.split())]
+        for sorted_list, pair in pairs:
+            if keep_sorted:
+                insort(sorted_list, pair)
+            else:
+                sorted_list.append(pair)
+        # New names join the tail of the popularity order until the next re-rank
+        self._ranked.append(key)
+
+    def upsert(self, key: str, label: str, popularity_delta: int = 0) -> None:
+        """Add or relabel an entry and adjust its popularity"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self._add(key, label, popularity_delta)
+        elif entry[1] != normalize(label):
+            self.remove(key)
+            self._add(key, label, entry[2] + popularity_delta)
+        else:
+            entry[0] = label
+            entry[2] = max(0, entry[2] + popularity_delta)
+        if popularity_delta:
+            self._rank_dirty = True
+
+    def remove(self, key: str) -> None:
+        # Stale keys in `ranked` are skipped by the walk and dropped at the next re-rank
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for gram in trigrams(entry[1]):
+            postings = self._grams.get(gram)
+            if postings is not None:
+                postings.discard(key)
+                if not postings:
+                    del self._grams[gram]
+        pairs = [(self._names, (entry[1], key))] + [(self._words, (word, key)) for word in set(entry[1].split())]
+        for sorted_list, pair in pairs:
+            position = bisect_left(sorted_list, pair)
+            if position < len(sorted_list) and sorted_list[position] == pair:
+                del sorted_list[position]
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, str]]:
+        """(key, label) pairs: prefix matches first, then by popularity"""
+        q = normalize(query)
+        if len(q) < 3:
+            # Too short for trigrams - names with a word starting with q
+            start = bisect_left(self._words, (q, ""))
+            end = bisect_left(self._words, (q + "\uffff",))
+            scope = {key for _, key in self._words[start:end]} if end - start <= EXACT_RANK_LIMIT else None
+            padded = f" {q}"
+            matches = lambda normalized: padded in f" {normalized}"  # noqa: E731
+        else:
+            postings = sorted((self._grams.get(gram, _NO_KEYS) for gram in trigrams(q)), key=len)
+            scope = postings[0].intersection(*postings[1:]) if len(postings[0]) <= EXACT_RANK_LIMIT else None
+            matches = lambda normalized: q in normalized  # noqa: E731
+
+        entries = self._entries
+        if scope is None:
+            scope = self._popular_matches(q, matches, limit)
+        ranked = heapq.nlargest(
+            limit,
+            (key for key in scope if matches(entries[key][1])),
+            key=lambda key: (entries[key][1].startswith(q), entries[key][2], -len(entries[key][1]))
+        )
+        return [(key, entries[key][0]) for key in ranked]
+
+    def _popular_matches(self, q: str, matches: Callable[[str], bool], limit: int) -> List[str]:
+        """
+        Candidates for broad queries: names starting with q (a range of `names`), topped
+        up with the most popular other matches by walking the popularity order
+        """
+        if self._rank_dirty and time.monotonic() - self._ranked_at >= RERANK_SECONDS:
+            self._rerank()
+        start = bisect_left(self._names, (q, ""))
+        end = bisect_left(self._names, (q + "\uffff",))
+        entries = self._entries
+        if end - start <= max(EXACT_RANK_LIMIT, limit):
+            prefixed = [key for _, key in self._names[start:end]]
+            if len(prefixed) >= limit:
+                return prefixed
+            wanted = lambda entry: not entry[1].startswith(q) and matches(entry[1])  # noqa: E731
+            needed = limit - len(prefixed)
+        else:
+            prefixed = []
+            wanted = lambda entry: entry[1].startswith(q)  # noqa: E731
+            needed = limit
+
+        found, seen = [], set()
+        for key in self._ranked:
+            entry = entries.get(key)
+            if entry is None or key in seen or not wanted(entry):
+                continue
+            seen.add(key)
+            found.append(key)
+            if len(found) >= needed:
+                break
+        return prefixed + found
+
+    def _rerank(self) -> None:
+        entries = self._entries
+        # Same order as the final ranking within a tier, so the walk can stop early; the hash
+        # scatters ties (mostly never-sold names) so no prefix clusters at the end of the walk
+        self._ranked = sorted(entries, key=lambda key: (-entries[key][2], len(entries[key][1]), hash(key)))
+        self._ranked_at = time.monotonic()
+        self._rank_dirty = False
+
+
+class SuggestionService:
+    """
+    Product and customer autocomplete backed by two SuggestionIndexes
+    Loaded lazily on first use; per-process like the column store
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.products = SuggestionIndex()
+        self.customers = SuggestionIndex()
+        self._loaded = False
+        self._stale = False
+
+    # === Loading and maintenance ===
+
+    def ensure_loaded(self, db: Session) -> "SuggestionService":
+        if not self._loaded or self._stale:
+            # Kept until the next write marks it stale, so never loaded from a lagging replica
+            with cache_rebuild_session(db) as primary:
+                self.load(primary)
+        return self
+
+    def load(self, db: Session) -> None:
+        """
+        Distinct names with sales counts - GROUP BYs on the indexed key columns.
+        Products with no sales are left out (the products table is never pruned);
+        customers are kept so new accounts can be picked before their first sale
+        """
+        product_counts = dict(db.execute(
+            select(Sale.product_id, func.count()).where(Sale.product_id.isnot(None)).group_by(Sale.product_id)
+        ).all())
+        products = SuggestionIndex.build(
+            (name, name, product_counts[product_id])
+            for product_id, name in db.execute(select(Product.id, Product.name))
+            if product_counts.get(product_id, 0) > 0
+        )
+
+        customer_counts = dict(db.execute(
+            select(Sale.customer_id, func.count()).where(Sale.customer_id.isnot(None)).group_by(Sale.customer_id)
+        ).all())
+        customers = SuggestionIndex.build(
+            (customer_id, name or customer_id, customer_counts.get(customer_id, 0))
+            for customer_id, name in db.execute(select(Customer.id, Customer.name))
+        )
+
+        with self._lock:
+            self.products, self.customers = products, customers
+            self._loaded = True
+            self._stale = False
+
+    def mark_stale(self) -> None:
+        """Force a reload on next use (bulk writes that bypass events)"""
+        self._stale = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self.products, self.customers = SuggestionIndex(), SuggestionIndex()
+            self._loaded = False
+            self._stale = False
+
+    def attach(self, bus: EventBus) -> None:
+        """Subscribe to sale and customer events so names and popularity stay current"""
+        bus.subscribe(EventType.SALE_CREATED, self.handle_sale_event)
+        bus.subscribe(EventType.SALE_UPDATED, self.handle_sale_event)
+        bus.subscribe(EventType.SALE_DELETED, self.handle_sale_event)
+        bus.subscribe(EventType.CUSTOMER_CREATED, self.handle_customer_event)
+        bus.subscribe(EventType.CUSTOMER_UPDATED, self.handle_customer_event)
+        bus.subscribe(EventType.CUSTOMER_DELETED, self.handle_customer_event)
+
+    def handle_sale_event(self, event: Event) -> None:
+        """
+        Creates/deletes move popularity by one; updates only register new names
+        (the event carries the new values, not the old ones). A product whose
+        last sale is deleted drops out, matching what a reload would build
+        """
+        if not self._loaded:
+            return
+        delta = {EventType.SALE_CREATED: 1, EventType.SALE_DELETED: -1}.get(event.event_type, 0)
+        product_name = event.data.get('product_name')
+        customer_id = event.data.get('customer_id')
+        with self._lock:
+            if product_name:
+                self.products.upsert(product_name, product_name, delta)
+                if delta < 0 and self.products.popularity(product_name) == 0:
+                    self.products.remove(product_name)
+            if customer_id:
+                self.customers.upsert(customer_id, self.customers.label(customer_id) or customer_id, delta)
+
+    def handle_customer_event(self, event: Event) -> None:
+        if not self._loaded:
+            return
+        customer_id = event.data.get('id', event.entity_id)
+        with self._lock:
+            if event.event_type == EventType.CUSTOMER_DELETED:
+                self.customers.remove(customer_id)
+            else:
+                self.customers.upsert(customer_id, event.data.get('name') or customer_id)
+
+    # === Queries ===
+
+    def suggest_products(self, db: Session, query: str, limit: int = 10) -> List[str]:
+        self.ensure_loaded(db)
+        with self._lock:
+            return [label for _, label in self.products.search(query, limit)]
+
+    def suggest_customers(self, db: Session, query: str, limit: int = 10) -> List[Dict[str, str]]:
+        self.ensure_loaded(db)
+        with self._lock:
+            return [{"id": key, "name": label} for key, label in self.customers.search(query, limit)]
+
+    def stats(self) -> Dict[str, int]:
+        return {'products': len(self.products), 'customers': len(self.customers), 'loaded': self._loaded}
+
+
+def search_database(db: Session, kind: str, query: str, limit: int = 10) -> List[Tuple[Optional[str], str]]:
+    """
+    Fallback when the in-memory index is disabled: (id, name) rows matching the substring
+    PostgreSQL serves ILIKE from the pg_trgm GIN index; SQLite uses the FTS5 trigram
+    table when the migration created it (3+ characters) and a plain LIKE otherwise
+    """
+    model = Product if kind == "products" else Customer
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite" and len(query) >= 3 and _has_table(db, FTS_TABLES[kind]):
+        rows = db.execute(text(
+            f"SELECT m.id, m.name FROM {FTS_TABLES[kind]} f JOIN {kind} m ON m.rowid = f.rowid "
+            f"WHERE f.name LIKE :pattern LIMIT :limit"
+        ), {"pattern": f"%{query}%", "limit": limit}).all()
+    else:
+        rows = db.execute(
+            select(model.id, model.name).where(model.name.ilike(f"%{query}%")).limit(limit)
+        ).all()
+    return [(row[0], row[1]) for row in rows]
+
+
+def _has_table(db: Session, name: str) -> bool:
+    return db.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": name}
+    ).first() is not None
+
+
+# === Database-side trigram indexes (used by the Alembic migration) ===
+
+def create_trigram_indexes(conn: Connection) -> None:
+    """
+    PostgreSQL: pg_trgm GIN indexes so ILIKE '%q%' stops scanning the table
+    SQLite: external-content FTS5 tables with the trigram tokenizer, kept in sync by
+    triggers; skipped on SQLite builds older than 3.34 (no trigram tokenizer)
+    """
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for table, index_name in TRGM_INDEXES.items():
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} USING gin (name gin_trgm_ops)"))
+    elif conn.dialect.name == "sqlite":
+        for table, fts in FTS_TABLES.items():
+            try:
+                conn.execute(text(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                    f"name, content='{table}', content_rowid='rowid', tokenize='trigram')"
+                ))
+            except Exception as e:
+                logger.warning("FTS5 trigram index unavailable, suggestions fall back to LIKE: %s", e)
+                return
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {fts}(rowid, name) VALUES (new.rowid, new.name); END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, name) VALUES ('delete', old.rowid, old.name); END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF name ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, name) VALUES ('delete', old.rowid, old.name); "
+                f"INSERT INTO {fts}(rowid, name) VALUES (new.rowid, new.name); END"
+            ))
+            conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def drop_trigram_indexes(conn: Connection) -> None:
+    if conn.dialect.name == "postgresql":
+        for index_name in TRGM_INDEXES.values():
+            conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+    elif conn.dialect.name == "sqlite":
+        for fts in FTS_TABLES.values():
+            for suffix in ("ai", "ad", "au"):
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {fts}_{suffix}"))
+            conn.execute(text(f"DROP TABLE IF EXISTS {fts}"))
+
+
+# Global suggestion index shared by all requests in the process
+suggestions = SuggestionService()
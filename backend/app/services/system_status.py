@@ -0,0 +1,212 @@
+"""
+System Status
+Cheap enough to poll every few seconds on large tables:
+- Row counts are planner statistics: pg_class.reltuples on PostgreSQL, sqlite_stat1
+  (written by ANALYZE) on SQLite; COUNT(*) only for tables that were never analyzed
+- Last-write times and rows written come from cursor and commit hooks, so they cost nothing at poll time
+- The assembled status is cached for a short interval
+"""
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import event, func, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from ..core.cache import cached
+from ..core.config import settings
+from ..core.database import Base
+
+TRACKED_TABLES = ("sales", "customers", "expenses", "products")
+
+_WRITE_STATEMENT = re.compile(
+    r'\s*(INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE|DELETE\s+FROM)\s+"?(\w+)"?', re.IGNORECASE
+)
+
+
+class WriteTracker:
+    """
+    Per-table write activity observed at the cursor level
+    Covers ORM flushes, bulk imports and raw SQL alike; the connection hooks below
+    only record a transaction's writes once it commits
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, statement: str, rowcount: int) -> None:
+        match = _WRITE_STATEMENT.match(statement)
+        if match is None:
+            return
+        verb = match.group(1).split()[0].lower()
+        table = match.group(2).lower()
+        with self._lock:
+            entry = self._tables.get(table)
+            if entry is None:
+                entry = self._tables[table] = {'insert': 0, 'update': 0, 'delete': 0, 'last_write_at': None}
+            entry[verb] += max(rowcount, 0)
+            entry['last_write_at'] = datetime.utcnow()
+
+    def table(self, table: str) -> Dict[str, Any]:
+        with self._lock:
+            entry = dict(self._tables.get(table, {}))
+        last_write = entry.pop('last_write_at', None)
+        return {
+            'rows_written': entry or {'insert': 0, 'update': 0, 'delete': 0},
+            'last_write_at': last_write.isoformat() if last_write else None
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._tables.clear()
+
+
+# Global tracker - write activity since process start
+write_tracker = WriteTracker()
+
+
+def _rows_written(cursor, parameters, executemany: bool) -> int:
+    """
+    Rows a write statement touched, as far as the cursor knows
+    Read once the statement's RETURNING rows are fetched (see _resolve_pending);
+    only a driver that reports -1 (unknown) falls back to the parameter sets
+    """
+    rowcount = cursor.rowcount
+    if rowcount >= 0:
+        return rowcount
+    return len(parameters) if executemany else 1
+
+
+# Per-connection state in Connection.info: writes of the open transaction and the
+# latest write, whose cursor may still have RETURNING rows to be fetched
+_PENDING_WRITES = "status_pending_writes"
+_LAST_WRITE = "status_last_write"
+_SAVEPOINTS = "status_write_savepoints"
+
+
+def _resolve_pending(conn) -> list:
+    """Settle the latest write's row count - its rows are fetched by the time the next statement runs"""
+    pending = conn.info.setdefault(_PENDING_WRITES, [])
+    last = conn.info.pop(_LAST_WRITE, None)
+    if last is not None:
+        statement, cursor, parameters, executemany = last
+        pending.append((statement, _rows_written(cursor, parameters, executemany)))
+    return pending
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _settle_last_write(conn, cursor, statement, parameters, context, executemany):
+    # Also runs between insertmanyvalues batches, which reuse one cursor
+    if _LAST_WRITE in conn.info:
+        _resolve_pending(conn)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _track_writes(conn, cursor, statement, parameters, context, executemany):
+    # Cheap prefix test first - almost every statement is a SELECT
+    if statement.lstrip()[:1] in ("I", "U", "D", "i", "u", "d"):
+        conn.info[_LAST_WRITE] = (statement, cursor, parameters, executemany)
+
+
+@event.listens_for(Engine, "commit")
+def _record_committed_writes(conn):
+    for statement, rowcount in _resolve_pending(conn):
+        write_tracker.record(statement, rowcount)
+    _discard_writes(conn)
+
+
+@event.listens_for(Engine, "begin")
+@event.listens_for(Engine, "rollback")
+def _discard_writes(conn):
+    # On begin too: a connection returned to the pool is reset without a rollback event
+    for key in (_PENDING_WRITES, _LAST_WRITE, _SAVEPOINTS):
+        conn.info.pop(key, None)
+
+
+@event.listens_for(Engine, "savepoint")
+def _mark_savepoint(conn, name):
+    conn.info.setdefault(_SAVEPOINTS, {})[name] = len(_resolve_pending(conn))
+
+
+@event.listens_for(Engine, "rollback_savepoint")
+def _discard_savepoint_writes(conn, name, context):
+    mark = conn.info.get(_SAVEPOINTS, {}).pop(name, None)
+    if mark is not None:
+        del _resolve_pending(conn)[mark:]
+
+
+def _sqlite_stat_rows(db: Session, table_name: str) -> Optional[int]:
+    """Row count ANALYZE stored in sqlite_stat1 - the first number of any of the table's entries"""
+    has_stats = db.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+    ).scalar()
+    if not has_stats:
+        return None
+    stat = db.execute(
+        text("SELECT stat FROM sqlite_stat1 WHERE tbl = :table_name LIMIT 1"), {"table_name": table_name}
+    ).scalar()
+    return int(stat.split()[0]) if stat else None
+
+
+def estimate_row_count(db: Session, table_name: str) -> Tuple[Optional[int], str]:
+    """
+    Table row count from the database's statistics; returns (rows, source)
+    - PostgreSQL: pg_class.reltuples, kept current by autovacuum/ANALYZE
+    - SQLite: sqlite_stat1; SQLite has no autoanalyze, so it moves when ANALYZE
+      (or PRAGMA optimize) runs
+    - A table with no statistics yet: COUNT(*). MAX(id) is no count at all
+      (string ids, gaps after deletes)
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        reltuples = db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+            {"table_name": table_name}
+        ).scalar()
+        if reltuples is not None and reltuples >= 0:
+            return int(reltuples), "pg_class.reltuples"
+
+    table = Base.metadata.tables.get(table_name)
+    if table is None:
+        return None, "unavailable"
+    if dialect == "sqlite":
+        rows = _sqlite_stat_rows(db, table_name)
+        if rows is not None:
+            return rows, "sqlite_stat1"
+    return db.execute(select(func.count()).select_from(table)).scalar(), "count"
+
+
+class SystemStatusService:
+    """Admin status without per-poll full table scans"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @cached("system_status", ttl_seconds=settings.system_status_ttl_seconds)
+    def get_status(self) -> Dict[str, Any]:
+        """Database latency, estimated table sizes and last writes (cached briefly)"""
+        started = time.perf_counter()
+        self.db.execute(text("SELECT 1")).scalar()
+        latency_ms = (time.perf_counter() - started) * 1000
+
+        tables = {}
+        for table_name in TRACKED_TABLES:
+            rows, source = estimate_row_count(self.db, table_name)
+            tables[table_name] = {
+                'estimated_rows': rows,
+                'estimate_source': source,
+                **write_tracker.table(table_name)
+            }
+
+        return {
+            "status": "healthy",
+            "database": "healthy",
+            "database_latency_ms": round(latency_ms, 3),
+            "total_sales_records": tables["sales"]["estimated_rows"],
+            "tables": tables,
+            "last_check": datetime.utcnow().isoformat(),
+            "cache_ttl_seconds": settings.system_status_ttl_seconds,
+            "version": "1.0.0"
+        }
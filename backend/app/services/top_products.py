@@ -0,0 +1,148 @@
+"""
+Top-K Product Ranking
+Algorithm: Per-day per-product partial sums, merged for any window with a bounded heap
+"""
+import heapq
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from ..core.cache import DailyRollupCache, contiguous_runs, split_window
+from ..core.database import cache_rebuild_session
+from ..models.analytics import Sale
+from .dimensions import product_dimension
+
+# product_id -> (revenue_cents, sales_count) for a single calendar day
+DayPartial = Dict[int, Tuple[int, int]]
+
+RANK_BY_INDEX = {"revenue": 0, "count": 1}
+MAX_TOP_K = 1000
+
+
+# Global partials store shared by all services in the process
+product_partials = DailyRollupCache("product_partials")
+
+
+class TopProductsService:
+    """
+    Top-K products for an arbitrary window without a full GROUP BY + sort
+
+    Closed days (before today) are served from cached partials; the partial
+    first/last day of the window and the still-open current day are queried live.
+    """
+
+    def __init__(self, db: Session, partials: DailyRollupCache = product_partials):
+        self.db = db
+        self.partials = partials
+
+    def get_top_products(self, start_date: datetime, end_date: datetime,
+                         limit: int = 5, rank_by: str = "revenue") -> List[Dict]:
+        """
+        Algorithm: Merge day partials into window totals, then heapq.nlargest
+        Complexity: O(entries) merge + O(products * log k) selection
+        Names are joined from the products dimension only for the final k rows
+        """
+        if rank_by not in RANK_BY_INDEX:
+            raise ValueError(f"rank_by must be one of: {', '.join(RANK_BY_INDEX)}")
+        limit = max(0, min(limit, MAX_TOP_K))
+        if limit == 0 or start_date > end_date:
+            return []
+
+        totals = self._window_totals(start_date, end_date)
+
+        primary = RANK_BY_INDEX[rank_by]
+        secondary = 1 - primary
+        top = heapq.nlargest(
+            limit,
+            totals.items(),
+            key=lambda item: (item[1][primary], item[1][secondary])
+        )
+
+        names = product_dimension.names(self.db, (product_id for product_id, _ in top))
+
+        return [
+            {
+                'product_name': names.get(product_id),
+                'total_revenue': revenue_cents / 100,
+                'sales_count': sales_count
+            }
+            for product_id, (revenue_cents, sales_count) in top
+        ]
+
+    def _window_totals(self, start_date: datetime, end_date: datetime) -> Dict[int, List[int]]:
+        """Sum cached full-day partials plus live edge slices for the window"""
+        totals: Dict[int, List[int]] = {}
+        first_full, last_full, live_slices = split_window(start_date, end_date)
+
+        if first_full <= last_full:
+            for partial in self._load_days(first_full, last_full):
+                self._merge(totals, partial)
+
+        for slice_start, slice_end, inclusive_end in live_slices:
+            self._merge(totals, self._query_range(slice_start, slice_end, inclusive_end))
+
+        return totals
+
+    def _load_days(self, first_day: date, last_day: date) -> List[DayPartial]:
+        """Return partials for every day in the range, loading each run of missing days in one query"""
+        days = [first_day + timedelta(days=offset)
+                for offset in range((last_day - first_day).days + 1)]
+        cached = {day: self.partials.get(day) for day in days}
+        missing = [day for day, partial in cached.items() if partial is None]
+
+        if missing:
+            loaded: Dict[date, DayPartial] = {day: {} for day in missing}
+            day_bucket = func.date(Sale.date)
+            rows = []
+            # Cached until the next write to the day, so never built from a lagging replica
+            with cache_rebuild_session(self.db) as db:
+                # Runs skip the cached days between them instead of re-aggregating them
+                for run_start, run_end in contiguous_runs(missing):
+                    rows += db.query(
+                        day_bucket.label('day'),
+                        Sale.product_id,
+                        func.sum(Sale.amount_cents).label('revenue_cents'),
+                        func.count(Sale.id).label('sales_count')
+                    ).filter(
+                        Sale.date >= datetime.combine(run_start, time.min),
+                        Sale.date < datetime.combine(run_end + timedelta(days=1), time.min)
+                    ).group_by(
+                        day_bucket, Sale.product_id
+                    ).all()
+
+            for row in rows:
+                day = row.day if isinstance(row.day, date) else date.fromisoformat(str(row.day))
+                if day in loaded:
+                    loaded[day][row.product_id] = (row.revenue_cents or 0, row.sales_count)
+
+            for day, partial in loaded.items():
+                self.partials.set(day, partial)
+                cached[day] = partial
+
+        return list(cached.values())
+
+    def _query_range(self, start: datetime, end: datetime, inclusive_end: bool = False) -> DayPartial:
+        """Aggregate a sub-day slice directly from the sales table"""
+        end_filter = Sale.date <= end if inclusive_end else Sale.date < end
+        rows = self.db.query(
+            Sale.product_id,
+            func.sum(Sale.amount_cents).label('revenue_cents'),
+            func.count(Sale.id).label('sales_count')
+        ).filter(
+            Sale.date >= start,
+            end_filter
+        ).group_by(
+            Sale.product_id
+        ).all()
+
+        return {row.product_id: (row.revenue_cents or 0, row.sales_count) for row in rows}
+
+    @staticmethod
+    def _merge(totals: Dict[int, List[int]], partial: DayPartial) -> None:
+        for product_id, (revenue_cents, sales_count) in partial.items():
+            entry = totals.get(product_id)
+            if entry is None:
+                totals[product_id] = [revenue_cents, sales_count]
+            else:
+                entry[0] += revenue_cents
+                entry[1] += sales_count
@@ -0,0 +1,140 @@
+"""
+Idempotent Imports
+Algorithm: POS exports overlap, so imports write through INSERT ... ON CONFLICT on
+a key a unique index enforces, and re-sent rows cost one index probe instead of a
+duplicate:
+- customers: the natural key (id). A re-sent customer is only rewritten when its
+  name or email changed (DO UPDATE ... WHERE IS DISTINCT FROM).
+- sales/expenses: the exports carry no transaction id, so a row's identity is its
+  content - row_hash, a digest of its fields plus its ordinal among identical rows
+  of the same import. Two genuine identical sales in one export both land, and
+  the same export imported again writes nothing.
+Limitation: a corrected row (say, a fixed amount) is a new row, stored next to the
+version it corrects - without a transaction id it cannot be told from a genuine new
+sale. Imports report written rows whose natural key (sales: date, product,
+customer; expenses: date, description) matches an earlier import with different
+content (find_corrections), so the caller can review them.
+Each batch is one multi-row statement; RETURNING reports the rows actually written.
+"""
+import hashlib
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Sequence, Tuple
+from sqlalchemy import Table, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Row
+from ..models.analytics import Customer
+
+SALE_HASH_FIELDS = ("date", "product_name", "amount_cents", "customer_id", "category")
+EXPENSE_HASH_FIELDS = ("date", "description", "amount_cents", "category")
+# Incremental Sheets sync: rows keyed by content and position in the (append-only) sheet
+SHEET_ROW_HASH_FIELDS = SALE_HASH_FIELDS + ("sheet_row",)
+# Natural keys the exports do carry - a new row matching an earlier one on these, but
+# not on the rest of its content, is probably a correction of it
+SALE_CORRECTION_KEY = ("date", "product_name", "customer_id")
+EXPENSE_CORRECTION_KEY = ("date", "description")
+# Keep IN (...) lists under SQLite's bound-parameter limit
+CORRECTION_LOOKUP_SIZE = 500
+# Unique indexes the ON CONFLICT clauses target (sales includes the partition key)
+SALE_CONFLICT_KEY = ("date", "row_hash")
+EXPENSE_CONFLICT_KEY = ("row_hash",)
+CUSTOMER_UPDATE_FIELDS = ("name", "email")
+# What empty cells were stored as before imports read CSVs with keep_default_na=False -
+# hashed as empty, so rows hashed by the upsert_001 backfill match their re-imports
+LEGACY_EMPTY_TEXT = "nan"
+
+
+def _field_text(value: Any) -> str:
+    if value is None or value == LEGACY_EMPTY_TEXT:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return str(value)
+
+
+class RowHasher:
+    """
+    Content digests for one import
+    Data Structure: Counter of base digests - identical rows get ordinals 0, 1, 2...
+    so a file's rows hash the same way every time it is imported
+    """
+
+    def __init__(self, fields: Sequence[str]):
+        self.fields = fields
+        self._seen: Counter = Counter()
+
+    def __call__(self, row: Dict[str, Any]) -> str:
+        content = "\x1f".join(_field_text(row.get(field)) for field in self.fields)
+        base = hashlib.blake2b(content.encode(), digest_size=16).digest()
+        ordinal = self._seen[base]
+        self._seen[base] += 1
+        if ordinal == 0:
+            return base.hex()
+        return hashlib.blake2b(base + ordinal.to_bytes(4, "big"), digest_size=16).hexdigest()
+
+
+def dialect_insert(connection: Connection, table: Table):
+    """INSERT construct with on_conflict_* support for the connection's dialect"""
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(table)
+    if dialect == "sqlite":
+        return sqlite.insert(table)
+    raise ValueError(f"ON CONFLICT upserts are not supported on {dialect}")
+
+
+def insert_new(connection: Connection, table: Table, rows: List[Dict[str, Any]],
+               conflict_key: Sequence[str], returning: Sequence[str] = ("id",)) -> List[Row]:
+    """INSERT ... ON CONFLICT DO NOTHING; returns the `returning` columns of the rows written"""
+    if not rows:
+        return []
+    stmt = dialect_insert(connection, table).on_conflict_do_nothing(index_elements=list(conflict_key))
+    return connection.execute(stmt.returning(*(table.c[name] for name in returning)), rows).all()
+
+
+def _content(row: Any, fields: Sequence[str]) -> Tuple[str, ...]:
+    return tuple(_field_text(row[field]) for field in fields)
+
+
+def find_corrections(connection: Connection, table: Table, rows: List[Dict[str, Any]],
+                     key_fields: Sequence[str], hash_fields: Sequence[str], before_id: int) -> List[Dict[str, Any]]:
+    """
+    Written rows that look like corrections of rows imported earlier (id <= before_id):
+    same key_fields, different hash_fields content - e.g. a sale whose amount was fixed
+    Data Structure: dict of natural key -> set of earlier contents, one lookup per date batch
+    """
+    other_fields = [field for field in hash_fields if field not in key_fields]
+    dates = sorted({row["date"] for row in rows})
+    earlier: Dict[Tuple[str, ...], set] = {}
+    for i in range(0, len(dates), CORRECTION_LOOKUP_SIZE):
+        stmt = select(*(table.c[field] for field in (*key_fields, *other_fields))).where(
+            table.c.id <= before_id, table.c.date.in_(dates[i:i + CORRECTION_LOOKUP_SIZE]))
+        for match in connection.execute(stmt).mappings():
+            earlier.setdefault(_content(match, key_fields), set()).add(_content(match, other_fields))
+    corrections = []
+    for row in rows:
+        contents = earlier.get(_content(row, key_fields))
+        if contents and _content(row, other_fields) not in contents:
+            corrections.append(row)
+    return corrections
+
+
+def correction_warning(row: Dict[str, Any], key_fields: Sequence[str]) -> str:
+    key = ", ".join(f"{field}={_field_text(row.get(field)) or '-'}" for field in key_fields)
+    return f"Possible correction ({key}): differs from an earlier import, kept as a new row"
+
+
+def upsert_customers(connection: Connection, rows: List[Dict[str, Any]]) -> int:
+    """Insert new customers and update changed ones; returns how many rows were written"""
+    # One statement may not touch a row twice (PostgreSQL) - the last occurrence of an id wins
+    latest = list({row["id"]: row for row in rows}.values())
+    if not latest:
+        return 0
+    table = Customer.__table__
+    stmt = dialect_insert(connection, table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={field: stmt.excluded[field] for field in CUSTOMER_UPDATE_FIELDS},
+        where=or_(*(table.c[field].is_distinct_from(stmt.excluded[field]) for field in CUSTOMER_UPDATE_FIELDS)),
+    )
+    return len(connection.execute(stmt.returning(table.c.id), latest).all())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Import Ledger Benchmark
+Re-sends of a sales export through DataProcessor: row-level dedupe alone
+(process_csv_content - every row is parsed, hashed and probed) against the import
+ledger (import_csv), for an identical re-upload and for a re-export that adds
+one day and corrects another.
+
+Usage: python benchmarks/import_ledger.py [--rows 200000] [--days 365]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='ledger-'), 'sales.db')}"
+os.environ["QUERY_INSTRUMENTATION"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete  # noqa: E402
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.models.analytics import ImportChunk, ImportFile, Sale  # noqa: E402
+from app.services.data_processor import DataProcessor  # noqa: E402
+
+HEADER = "date,product_name,amount,customer_id,category"
+
+
+def export(rows: int, days: int, seed: int = 42):
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    return [f"{start + timedelta(days=i * days // rows)},Product {rng.randrange(200)},"
+            f"{rng.randrange(100, 20_000) / 100:.2f},CUST{rng.randrange(20_000):05d},Bench"
+            for i in range(rows)]
+
+
+def timed(use_ledger: bool, lines):
+    db = SessionLocal()
+    try:
+        processor = DataProcessor(db, source="benchmark")
+        content = "\n".join([HEADER] + lines)
+        started = time.perf_counter()
+        if use_ledger:
+            written, errors = processor.import_csv(content, "benchmark")
+        else:
+            written, errors = processor.process_csv_content(content)
+        assert not errors, errors[:3]
+        return time.perf_counter() - started, written
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    lines = export(args.rows, args.days)
+    # Re-export: one extra day appended, one row of the first day corrected
+    next_day = date(2024, 1, 1) + timedelta(days=args.days)
+    per_day = max(args.rows // args.days, 1)
+    changed = [lines[0].replace(",Bench", ",Corrected")] + lines[1:] + [
+        f"{next_day},Product 1,9.99,CUST00001,Bench" for _ in range(per_day)]
+
+    print(f"{args.rows:,} rows over {args.days} days\n")
+    print(f"{'path':<22} {'first s':>8} {'identical s':>12} {'re-export s':>12} {'written':>8}")
+    for use_ledger in (False, True):
+        with engine.begin() as conn:
+            for model in (ImportChunk, ImportFile, Sale):
+                conn.execute(delete(model))
+        first, _ = timed(use_ledger, lines)
+        identical, _ = timed(use_ledger, lines)
+        reexport, written = timed(use_ledger, changed)
+        name = "import ledger" if use_ledger else "row dedupe only"
+        print(f"{name:<22} {first:>8.2f} {identical:>12.3f} {reexport:>12.3f} {written:>8,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+List Read Path Benchmark
+Fetch + serialize of one large sales listing three ways: ORM instances copied into
+SaleResponse models, ORM column-tuple queries, and RowReader.list_rows (Core select
+on the session's connection) feeding rows_to_records and orjson.
+
+Usage: python benchmarks/list_read_path.py [--rows 100000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='read-path-'), 'sales.db')}"
+os.environ["QUERY_INSTRUMENTATION"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import desc, insert  # noqa: E402
+from typing import List  # noqa: E402
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.core.serialization import dumps, rows_to_records, select_columns  # noqa: E402
+from app.models.analytics import Sale  # noqa: E402
+from app.models.schemas import SaleResponse  # noqa: E402
+from app.services.sales_service import SALE_RESPONSE_COLUMNS, SalesService  # noqa: E402
+
+SALE_LIST = TypeAdapter(List[SaleResponse])
+
+
+def seed(rows: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        for offset in range(0, rows, 50_000):
+            conn.execute(insert(Sale), [
+                {
+                    "date": now - timedelta(minutes=rng.randrange(525_600)),
+                    "product_name": f"Product {rng.randrange(200)}",
+                    "amount_cents": rng.randrange(100, 20_000),
+                    "customer_id": f"CUST{rng.randrange(20_000):05d}" if rng.random() < 0.6 else None,
+                    "category": "Bench",
+                    "created_at": now,
+                }
+                for _ in range(min(50_000, rows - offset))
+            ])
+
+
+def orm_models(db, limit):
+    sales = db.query(Sale).order_by(desc(Sale.date)).limit(limit).all()
+    models = [SaleResponse(id=sale.id, date=sale.date, product_name=sale.product_name, amount=sale.amount_cents / 100,
+                           customer_id=sale.customer_id, category=sale.category, created_at=sale.created_at)
+              for sale in sales]
+    return SALE_LIST.dump_json(models), len(db.identity_map)
+
+
+def orm_tuples(db, limit):
+    rows = db.query(*select_columns(SALE_RESPONSE_COLUMNS)).order_by(desc(Sale.date)).limit(limit).all()
+    return dumps(rows_to_records(SALE_RESPONSE_COLUMNS, rows)), len(db.identity_map)
+
+
+def list_rows(db, limit):
+    rows = SalesService(db).get_sales(limit=limit, columns=SALE_RESPONSE_COLUMNS)
+    return dumps(rows_to_records(SALE_RESPONSE_COLUMNS, rows)), len(db.identity_map)
+
+
+# Each path returns (JSON body, identity map size while its rows are alive)
+PATHS = {"ORM + pydantic": orm_models, "ORM column tuples": orm_tuples, "list_rows (Core)": list_rows}
+
+
+def measure(path, limit: int, repeat: int):
+    """Best wall time over `repeat` fresh sessions, then peak traced memory of one run"""
+    best = float("inf")
+    for _ in range(repeat):
+        db = SessionLocal()
+        started = time.perf_counter()
+        body, identity_map = path(db, limit)
+        best = min(best, time.perf_counter() - started)
+        db.close()
+
+    db = SessionLocal()
+    tracemalloc.start()
+    path(db, limit)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    db.close()
+    return best, peak, identity_map, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    seed(args.rows)
+    print(f"{args.rows:,} sales, one listing of all rows\n")
+    print(f"{'path':<20} {'ms':>8} {'rows/s':>11} {'peak MB':>8} {'identity map':>13} {'body MB':>8}")
+    baseline = None
+    for name, path in PATHS.items():
+        seconds, peak, identity_map, body = measure(path, args.rows, args.repeat)
+        baseline = baseline or seconds
+        print(f"{name:<20} {seconds * 1000:>8.0f} {args.rows / seconds:>11,.0f} {peak / 1e6:>8.1f} "
+              f"{identity_map:>13,} {body / 1e6:>8.1f}   {baseline / seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Dashboard Load Test
+Fires concurrent KPI-summary requests at the app in-process and reports
+p50/p95/p99 latency for them and for /health probes sent alongside.
+
+The async handler (AsyncSession) is compared with the pre-async behaviour -
+an `async def` handler running the same queries on the sync session, which
+blocks the event loop for the duration of every query.
+
+Usage: python benchmarks/load_test_dashboard.py [--sales 200000] [--rate 4] [--probe-rate 20] [--duration 30]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="dashboard-load-"), "load.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from app.main import app  # noqa: E402
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.models.analytics import Product, Sale  # noqa: E402
+from app.services.analytics import AnalyticsService  # noqa: E402
+
+
+@app.get("/bench/blocking-summary")
+async def blocking_summary(days_back: int = 30):
+    """Baseline: sync session queries inside an async handler"""
+    db = SessionLocal()
+    try:
+        return AnalyticsService(db).generate_kpi_summary(days_back)
+    finally:
+        db.close()
+
+
+def seed(sales: int) -> None:
+    Base.metadata.create_all(bind=engine)  # the app no longer creates tables on import
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(Product), [{"id": i + 1, "name": f"Product {i}"} for i in range(200)])
+        for offset in range(0, sales, 50_000):
+            conn.execute(insert(Sale), [
+                {
+                    "date": now - timedelta(minutes=rng.randrange(365 * 24 * 60)),
+                    "product_name": f"Product {product}",
+                    "product_id": product + 1,
+                    "amount_cents": rng.randrange(100, 20_000),
+                    "customer_id": f"CUST{rng.randrange(sales // 5):06d}",
+                    "category": "Bench",
+                    "created_at": now
+                }
+                for product in (rng.randrange(200) for _ in range(min(50_000, sales - offset)))
+            ])
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return f"p50 {pick(0.50):8.1f} ms  p95 {pick(0.95):8.1f} ms  p99 {pick(0.99):8.1f} ms"
+
+
+async def run(path: str, rate: float, duration: float, probe_rate: float):
+    """
+    Open-loop load: requests arrive on a fixed schedule whether or not earlier
+    ones finished, and latency is measured from the scheduled arrival - so time
+    spent waiting on a blocked event loop is counted
+    """
+    dashboard, health = [], []
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        loop_start = time.perf_counter()
+
+        async def timed(arrival, url, bucket):
+            await asyncio.sleep(max(0.0, loop_start + arrival - time.perf_counter()))
+            response = await client.get(url)
+            response.raise_for_status()
+            bucket.append(time.perf_counter() - (loop_start + arrival))
+
+        # Distinct windows so every request does real work
+        tasks = [timed(i / rate, f"{path}?days_back={1 + i % 365}", dashboard)
+                 for i in range(int(duration * rate))]
+        tasks += [timed(i / probe_rate, "/health", health) for i in range(int(duration * probe_rate))]
+        await asyncio.gather(*tasks)
+
+    print(f"  summary  {percentiles(dashboard)}")
+    print(f"  /health  {percentiles(health)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sales", type=int, default=200_000)
+    parser.add_argument("--rate", type=float, default=4.0, help="summary requests per second")
+    parser.add_argument("--probe-rate", type=float, default=20.0, help="/health requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load per run")
+    args = parser.parse_args()
+
+    print(f"Seeding {args.sales:,} sales into {DB_PATH}")
+    seed(args.sales)
+
+    for label, path in (("sync session in async handler (before)", "/bench/blocking-summary"),
+                        ("AsyncSession (after)", "/api/v1/kpis/summary")):
+        print(f"\n{label}: {args.rate:g} summaries/s + {args.probe_rate:g} probes/s for {args.duration:g}s")
+        asyncio.run(run(path, args.rate, args.duration, args.probe_rate))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Pagination Depth Benchmark
+Per-page latency of OFFSET pagination vs keyset (cursor) pagination for the
+sales listing at increasing page depths.
+
+Usage: python benchmarks/pagination_depth.py [--sales 1100000] [--limit 100] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="pagination-"), "pagination.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["QUERY_INSTRUMENTATION"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.core.pagination import encode_cursor  # noqa: E402
+from app.models.analytics import Sale  # noqa: E402
+from app.services.sales_service import SalesService  # noqa: E402
+
+
+def seed(sales: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        for offset in range(0, sales, 100_000):
+            conn.execute(insert(Sale), [
+                {
+                    # Minute resolution, so many sales share a timestamp and the id tiebreak matters
+                    "date": now - timedelta(minutes=rng.randrange(3 * 365 * 24 * 60)),
+                    "product_name": "Coffee",
+                    "amount_cents": rng.randrange(100, 20_000),
+                }
+                for _ in range(min(100_000, sales - offset))
+            ])
+
+
+def median_ms(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sales", type=int, default=1_100_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"Seeding {args.sales:,} sales into {DB_PATH}")
+    seed(args.sales)
+
+    db = SessionLocal()
+    service = SalesService(db)
+    print(f"\n{'page':>7} {'OFFSET':>12} {'keyset':>12}")
+    for page in (1, 10, 100, 1_000, 10_000):
+        skip = (page - 1) * args.limit
+        if skip >= args.sales:
+            break
+        # Cursor for this page = key of the previous page's last row (found once, untimed)
+        cursor = None
+        if skip:
+            last = db.query(Sale).order_by(Sale.date.desc(), Sale.id.desc()).offset(skip - 1).first()
+            cursor = encode_cursor([last.date, last.id])
+
+        offset_ms = median_ms(lambda: service.get_sales(skip=skip, limit=args.limit), args.repeat)
+        keyset_ms = median_ms(lambda: service.get_sales_page(limit=args.limit, cursor=cursor), args.repeat)
+
+        # Both strategies must return the same rows
+        offset_ids = [sale.id for sale in db.query(Sale).order_by(Sale.date.desc(), Sale.id.desc())
+                      .offset(skip).limit(args.limit)]
+        assert [sale.id for sale in service.get_sales_page(limit=args.limit, cursor=cursor)[0]] == offset_ids
+        print(f"{page:>7,} {offset_ms:>9.2f} ms {keyset_ms:>9.2f} ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Re-import Deduplication Benchmark
+Imports a sales export, then a second export overlapping it (the daily POS
+re-export), through DataProcessor with dedupe on (INSERT ... ON CONFLICT DO
+NOTHING on (date, row_hash)) and off (blind bulk insert): time, rows written and
+the revenue the table ends up with.
+
+Usage: python benchmarks/reimport_dedup.py [--rows 200000] [--overlap 0.9]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='reimport-'), 'sales.db')}"
+os.environ["QUERY_INSTRUMENTATION"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, func, select  # noqa: E402
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.models.analytics import Sale  # noqa: E402
+from app.services.data_processor import DataProcessor  # noqa: E402
+from app.services.dimensions import category_dimension, product_dimension  # noqa: E402
+
+HEADER = "date,product_name,amount,customer_id,category"
+
+
+def export_lines(rows: int, seed: int = 42):
+    """Daily-sorted export lines; a re-export repeats the tail of the previous one"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    lines = []
+    for i in range(rows):
+        day = start + timedelta(days=i * 365 // rows)
+        customer = f"CUST{rng.randrange(20_000):05d}" if rng.random() < 0.6 else ""
+        lines.append(f"{day:%Y-%m-%d},Product {rng.randrange(200)},{rng.randrange(100, 20_000) / 100:.2f},"
+                     f"{customer},Bench")
+    return lines
+
+
+def run_import(lines, dedupe: bool):
+    db = SessionLocal()
+    try:
+        processor = DataProcessor(db, source="benchmark", dedupe=dedupe)
+        started = time.perf_counter()
+        written, errors = processor.process_csv_content("\n".join([HEADER] + lines))
+        assert not errors, errors[:3]
+        return time.perf_counter() - started, written
+    finally:
+        db.close()
+
+
+def table_totals():
+    with engine.connect() as conn:
+        return conn.execute(select(func.count(Sale.id), func.sum(Sale.amount_cents))).one()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000, help="rows per export")
+    parser.add_argument("--overlap", type=float, default=0.9, help="share of the second export already imported")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    lines = export_lines(args.rows + int(args.rows * (1 - args.overlap)))
+    first, second = lines[:args.rows], lines[-args.rows:]
+    new_rows = len(lines) - args.rows
+    print(f"two exports of {args.rows:,} rows, {args.overlap:.0%} overlap ({new_rows:,} new rows in the second)\n")
+    print(f"{'mode':<10} {'first s':>8} {'re-import s':>12} {'written':>9} {'table rows':>11} {'revenue':>14}")
+
+    for dedupe in (False, True):
+        with engine.begin() as conn:
+            conn.execute(delete(Sale))
+        product_dimension.clear()
+        category_dimension.clear()
+        first_seconds, _ = run_import(first, dedupe)
+        second_seconds, written = run_import(second, dedupe)
+        count, revenue_cents = table_totals()
+        print(f"{'upsert' if dedupe else 'insert':<10} {first_seconds:>8.1f} {second_seconds:>12.1f} "
+              f"{written:>9,} {count:>11,} {revenue_cents / 100:>14,.2f}")
+
+    expected = sum(int(float(line.split(",")[2]) * 100) for line in lines)  # DataProcessor's cents conversion
+    print(f"\nrevenue of the distinct rows: {expected / 100:,.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+List Serialization Benchmark
+Rows/sec for 1,000-row pages of GET /sales/ and GET /expenses/: the previous
+path (ORM objects -> per-row pydantic model -> response_model re-validation ->
+json) against column tuples rendered by orjson.
+
+Usage: python benchmarks/serialization_throughput.py [--rows 50000] [--requests 100]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="serialization-"), "serialization.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["QUERY_INSTRUMENTATION"] = "false"
+os.environ["METRICS_ENABLED"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from fastapi import Depends  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from app.main import app  # noqa: E402
+from app.core.database import Base, engine, get_db  # noqa: E402
+from app.models.analytics import Expense, Sale  # noqa: E402
+from app.models.schemas import ExpenseResponse, SaleResponse  # noqa: E402
+from app.services.expenses_service import ExpensesService  # noqa: E402
+from app.services.sales_service import SalesService  # noqa: E402
+
+
+@app.get("/bench/pydantic-sales", response_model=List[SaleResponse])
+def pydantic_sales(skip: int = 0, limit: int = 1000, db: Session = Depends(get_db)):
+    """Baseline: the list endpoint before the fast path"""
+    return [
+        SaleResponse(id=sale.id, date=sale.date, product_name=sale.product_name, amount=sale.amount_cents / 100,
+                     customer_id=sale.customer_id, category=sale.category, created_at=sale.created_at)
+        for sale in SalesService(db).get_sales(skip=skip, limit=limit)
+    ]
+
+
+@app.get("/bench/pydantic-expenses", response_model=List[ExpenseResponse])
+def pydantic_expenses(skip: int = 0, limit: int = 1000, db: Session = Depends(get_db)):
+    return [
+        ExpenseResponse(id=expense.id, date=expense.date, description=expense.description,
+                        amount=expense.amount_cents / 100, category=expense.category, created_at=expense.created_at)
+        for expense in ExpensesService(db).get_expenses(skip=skip, limit=limit)
+    ]
+
+
+def seed(rows: int) -> None:
+    Base.metadata.create_all(bind=engine)  # the app no longer creates tables on import
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(Sale), [
+            {"date": now - timedelta(minutes=index), "product_name": f"Product {rng.randrange(500)}",
+             "amount_cents": rng.randrange(100, 20_000), "customer_id": f"CUST{rng.randrange(5000):05d}",
+             "category": "Bench", "created_at": now}
+            for index in range(rows)
+        ])
+        conn.execute(insert(Expense), [
+            {"date": now - timedelta(minutes=index), "description": "Supplies",
+             "amount_cents": rng.randrange(100, 20_000), "category": "Bench", "created_at": now}
+            for index in range(rows)
+        ])
+
+
+async def rows_per_second(path: str, requests: int, rows: int) -> float:
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        await client.get(path, params={"limit": 1000})  # warm up
+        started = time.perf_counter()
+        served = 0
+        for index in range(requests):
+            # skip > 0 so both paths run the same OFFSET query
+            response = await client.get(path, params={"limit": 1000, "skip": 1 + (index * 1000) % (rows - 1000)})
+            response.raise_for_status()
+            served += len(response.json())
+        return served / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"Seeding {args.rows:,} sales and expenses into {DB_PATH}")
+    seed(args.rows)
+
+    print(f"\n{'endpoint':<12} {'pydantic':>14} {'tuples+orjson':>16} {'speedup':>8}")
+    for name, baseline, fast in (("sales", "/bench/pydantic-sales", "/api/v1/sales/"),
+                                 ("expenses", "/bench/pydantic-expenses", "/api/v1/expenses/")):
+        before = asyncio.run(rows_per_second(baseline, args.requests, args.rows))
+        after = asyncio.run(rows_per_second(fast, args.requests, args.rows))
+        print(f"{name:<12} {before:>10,.0f} r/s {after:>12,.0f} r/s {after / before:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Google Sheets Sync Benchmark
+A large sales sheet served by the local fake Sheets API (tests/fake_sheets.py):
+the full import (one values().get, CSV rebuild, pandas parse through the import
+ledger) against the incremental sync (paged values().get, values converted straight
+to column arrays), first for the whole sheet, then after rows are appended.
+
+Usage: python benchmarks/sheets_sync.py [--rows 100000] [--append 1000] [--block-rows 5000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='sheets-'), 'sales.db')}"
+os.environ["QUERY_INSTRUMENTATION"] = "false"
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+sys.path.insert(0, os.path.join(BACKEND, "tests"))
+
+from sqlalchemy import delete, func, select  # noqa: E402
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.models.analytics import ImportChunk, ImportFile, Sale, SheetSyncState  # noqa: E402
+from app.services.sheets_connector import GoogleSheetsConnector  # noqa: E402
+from fake_sheets import FakeSheetsService  # noqa: E402
+
+HEADER = ["date", "product_name", "amount", "customer_id", "category"]
+SHEET = "Sales"
+
+
+def sheet_rows(count: int, first_day: date, seed: int):
+    rng = random.Random(seed)
+    return [[str(first_day + timedelta(days=i * 365 // max(count, 1))), f"Product {rng.randrange(200)}",
+             f"{rng.randrange(100, 20_000) / 100:.2f}",
+             f"CUST{rng.randrange(20_000):05d}" if rng.random() < 0.6 else "", "Bench"]
+            for i in range(count)]
+
+
+def timed(fake, incremental: bool, block_rows: int):
+    db = SessionLocal()
+    try:
+        connector = GoogleSheetsConnector(db, service=fake)
+        calls = len(fake.ranges)
+        started = time.perf_counter()
+        if incremental:
+            written, errors = connector.sync_sheet(fake.spreadsheet_id, SHEET, block_rows=block_rows)
+        else:
+            written, errors = connector.extract_sheet_data(fake.spreadsheet_id, SHEET)
+        assert not errors, errors[:3]
+        return time.perf_counter() - started, written, len(fake.ranges) - calls
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--append", type=int, default=1_000)
+    parser.add_argument("--block-rows", type=int, default=5_000)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    base = sheet_rows(args.rows, date(2024, 1, 1), seed=42)
+    appended = sheet_rows(args.append, date(2025, 1, 1), seed=7)
+    print(f"{args.rows:,}-row sheet, then {args.append:,} rows appended (block {args.block_rows:,} rows)\n")
+    print(f"{'mode':<14} {'first s':>8} {'calls':>6} {'after append s':>15} {'calls':>6} {'written':>8} {'rows':>8}")
+
+    for incremental in (False, True):
+        with engine.begin() as conn:
+            for model in (ImportChunk, ImportFile, SheetSyncState, Sale):
+                conn.execute(delete(model))
+        fake = FakeSheetsService({SHEET: [HEADER] + [list(row) for row in base]})
+        first, _, first_calls = timed(fake, incremental, args.block_rows)
+        fake.sheets[SHEET] += [list(row) for row in appended]
+        second, written, second_calls = timed(fake, incremental, args.block_rows)
+        with engine.connect() as conn:
+            rows = conn.execute(select(func.count(Sale.id))).scalar()
+        print(f"{'incremental' if incremental else 'full (ledger)':<14} {first:>8.2f} {first_calls:>6} "
+              f"{second:>15.3f} {second_calls:>6} {written:>8,} {rows:>8,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Startup Time Benchmark
+Fresh-interpreter cost of `import app.main` and of the lifespan startup, the
+slowest modules by cumulative import time, and a check that upload/export-only
+dependencies (pandas, Google API client, WeasyPrint) are not imported with the app.
+
+Usage: python benchmarks/startup_time.py [--runs 5] [--budget-ms 1500] [--top 15]
+Exits non-zero when the median import exceeds the budget or a lazy module is loaded.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_MODULES = ("pandas", "googleapiclient", "google.oauth2", "weasyprint")
+
+# Runs in the child interpreter: import, then enter/exit the lifespan like a server would
+PROBE = f"""
+import asyncio, json, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+async def cycle():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        return time.perf_counter()
+
+ready = asyncio.run(cycle())
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "lifespan_ms": (ready - imported) * 1000,
+    "lazy_loaded": [name for name in {LAZY_MODULES!r} if name in sys.modules],
+}}))
+"""
+
+
+def child_env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='startup-'), 'startup.db')}")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def probe(env: dict) -> dict:
+    output = subprocess.run([sys.executable, "-c", PROBE], cwd=BACKEND, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def import_profile(env: dict):
+    """(module, self_us, cumulative_us) rows from -X importtime"""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"], cwd=BACKEND,
+                            env=env, capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((module.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500, help="median `import app.main` budget")
+    parser.add_argument("--top", type=int, default=15, help="modules to list by cumulative import time")
+    args = parser.parse_args()
+
+    env = child_env()
+    probe(env)  # warm the OS file cache; bytecode caches are already on disk
+    results = [probe(env) for _ in range(args.runs)]
+    import_ms = statistics.median(result["import_ms"] for result in results)
+    lifespan_ms = statistics.median(result["lifespan_ms"] for result in results)
+
+    print(f"import app.main   median {import_ms:>7.0f} ms  (min {min(r['import_ms'] for r in results):.0f}, "
+          f"max {max(r['import_ms'] for r in results):.0f}, {args.runs} runs)")
+    print(f"lifespan startup  median {lifespan_ms:>7.1f} ms")
+
+    rows = import_profile(env)
+    print(f"\n{'module':<48} {'self ms':>8} {'cumulative ms':>14}")
+    for module, self_us, cumulative_us in sorted(rows, key=lambda row: -row[2])[:args.top]:
+        print(f"{module:<48} {self_us / 1000:>8.1f} {cumulative_us / 1000:>14.1f}")
+
+    lazy_loaded = sorted({name for result in results for name in result["lazy_loaded"]})
+    failures = []
+    if import_ms > args.budget_ms:
+        failures.append(f"import took {import_ms:.0f} ms, budget {args.budget_ms:.0f} ms")
+    if lazy_loaded:
+        failures.append(f"imported at startup: {', '.join(lazy_loaded)}")
+    print("\n" + ("\n".join(f"FAIL: {failure}" for failure in failures) or f"OK: within {args.budget_ms:.0f} ms budget"))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
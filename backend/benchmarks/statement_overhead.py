@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Statement Overhead Microbenchmark
+Per-call Python cost of the hot analytics queries: building the expression,
+computing its cache key, compiling (compiled cache off) and a full execute against
+a tiny table, for an ORM query rebuilt per call (the old path), a Core select
+rebuilt per call, a lambda_stmt, and the prebuilt statement from the registry.
+
+Usage: python benchmarks/statement_overhead.py [--calls 5000] [--rows 100]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='statements-'), 'statements.db')}"
+os.environ["QUERY_INSTRUMENTATION"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import case, func, insert, lambda_stmt, select  # noqa: E402
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.models.analytics import Sale  # noqa: E402
+from app.services.customer_sketches import VIP_THRESHOLD_CENTS  # noqa: E402
+from app.services.statements import sales, statements  # noqa: E402
+
+
+def orm_revenue(db, start, end):
+    return db.query(
+        func.sum(Sale.amount_cents).label('total_cents'),
+        func.count(Sale.id).label('total_sales'),
+        func.avg(Sale.amount_cents).label('avg_cents')
+    ).filter(Sale.date >= start, Sale.date <= end)
+
+
+def core_revenue(start, end):
+    return select(
+        func.sum(sales.c.amount_cents).label("total_cents"),
+        func.count(sales.c.id).label("total_sales"),
+        func.avg(sales.c.amount_cents).label("avg_cents"),
+    ).where(sales.c.date >= start, sales.c.date <= end)
+
+
+def lambda_revenue(start, end):
+    return lambda_stmt(lambda: select(
+        func.sum(sales.c.amount_cents).label("total_cents"),
+        func.count(sales.c.id).label("total_sales"),
+        func.avg(sales.c.amount_cents).label("avg_cents"),
+    ).where(sales.c.date >= start, sales.c.date <= end))
+
+
+def orm_summary(db, start, end):
+    per_customer = db.query(
+        Sale.customer_id, func.count(Sale.id).label('purchase_count'), func.sum(Sale.amount_cents).label('total_spent')
+    ).filter(Sale.customer_id.isnot(None), Sale.date >= start, Sale.date <= end).group_by(Sale.customer_id).subquery()
+    return db.query(
+        func.count().label('total_customers'),
+        func.sum(case((per_customer.c.purchase_count == 1, 1), else_=0)).label('new_customers'),
+        func.sum(case((per_customer.c.purchase_count > 1, 1), else_=0)).label('repeat_customers'),
+        func.sum(case((per_customer.c.total_spent > VIP_THRESHOLD_CENTS, 1), else_=0)).label('vip_customers')
+    ).select_from(per_customer)
+
+
+def seed(rows: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(Sale), [{"date": now - timedelta(hours=i), "product_name": "Coffee", "amount_cents": 450,
+                                     "customer_id": f"C{i % 20}"} for i in range(rows)])
+
+
+def per_call_us(function, calls: int) -> float:
+    for _ in range(min(calls // 10, 200)):  # warm the compiled cache
+        function()
+    started = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--rows", type=int, default=100, help="sales rows, kept small so SQL time stays minor")
+    args = parser.parse_args()
+
+    seed(args.rows)
+    db = SessionLocal()
+    conn = db.connection()
+    dialect = engine.dialect
+    end = datetime.utcnow()
+    start = end - timedelta(days=30)
+    prepared = statements.get("revenue_metrics")
+    params = {"start_date": start, "end_date": end}
+
+    print(f"revenue_metrics, µs per call ({args.calls:,} calls)\n")
+    # Cumulative columns: build, build + cache key, build + uncached compile, full execute (cache on)
+    print(f"{'path':<22} {'build':>8} {'+key':>8} {'+compile':>9} {'execute':>9}")
+    rows = [
+        ("ORM query (old)", lambda: orm_revenue(db, start, end),
+         lambda: orm_revenue(db, start, end).statement, lambda: orm_revenue(db, start, end).first()),
+        ("Core select", lambda: core_revenue(start, end), lambda: core_revenue(start, end),
+         lambda: conn.execute(core_revenue(start, end)).first()),
+        ("lambda_stmt", lambda: lambda_revenue(start, end), lambda: lambda_revenue(start, end),
+         lambda: conn.execute(lambda_revenue(start, end)).first()),
+        ("prepared (registry)", lambda: prepared, lambda: prepared,
+         lambda: statements.execute(db, "revenue_metrics", **params).first()),
+    ]
+    for name, build, statement, execute in rows:
+        build_us = per_call_us(build, args.calls)
+        key_us = per_call_us(lambda: statement()._generate_cache_key(), args.calls)
+        compile_us = per_call_us(lambda: statement().compile(dialect=dialect), max(args.calls // 5, 1))
+        execute_us = per_call_us(execute, args.calls)
+        print(f"{name:<22} {build_us:>8.1f} {key_us:>8.1f} {compile_us:>9.1f} {execute_us:>9.1f}")
+
+    print("\ncustomer_summary (subquery + CASE), execute µs per call")
+    summary_params = dict(params, vip_threshold=VIP_THRESHOLD_CENTS)
+    print(f"{'ORM query (old)':<22} {per_call_us(lambda: orm_summary(db, start, end).first(), args.calls):>9.1f}")
+    print(f"{'prepared (registry)':<22} "
+          f"{per_call_us(lambda: statements.execute(db, 'customer_summary', **summary_params).first(), args.calls):>9.1f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Suggestion Latency Benchmark
+Per-query latency of product autocomplete: ILIKE scan, SQLite FTS5 trigram
+table, and the in-memory trigram index.
+
+Usage: python benchmarks/suggestion_latency.py [--products 100000] [--sales 500000] [--repeat 50]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="suggestions-"), "suggestions.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["QUERY_INSTRUMENTATION"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.models.analytics import Product, Sale  # noqa: E402
+from app.services.suggestions import SuggestionService, create_trigram_indexes, search_database  # noqa: E402
+
+WORDS = ["Iced", "Hot", "Oat", "Vanilla", "Caramel", "Mocha", "Latte", "Cappuccino", "Espresso",
+         "Chai", "Matcha", "Cold", "Brew", "Muffin", "Croissant", "Bagel", "Large", "Small", "Decaf"]
+QUERIES = ["c", "la", "cap", "latte", "ccino", "oat chai", "vanilla la", "zzz"]
+
+
+def seed(products: int, sales: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+    names = sorted({f"{' '.join(rng.sample(WORDS, 3))} #{i}" for i in range(products)})
+    rng.shuffle(names)  # ids (and so popularity below) must not follow alphabetical order
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(Product), [{"name": name} for name in names])
+        # Zipf-like popularity: a few products take most of the sales
+        conn.execute(insert(Sale), [
+            {"date": now - timedelta(minutes=rng.randrange(525_600)), "product_name": "-",
+             "product_id": min(int(rng.paretovariate(1.2)), len(names)), "amount_cents": 500}
+            for _ in range(sales)
+        ])
+        create_trigram_indexes(conn)
+
+
+def median_ms(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--sales", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"Seeding {args.products:,} products / {args.sales:,} sales into {DB_PATH}")
+    seed(args.products, args.sales)
+
+    db = SessionLocal()
+    service = SuggestionService()
+    started = time.perf_counter()
+    service.ensure_loaded(db)
+    print(f"Index load: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    def ilike(query):
+        # search_database's non-FTS branch (also what PostgreSQL runs, there with a GIN index)
+        return db.query(Product.id, Product.name).filter(Product.name.ilike(f"%{query}%")).limit(10).all()
+
+    print(f"\n{'query':>12} {'ILIKE':>11} {'FTS5':>11} {'index':>11}")
+    for query in QUERIES:
+        ilike_ms = median_ms(lambda: ilike(query), max(args.repeat // 10, 3))
+        fts_ms = median_ms(lambda: search_database(db, "products", query), args.repeat)
+        index_ms = median_ms(lambda: service.suggest_products(db, query), args.repeat)
+        print(f"{query!r:>12} {ilike_ms:>8.3f} ms {fts_ms:>8.3f} ms {index_ms:>8.3f} ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
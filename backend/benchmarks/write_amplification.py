@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Write Amplification Benchmark
+Sales insert throughput with the index sets the sales table has carried: the
+initial model plus the perf_001 copies, the same with the covering indexes, and
+the consolidated set after dedupe_001.
+
+Usage: python benchmarks/write_amplification.py [--rows 300000] [--batch 1000] [--single 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='writes-'), 'unused.db')}"
+os.environ["QUERY_INSTRUMENTATION"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from app.core.database import Base, apply_sqlite_pragmas  # noqa: E402
+from app.models.analytics import Product, Sale  # noqa: E402
+
+# Indexes dropped by dedupe_001, as (name, columns)
+DROPPED = [
+    ("idx_sales_date", "date"), ("idx_sales_customer_id", "customer_id"),
+    ("idx_sales_date_customer", "date, customer_id"), ("idx_sales_product_name", "product_name"),
+    ("ix_sales_id", "id"), ("ix_sales_customer_id", "customer_id"),
+]
+COVERING = ["ix_sales_date_product_amount", "ix_sales_customer_date_amount"]
+
+VARIANTS = {
+    # name: (extra indexes to create, model indexes to drop)
+    "model + perf_001": (DROPPED, COVERING),
+    "+ covering": (DROPPED, []),
+    "consolidated": ([], []),
+}
+
+
+def make_engine(variant: str):
+    path = os.path.join(tempfile.mkdtemp(prefix="writes-"), "sales.db")
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(engine, "connect", apply_sqlite_pragmas)  # same WAL/synchronous settings as the app
+    Base.metadata.create_all(bind=engine)
+    extra, dropped = VARIANTS[variant]
+    with engine.begin() as conn:
+        for name in dropped:
+            conn.exec_driver_sql(f"DROP INDEX {name}")
+        for name, columns in extra:
+            conn.exec_driver_sql(f"CREATE INDEX {name} ON sales ({columns})")
+        conn.execute(insert(Product), [{"name": f"Product {i}"} for i in range(1, 201)])
+        count = conn.exec_driver_sql("SELECT count(*) FROM sqlite_master WHERE type = 'index' "
+                                     "AND tbl_name = 'sales'").scalar()
+    return engine, count
+
+
+def sale_rows(rng: random.Random, count: int):
+    now = datetime.utcnow()
+    return [
+        {
+            "date": now - timedelta(minutes=rng.randrange(525_600)),
+            "product_name": f"Product {(product_id := rng.randrange(1, 201))}",
+            "product_id": product_id,
+            "amount_cents": rng.randrange(100, 20_000),
+            "customer_id": f"CUST{rng.randrange(50_000):05d}" if rng.random() < 0.6 else None,
+        }
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=300_000, help="bulk-inserted rows (CSV import path)")
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--single", type=int, default=2000, help="one-commit-per-sale inserts (quick entry)")
+    args = parser.parse_args()
+
+    print(f"{'index set':<18} {'indexes':>7} {'bulk rows/s':>12} {'single rows/s':>14} {'db MB':>7}")
+    for variant in VARIANTS:
+        engine, index_count = make_engine(variant)
+        rng = random.Random(42)
+
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            for offset in range(0, args.rows, args.batch):
+                conn.execute(insert(Sale), sale_rows(rng, min(args.batch, args.rows - offset)))
+        bulk_rate = args.rows / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        with Session(engine) as db:
+            for row in sale_rows(rng, args.single):
+                db.add(Sale(**row))
+                db.commit()
+        single_rate = args.single / (time.perf_counter() - started)
+
+        size_mb = os.path.getsize(engine.url.database) / 1e6
+        print(f"{variant:<18} {index_count:>7} {bulk_rate:>12,.0f} {single_rate:>14,.0f} {size_mb:>7.1f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,39 @@
+import os
 import pytest
+
+# The app's module-level engine and event handlers must see the test database
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
+
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+import pytest_asyncio
 from fastapi.testclient import TestClient
 from app.main import app
-from app.core.database import Base, get_db
+from app.core.database import (
+    AsyncSessionLocal, Base, async_database_url, get_async_db, get_async_read_db, get_db, get_read_db
+)
+from app.services.dimensions import product_dimension, category_dimension
+from app.services.suggestions import suggestions
+from app.core.cache import cache, invalidate_daily_rollups
 
 # Test database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async handlers hit the same file; NullPool so no connection outlives a test's event loop
+async_engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+
 @pytest.fixture(scope="function")
 def db_session():
+    # In-process caches hold ids/partials from the previous test's database
+    product_dimension.clear()
+    category_dimension.clear()
+    suggestions.clear()
+    invalidate_daily_rollups()
+    cache.clear()
     Base.metadata.create_all(bind=engine)
     db = TestingSessionLocal()
     try:
@@ -29,7 +51,24 @@ def client(db_session):
             db_session.rollback()
             raise
     
+    async def override_get_async_db():
+        async with AsyncSessionLocal(bind=async_engine) as db:
+            yield db
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
     with TestClient(app) as c:
         yield c
-    app.dependency_overrides.clear()
\ No newline at end of file
+    app.dependency_overrides.clear()
+
+@pytest_asyncio.fixture(scope="function")
+async def async_db_session(db_session):
+    async with AsyncSessionLocal(bind=async_engine) as db:
+        yield db
+
+@pytest.fixture(scope="function")
+def async_session_factory(db_session):
+    """Per-event session factory for SessionScopedHandlers, on the test database"""
+    return lambda: AsyncSessionLocal(bind=async_engine)
@@ -0,0 +1,87 @@
+"""
+Local fake of the Google Sheets v4 client (googleapiclient's `build('sheets', 'v4')`)
+Covers spreadsheets().get and spreadsheets().values().get with A1 row/cell ranges,
+trimming trailing empty cells and rows and omitting `values` for an empty range,
+as the real API does. `ranges` records every values().get call.
+"""
+import re
+from typing import Dict, List, Optional
+
+A1_RANGE = re.compile(r"^(?:'(?P<quoted>(?:[^']|'')+)'|(?P<plain>[^!]+))(?:!(?P<cells>.+))?$")
+A1_BOUND = re.compile(r"^(?P<column>[A-Z]*)(?P<row>\d*)$")
+
+
+class FakeRequest:
+    def __init__(self, result):
+        self._result = result
+
+    def execute(self):
+        if isinstance(self._result, Exception):
+            raise self._result
+        return self._result
+
+
+class FakeSheetsService:
+    def __init__(self, sheets: Dict[str, List[List[str]]], spreadsheet_id: str = "fake-sheet", title: str = "Fake"):
+        self.spreadsheet_id = spreadsheet_id
+        self.title = title
+        self.sheets = sheets
+        self.ranges: List[str] = []
+
+    # Client surface
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    def get(self, spreadsheetId: str, range: Optional[str] = None):
+        if spreadsheetId != self.spreadsheet_id:
+            return FakeRequest(Exception(f"Requested entity was not found: {spreadsheetId}"))
+        if range is None:
+            return FakeRequest({
+                'properties': {'title': self.title},
+                'sheets': [{'properties': {'title': name}} for name in self.sheets],
+            })
+        self.ranges.append(range)
+        return FakeRequest(self._values(range))
+
+    # Range evaluation
+    def _values(self, range_name: str):
+        match = A1_RANGE.match(range_name)
+        sheet = match.group('quoted').replace("''", "'") if match.group('quoted') else match.group('plain')
+        if sheet not in self.sheets:
+            return Exception(f"Unable to parse range: {range_name}")
+        rows = self.sheets[sheet]
+        first_row, last_row, first_column, last_column = 1, len(rows), 0, None
+        if match.group('cells'):
+            start, _, end = match.group('cells').partition(':')
+            first_row, first_column = self._bound(start, 1, 0)
+            last_row, last_column = self._bound(end or start, len(rows), None)
+        values = [self._trim(row[first_column:None if last_column is None else last_column + 1])
+                  for row in rows[first_row - 1:last_row]]
+        while values and not values[-1]:
+            values.pop()
+        result = {'range': range_name, 'majorDimension': 'ROWS'}
+        if values:
+            result['values'] = values
+        return result
+
+    @staticmethod
+    def _bound(bound: str, default_row: int, default_column: Optional[int]):
+        parts = A1_BOUND.match(bound)
+        row = int(parts.group('row')) if parts.group('row') else default_row
+        column = default_column
+        if parts.group('column'):
+            column = 0
+            for letter in parts.group('column'):
+                column = column * 26 + ord(letter) - ord('A') + 1
+            column -= 1
+        return row, column
+
+    @staticmethod
+    def _trim(row: List[str]) -> List[str]:
+        row = [str(cell) for cell in row]
+        while row and row[-1] == '':
+            row.pop()
+        return row
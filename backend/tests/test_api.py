@@ -1,5 +1,6 @@
 import pytest
 from datetime import datetime
+from fastapi.testclient import TestClient
 from app.models.analytics import Sale, Customer, Expense
 
 class TestDashboardAPI:
@@ -121,6 +122,19 @@ class TestDataEntryAPI:
         assert len(data) == 2
         assert "Widget A" in data
         assert "Widget B" in data
+    
+    def test_suggestions_ranked_by_popularity(self, client, db_session):
+        """Test that suggestions follow quick-sale events and rank best sellers first"""
+        db_session.add(Sale(product_name="Widget A", amount_cents=5000, date=datetime.utcnow()))
+        db_session.commit()
+        assert client.get("/api/v1/entry/suggestions/products?query=wid").json() == ["Widget A"]
+        
+        for _ in range(2):
+            client.post("/api/v1/entry/quick-sale", json={"product_name": "Widget B", "amount": 10})
+        
+        response = client.get("/api/v1/entry/suggestions/products?query=widget&limit=1")
+        assert response.json() == ["Widget B"]
+        assert client.get("/api/v1/entry/suggestions/products?limit=100").status_code == 422
 
 class TestSalesAPI:
     
@@ -155,6 +169,87 @@ class TestSalesAPI:
         assert isinstance(data, list)
         assert len(data) == 1
         assert data[0]["product_name"] == "Test Product"
+    
+    def test_get_sales_cursor_pages(self, client, db_session):
+        """Test keyset paging via the X-Next-Cursor header"""
+        db_session.add_all([Sale(product_name=f"Product {day}", amount_cents=100, date=datetime(2024, 1, day))
+                            for day in range(1, 4)])
+        db_session.commit()
+        
+        first = client.get("/api/v1/sales/?limit=2")
+        second = client.get(f"/api/v1/sales/?limit=2&cursor={first.headers['X-Next-Cursor']}")
+        
+        assert [sale["product_name"] for sale in first.json()] == ["Product 3", "Product 2"]
+        assert [sale["product_name"] for sale in second.json()] == ["Product 1"]
+        assert "X-Next-Cursor" not in second.headers
+        assert client.get("/api/v1/sales/?cursor=garbage").status_code == 422
+        assert client.get("/api/v1/sales/?skip=1&cursor=abc").status_code == 400
+    
+    def test_sales_list_schema_documented(self, client):
+        """Test that the orjson fast path keeps SaleResponse in the OpenAPI schema"""
+        schema = client.get("/openapi.json").json()
+        
+        items = schema["paths"]["/api/v1/sales/"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert items["items"]["$ref"].endswith("/SaleResponse")
+
+class TestExportAPI:
+    
+    def test_export_sales_ndjson_gzip(self, client, db_session):
+        """Test streamed export with transparent gzip"""
+        db_session.add_all([Sale(product_name="Coffee", amount_cents=450, date=datetime(2024, 1, day))
+                            for day in range(1, 4)])
+        db_session.commit()
+        
+        response = client.get("/api/v1/export/sales?start_date=2024-01-02T00:00:00",
+                              headers={"Accept-Encoding": "gzip"})
+        
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert len(response.text.splitlines()) == 2
+    
+    def test_export_expenses_csv(self, client, db_session):
+        response = client.get("/api/v1/export/expenses?format=csv", headers={"Accept-Encoding": "identity"})
+        
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+        assert response.text == "id,date,description,amount,category,created_at\n"
+        assert client.get("/api/v1/export/sales?format=xml").status_code == 422
+
+class TestUploadAPI:
+    
+    def test_reupload_answered_from_import_ledger(self, client, db_session):
+        """Test that an identical file is not reprocessed and dedupe=false bypasses the ledger"""
+        csv_file = ("sales.csv", b"date,product_name,amount\n2024-01-15,Coffee,4.50\n", "text/csv")
+        
+        first = client.post("/api/v1/upload/csv", files={"file": csv_file}).json()
+        again = client.post("/api/v1/upload/csv", files={"file": csv_file}).json()
+        blind = client.post("/api/v1/upload/csv?dedupe=false", files={"file": csv_file}).json()
+        
+        assert (first["records_processed"], first["already_imported"]) == (1, False)
+        assert (again["records_processed"], again["already_imported"]) == (0, True)
+        assert blind["records_processed"] == 1
+        assert db_session.query(Sale).count() == 2
+    
+    def test_upload_again_after_clear_data(self, client, db_session):
+        """Test that clear-data also forgets the import ledger, so the same file imports again"""
+        csv_file = ("sales.csv", b"date,product_name,amount\n2024-01-15,Coffee,4.50\n", "text/csv")
+        
+        assert client.post("/api/v1/upload/csv", files={"file": csv_file}).json()["records_processed"] == 1
+        assert client.delete("/api/v1/admin/clear-data?confirm=true").status_code == 200
+        again = client.post("/api/v1/upload/csv", files={"file": csv_file}).json()
+        
+        assert (again["records_processed"], again["already_imported"]) == (1, False)
+        assert db_session.query(Sale).count() == 1
+    
+    def test_clear_data_empties_suggestions(self, client):
+        """Test that clear-data reloads the suggestion index instead of serving deleted names"""
+        csv_file = ("sales.csv", b"date,product_name,amount\n2024-01-15,Coffee,4.50\n", "text/csv")
+        client.post("/api/v1/upload/csv", files={"file": csv_file})
+        
+        assert client.get("/api/v1/entry/suggestions/products?query=cof").json() == ["Coffee"]
+        client.delete("/api/v1/admin/clear-data?confirm=true")
+        assert client.get("/api/v1/entry/suggestions/products?query=cof").json() == []
 
 class TestHealthCheck:
     
@@ -172,4 +267,85 @@ class TestHealthCheck:
         
         assert response.status_code == 200
         data = response.json()
-        assert data["status"] == "healthy"
\ No newline at end of file
+        assert data["status"] == "healthy"
+    
+    def test_system_status(self, client):
+        """Test the admin status poll (estimated counts, no raw-string SQL)"""
+        response = client.get("/api/v1/admin/system-status")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "healthy"
+        assert data["total_sales_records"] == 0
+        assert data["tables"]["sales"]["estimate_source"] == "count"
+    
+    def test_partitions_status(self, client):
+        """Test partition status on a database without partitioning"""
+        response = client.get("/api/v1/admin/partitions?start_date=2024-01-01T00:00:00&end_date=2024-02-01T00:00:00")
+        
+        assert response.status_code == 200
+        assert response.json() == {"supported": False, "partitioned": False, "partitions": [], "pruned_to": []}
+        assert client.post("/api/v1/admin/partitions/maintain").json()["created"] == []
+    
+    def test_db_pool_stats(self, client):
+        """Test pool metrics endpoint"""
+        response = client.get("/api/v1/admin/db-pools")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert "write" in data["pools"]
+        assert data["pools"]["write"]["checkouts"] >= 0
+    
+    def test_query_instrumentation_headers(self, client, db_session):
+        """Test Server-Timing headers and the query stats endpoint"""
+        response = client.get("/api/v1/dashboard/customer-analytics")
+        
+        assert response.status_code == 200
+        assert response.headers["Server-Timing"].startswith("db;dur=")
+        assert int(response.headers["X-DB-Query-Count"]) >= 1
+        
+        stats = client.get("/api/v1/admin/query-stats").json()
+        endpoints = [entry["endpoint"] for entry in stats["endpoints"]]
+        assert "GET /api/v1/dashboard/customer-analytics" in endpoints
+    
+    def test_prometheus_metrics(self, client, db_session):
+        """Test the /metrics exposition after a routed request"""
+        client.get("/api/v1/dashboard/customer-analytics")
+        response = client.get("/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/dashboard/customer-analytics",status="200"}' in body
+        assert "db_query_duration_seconds_bucket" in body
+        assert 'cache_hits_total{cache="memory"}' in body
+        assert "db_pool_checkouts_total" in body
+        assert "process_resident_memory_bytes" in body
+
+
+class TestStartup:
+    
+    def test_import_is_side_effect_free(self, tmp_path):
+        """Importing the app creates no tables and does not load pandas"""
+        import json, os, subprocess, sys
+        database = tmp_path / "startup.db"
+        probe = ("import json, sys, app.main; "
+                 "print(json.dumps({'pandas': 'pandas' in sys.modules}))")
+        env = {**os.environ, "DATABASE_URL": f"sqlite:///{database}"}
+        output = subprocess.run([sys.executable, "-c", probe], cwd=os.path.dirname(os.path.dirname(__file__)),
+                                env=env, capture_output=True, text=True, check=True).stdout
+        
+        assert json.loads(output.strip().splitlines()[-1]) == {"pandas": False}
+        assert not database.exists() or database.stat().st_size == 0
+    
+    def test_lifespan_unsubscribes_handler(self, client):
+        """The KPI handler is subscribed while the app runs and removed on shutdown"""
+        from app.core.events import EventType, event_bus
+        from app.main import app
+        
+        assert any(getattr(handler, "__name__", "") == "handle_sales_change"
+                   for handler in event_bus._handlers[EventType.SALE_CREATED])
+        before = len(event_bus._handlers[EventType.SALE_CREATED])
+        with TestClient(app):
+            assert len(event_bus._handlers[EventType.SALE_CREATED]) == before + 1
+        assert len(event_bus._handlers[EventType.SALE_CREATED]) == before
@@ -7,10 +7,10 @@ from app.services.analytics_event_handler import AnalyticsEventHandler
 class TestEventIntegration:
     
     @pytest.mark.asyncio
-    async def test_sale_creation_triggers_kpi_recalculation(self, db_session):
+    async def test_sale_creation_triggers_kpi_recalculation(self, db_session, async_session_factory):
         """Test that creating a sale triggers KPI recalculation"""
         # Setup event handler
-        analytics_handler = AnalyticsEventHandler(db_session)
+        analytics_handler = AnalyticsEventHandler(async_session_factory)
         
         # Track KPI events
         kpi_events = []
@@ -33,12 +33,13 @@ class TestEventIntegration:
         # Verify KPI event was emitted
         assert len(kpi_events) > 0
         assert kpi_events[0].event_type == EventType.KPI_CALCULATED
+        analytics_handler.close()
     
     @pytest.mark.asyncio
-    async def test_end_to_end_data_flow(self, db_session):
+    async def test_end_to_end_data_flow(self, db_session, async_session_factory):
         """Test complete data flow from entry to analytics"""
         # Setup analytics handler
-        analytics_handler = AnalyticsEventHandler(db_session)
+        analytics_handler = AnalyticsEventHandler(async_session_factory)
         
         # Track all events
         all_events = []
@@ -80,6 +81,7 @@ class TestEventIntegration:
         top_products = kpi_service.get_top_products(2)
         assert len(top_products) == 2
         assert top_products[0]["product_name"] == "Product A"  # Higher total revenue
+        analytics_handler.close()
 
 class TestAPIIntegration:
     
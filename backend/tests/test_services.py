@@ -1,9 +1,65 @@
+import asyncio
 import pytest
-from datetime import datetime
+import sys
+from types import SimpleNamespace
+from sqlalchemy.exc import OperationalError
+from datetime import date, datetime, timedelta
 from app.services.sales_service import SalesService
 from app.services.customers_service_v2 import CustomersService
 from app.services.kpi_service import KPIService
-from app.models.analytics import Sale, Customer, Expense
+from app.services.top_products import TopProductsService, product_partials
+from app.models.analytics import Sale, Customer, Expense, Product, Category
+from app.services.dimensions import product_dimension
+from app.services.customer_sketches import CustomerSketch
+from app.services.analytics import AnalyticsService
+from app.core.config import settings
+from app.services.period_comparison import PeriodComparisonService, covering_ranges, month_period, shift_years
+from sqlalchemy import event, func, select
+from app.services.columnar_store import ColumnarSalesStore
+from app.core.events import Event, EventBus, EventType
+from app.services.sales_service import AsyncSalesService
+from app.services.analytics import AsyncAnalyticsService
+from app.services.kpi_service import AsyncKPIService
+from app.core.database import (
+    Base, PoolMetrics, ReadOnlySession, apply_sqlite_pragmas, async_database_url, is_sqlite_memory, reads_replica
+)
+from app.core.exceptions import DatabaseError, ValidationError
+from app.core.instrumentation import QueryRegistry, bind_shape, normalize_sql, query_registry, start_request
+from app.core.write_queue import WriteQueue
+from app.core.metrics import MetricsRegistry, event_publish_duration, process_rss_bytes
+from app.core.cache import MemoryCache, DailyRollupCache, _daily_rollups, contiguous_runs
+from app.core.pagination import decode_cursor, encode_cursor
+from app.services.expenses_service import ExpensesService
+from app.services.export_service import ExportService, gzip_stream
+from app.core import serialization
+from app.models.schemas import SaleResponse
+from app.services.sales_service import SALE_RESPONSE_COLUMNS
+from app.services.customers_service import CUSTOMER_RESPONSE_COLUMNS, CustomersService as CustomersServiceV1
+from app.core.partitioning import (
+    DEFAULT_PARTITION, SALES_COLUMNS, SALES_INDEXES, SALES_UNIQUE_INDEXES, add_months, ensure_upcoming_partitions,
+    is_partitioned, month_range, partition_ddl, partition_name, partitions_for_window
+)
+from app.services.system_status import SystemStatusService, WriteTracker, estimate_row_count, write_tracker
+from app.services import suggestions as suggestions_module
+from app.services.suggestions import (
+    SuggestionIndex, SuggestionService, create_trigram_indexes, drop_trigram_indexes, search_database
+)
+from app.services.index_advisor import IndexAdvisor, analytics_workload, summarize_plan
+from app.services.statements import StatementRegistry, statements
+from io import BytesIO
+from fastapi import UploadFile
+from app.services.csv_upload_service import CSVUploadService
+from app.services.data_processor import DataProcessor, parse_amount_cents
+from app.services.upserts import SALE_CONFLICT_KEY, SALE_HASH_FIELDS, RowHasher, dialect_insert, insert_new
+from app.services.import_ledger import ImportLedger
+from app.models.analytics import ImportChunk, ImportFile, SheetSyncState
+from app.services.sheets_connector import GoogleSheetsConnector
+from fake_sheets import FakeSheetsService
+from app.core.event_handlers import SessionScopedHandlers, event_handler_checkout_wait, event_handler_errors
+import gzip
+import json
+import threading
+from sqlalchemy import create_engine, text
 
 class TestSalesService:
     
@@ -142,4 +198,1329 @@ class TestKPIService:
         assert "top_products" in kpis
         assert "total_customers" in kpis
         assert kpis["revenue"] == 100.00
-        assert kpis["total_customers"] == 1
\ No newline at end of file
+        assert kpis["total_customers"] == 1
+
+class TestTopProductsService:
+    
+    def test_merges_cached_days_with_live_edges(self, db_session):
+        """Test top-K over a window mixing cached closed days and today"""
+        product_partials.clear()
+        service = TopProductsService(db_session)
+        now = datetime.utcnow()
+        
+        db_session.add_all([
+            Sale(product_name="Product A", amount_cents=1000, date=now - timedelta(days=3)),
+            Sale(product_name="Product B", amount_cents=4000, date=now - timedelta(days=2)),
+            Sale(product_name="Product A", amount_cents=2500, date=now - timedelta(days=1)),
+            Sale(product_name="Product C", amount_cents=500, date=now),
+            Sale(product_name="Product C", amount_cents=500, date=now),
+            Sale(product_name="Product C", amount_cents=500, date=now),
+        ])
+        db_session.commit()
+        
+        start_date = now - timedelta(days=5)
+        top = service.get_top_products(start_date, now, limit=2)
+        
+        assert [p["product_name"] for p in top] == ["Product B", "Product A"]
+        assert top[1]["total_revenue"] == 35.00
+        assert top[1]["sales_count"] == 2
+        assert product_partials.stats()["cached_days"] > 0
+        
+        # Second call is served from partials and returns the same ranking
+        assert service.get_top_products(start_date, now, limit=2) == top
+    
+    def test_reloads_only_missing_runs_of_days(self, db_session):
+        """Test that misses on both sides of cached days load as two runs, not one span over the cached ones"""
+        product_partials.clear()
+        service = TopProductsService(db_session)
+        today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+        db_session.add_all([Sale(product_name="Product A", amount_cents=100 * day, date=today - timedelta(days=day))
+                            for day in range(1, 7)])
+        db_session.commit()
+        window = (today - timedelta(days=6), today - timedelta(microseconds=1))
+        top = service.get_top_products(*window)
+        
+        product_partials.invalidate((today - timedelta(days=6)).date())
+        product_partials.invalidate((today - timedelta(days=1)).date())
+        hits = product_partials.hits
+        request = start_request("/top")
+        assert service.get_top_products(*window) == top
+        
+        assert product_partials.hits - hits == 4
+        assert request.statement_count == 2  # one per run of missing days; names are cached
+        assert contiguous_runs([date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 4)]) == \
+            [(date(2024, 1, 1), date(2024, 1, 2)), (date(2024, 1, 4), date(2024, 1, 4))]
+    
+    def test_rank_by_count(self, db_session):
+        """Test ranking by number of sales instead of revenue"""
+        product_partials.clear()
+        service = TopProductsService(db_session)
+        now = datetime.utcnow()
+        
+        db_session.add_all([
+            Sale(product_name="Expensive", amount_cents=90000, date=now - timedelta(days=1)),
+            Sale(product_name="Popular", amount_cents=100, date=now - timedelta(days=1)),
+            Sale(product_name="Popular", amount_cents=100, date=now - timedelta(days=1)),
+        ])
+        db_session.commit()
+        
+        top = service.get_top_products(now - timedelta(days=2), now, limit=1, rank_by="count")
+        assert top[0]["product_name"] == "Popular"
+        
+        with pytest.raises(ValueError):
+            service.get_top_products(now - timedelta(days=2), now, rank_by="margin")
+    
+    @pytest.mark.asyncio
+    async def test_new_sale_invalidates_cached_day(self, db_session):
+        """Test that creating a sale on a cached day refreshes its partial"""
+        product_partials.clear()
+        service = TopProductsService(db_session)
+        yesterday = datetime.utcnow() - timedelta(days=1)
+        
+        db_session.add(Sale(product_name="Product A", amount_cents=1000, date=yesterday))
+        db_session.commit()
+        window = (yesterday - timedelta(days=2), datetime.utcnow())
+        assert service.get_top_products(*window)[0]["product_name"] == "Product A"
+        
+        await SalesService(db_session).create_sale({
+            "product_name": "Product B", "amount": 50.00, "date": yesterday
+        })
+        
+        assert service.get_top_products(*window)[0]["product_name"] == "Product B"
+
+
+class TestDimensions:
+    
+    def test_sales_resolve_to_shared_surrogate_keys(self, db_session):
+        """Test that product/category names are stored once and referenced by id"""
+        db_session.add_all([
+            Sale(product_name="Coffee", amount_cents=500, category="beverages", date=datetime.utcnow()),
+            Sale(product_name="Coffee", amount_cents=450, category="beverages", date=datetime.utcnow()),
+            Sale(product_name="Bagel", amount_cents=300, date=datetime.utcnow()),
+        ])
+        db_session.commit()
+        
+        sales = db_session.query(Sale).order_by(Sale.id).all()
+        assert sales[0].product_id == sales[1].product_id
+        assert sales[0].product_id != sales[2].product_id
+        assert sales[0].category_id is not None
+        assert sales[2].category_id is None
+        assert db_session.query(Product).count() == 2
+        assert db_session.query(Category).count() == 1
+    
+    def test_rename_moves_sale_to_new_product(self, db_session):
+        """Test that changing product_name re-resolves product_id"""
+        sale = Sale(product_name="Old Name", amount_cents=500, date=datetime.utcnow())
+        db_session.add(sale)
+        db_session.commit()
+        old_id = sale.product_id
+        
+        sale.product_name = "New Name"
+        db_session.commit()
+        
+        assert sale.product_id != old_id
+        assert product_dimension.names(db_session, [sale.product_id]) == {sale.product_id: "New Name"}
+
+
+class TestCustomerSketches:
+    
+    def test_sketch_merge_estimates_within_error_bound(self):
+        """Test that merged per-day sketches estimate distinct and repeat customers"""
+        days = [CustomerSketch(error=0.05) for _ in range(4)]
+        # 20,000 customers; every 4th one buys on two different days
+        for i in range(20000):
+            days[i % 4].add(f"CUST{i}", 1, 1000)
+            if i % 4 == 0:
+                days[1].add(f"CUST{i}", 1, 1000)
+        
+        window = CustomerSketch(error=0.05)
+        for day in days:
+            window.merge(day)
+        summary = window.summary()
+        
+        assert abs(summary["total_customers"] - 20000) / 20000 < 0.15
+        assert abs(summary["repeat_customers"] - 5000) / 5000 < 0.25
+    
+    def test_approximate_mode_matches_exact_for_small_data(self, db_session, monkeypatch):
+        """Test that sketch counts are exact while all customers fit in the sample"""
+        now = datetime.utcnow()
+        db_session.add_all([
+            Sale(product_name="P", amount_cents=60000, customer_id="C1", date=now - timedelta(days=2)),
+            Sale(product_name="P", amount_cents=100, customer_id="C1", date=now),
+            Sale(product_name="P", amount_cents=100, customer_id="C2", date=now - timedelta(days=1)),
+            Sale(product_name="P", amount_cents=100, date=now),
+        ])
+        db_session.commit()
+        
+        analytics = AnalyticsService(db_session)
+        exact = analytics.get_customer_summary(exact=True)
+        
+        monkeypatch.setattr(settings, "approximate_customer_counts", True)
+        approximate = analytics.get_customer_summary()
+        
+        assert exact == approximate == {
+            "total_customers": 2, "new_customers": 1, "repeat_customers": 1, "vip_customers": 1
+        }
+        assert analytics.count_repeat_customers(now - timedelta(days=3), now) == 1
+
+
+class TestPeriodComparisonService:
+    
+    def test_many_periods_in_one_query(self, db_session):
+        """Test that N periods are computed with a single SQL statement"""
+        now = datetime.utcnow()
+        db_session.add_all([
+            Sale(product_name="P", amount_cents=1000, customer_id="C1", date=now - timedelta(days=1)),
+            Sale(product_name="P", amount_cents=3000, customer_id="C2", date=now - timedelta(days=2)),
+            Sale(product_name="P", amount_cents=500, customer_id="C1", date=now - timedelta(days=12)),
+        ])
+        db_session.commit()
+        
+        statements = []
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(db_session.bind, "before_cursor_execute", count_statement)
+        try:
+            comparison = PeriodComparisonService(db_session).compare(
+                now - timedelta(days=10), now, include_year_over_year=True
+            )
+        finally:
+            event.remove(db_session.bind, "before_cursor_execute", count_statement)
+        
+        assert len(statements) == 1
+        assert comparison["current_period"]["total_revenue"] == 40.00
+        assert comparison["current_period"]["average_order_value"] == 20.00
+        assert comparison["current_period"]["unique_customers"] == 2
+        assert comparison["previous_period"]["total_revenue"] == 5.00
+        assert comparison["change_percent"]["total_revenue"] == 700.0
+        assert comparison["year_over_year_period"]["total_sales_count"] == 0
+    
+    def test_monthly_year_over_year(self, db_session):
+        """Test month-by-month comparison against the prior year"""
+        now = datetime.utcnow()
+        db_session.add_all([
+            Sale(product_name="P", amount_cents=2000, date=now),
+            Sale(product_name="P", amount_cents=1000, date=shift_years(now, -1)),
+        ])
+        db_session.commit()
+        
+        months = PeriodComparisonService(db_session).compare_months_year_over_year(3, ["total_revenue"])
+        
+        assert len(months) == 3
+        assert months[-1]["month"] == now.strftime("%Y-%m")
+        assert months[-1]["current"]["total_revenue"] == 20.00
+        assert months[-1]["prior_year"]["total_revenue"] == 10.00
+        assert months[-1]["change_percent"]["total_revenue"] == 100.0
+        
+        with pytest.raises(ValueError):
+            PeriodComparisonService(db_session).metrics_for_periods([(now, now)], ["margin"])
+    
+    def test_half_open_periods_scan_only_their_ranges(self, db_session):
+        """Test that a boundary sale counts in one period and the WHERE covers just the periods' ranges"""
+        db_session.add_all([
+            Sale(product_name="P", amount_cents=1000, date=datetime(2024, 2, 1)),  # Boundary of Jan and Feb
+            Sale(product_name="P", amount_cents=700, date=datetime(2023, 6, 15)),  # Between the periods
+        ])
+        db_session.commit()
+        
+        statements = []
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        periods = [month_period(2024, 1), month_period(2024, 2), month_period(2023, 2)]
+        event.listen(db_session.bind, "before_cursor_execute", capture)
+        try:
+            january, february, prior = PeriodComparisonService(db_session).metrics_for_periods(periods, ["total_revenue"])
+        finally:
+            event.remove(db_session.bind, "before_cursor_execute", capture)
+        
+        assert (january["total_revenue"], february["total_revenue"], prior["total_revenue"]) == (0, 10.00, 0)
+        assert covering_ranges(periods) == [month_period(2023, 2), (datetime(2024, 1, 1), datetime(2024, 3, 1))]
+        assert len(statements) == 1 and " OR " in statements[0]
+
+
+class TestColumnarSalesStore:
+    
+    def _seed(self, db_session):
+        now = datetime.utcnow()
+        db_session.add_all([
+            Sale(product_name="Product A", amount_cents=1000, customer_id="C1", date=now - timedelta(days=1)),
+            Sale(product_name="Product B", amount_cents=4000, customer_id="C2", date=now - timedelta(days=2)),
+            Sale(product_name="Product A", amount_cents=2500, customer_id="C1", date=now - timedelta(days=40)),
+            Sale(product_name="Product C", amount_cents=500, date=now),
+        ])
+        db_session.commit()
+        return now
+    
+    def test_matches_sql_results(self, db_session):
+        """Test that vectorized queries agree with the SQL implementations"""
+        now = self._seed(db_session)
+        analytics = AnalyticsService(db_session)
+        store = ColumnarSalesStore(reload_seconds=0)
+        store.load(db_session)
+        start = now - timedelta(days=60)
+        
+        assert store.revenue_metrics(start, now) == analytics.calculate_revenue_metrics(start, now)
+        assert store.top_products(start, now, 3) == analytics.get_top_products(start, now, 3)
+        assert store.count_repeat_customers(start, now) == analytics.count_repeat_customers(start, now)
+        for interval in ("daily", "weekly", "monthly"):
+            assert store.revenue_trend(start, now, interval) == analytics.get_revenue_trend(start, now, interval)
+    
+    @pytest.mark.asyncio
+    async def test_kept_current_from_sale_events(self, db_session):
+        """Test that create/update/delete events update the arrays without a reload"""
+        now = self._seed(db_session)
+        store = ColumnarSalesStore(reload_seconds=0)
+        store.load(db_session)
+        bus = EventBus()
+        store.attach(bus)
+        
+        def publish(event_type, sale):
+            return bus.publish(Event(event_type=event_type, entity_id=str(sale["id"]),
+                                     entity_type="sale", data=sale, timestamp=now))
+        
+        new_sale = {"id": 100, "date": now, "product_name": "Product D", "amount_cents": 9900,
+                    "customer_id": None, "category": None}
+        await publish(EventType.SALE_CREATED, new_sale)
+        assert store.top_products(now - timedelta(days=1), now, 1)[0]["product_name"] == "Product D"
+        
+        await publish(EventType.SALE_UPDATED, {**new_sale, "amount_cents": 100})
+        assert store.revenue_metrics(now - timedelta(hours=1), now)["total_revenue"] == 6.00
+        
+        await publish(EventType.SALE_DELETED, new_sale)
+        assert store.stats()["rows"] == 4
+
+class TestAsyncServices:
+    
+    def test_async_database_url(self):
+        """Test that sync URLs map onto their asyncio drivers"""
+        assert async_database_url("sqlite:///./analytics.db") == "sqlite+aiosqlite:///./analytics.db"
+        assert async_database_url("postgresql://u:p@db/analytics") == "postgresql+asyncpg://u:p@db/analytics"
+        assert async_database_url("postgresql+psycopg2://db/a") == "postgresql+asyncpg://db/a"
+    
+    @pytest.mark.asyncio
+    async def test_async_sale_crud(self, async_db_session, db_session):
+        """Test create/update/delete through the async session"""
+        service = AsyncSalesService(async_db_session)
+        sale = await service.create_sale({
+            "product_name": "Async Product",
+            "amount": 12.50,
+            "customer_id": "CUST001",
+            "date": datetime.utcnow()
+        })
+        assert sale.amount_cents == 1250
+        assert db_session.query(Sale).filter(Sale.id == sale.id).one().product_id is not None
+        
+        updated = await service.update_sale(sale.id, {"amount": 20.00})
+        assert updated.amount_cents == 2000
+        assert [s.id for s in await service.get_sales()] == [sale.id]
+        
+        assert await service.delete_sale(sale.id) is True
+        assert await service.update_sale(sale.id, {"amount": 1.00}) is None
+    
+    @pytest.mark.asyncio
+    async def test_async_analytics_match_sync(self, async_db_session, db_session):
+        """Test that the async services return the sync services' results"""
+        now = datetime.utcnow()
+        db_session.add_all([
+            Sale(product_name="Product A", amount_cents=5000, customer_id="CUST001", date=now - timedelta(days=1)),
+            Sale(product_name="Product B", amount_cents=2500, customer_id="CUST001", date=now - timedelta(days=2)),
+            Sale(product_name="Product A", amount_cents=1000, date=now - timedelta(days=3)),
+        ])
+        db_session.commit()
+        
+        sync_summary = AnalyticsService(db_session).generate_kpi_summary(30)
+        async_summary = await AsyncAnalyticsService(async_db_session).generate_kpi_summary(30)
+        for key in ("total_revenue", "total_sales_count", "top_products", "repeat_customers_count"):
+            assert async_summary[key] == sync_summary[key]
+        
+        kpi_service = AsyncKPIService(async_db_session)
+        assert await kpi_service.get_total_revenue(30) == 85.00
+        assert (await kpi_service.get_top_products(1))[0]["product_name"] == "Product A"
+    
+    @pytest.mark.asyncio
+    async def test_cached_kpis_are_values(self, async_db_session):
+        """Test that the cached async KPI call returns the computed dict, not a spent coroutine"""
+        service = AsyncKPIService(async_db_session)
+        first = await service.calculate_all_kpis(30)
+        second = await AsyncKPIService(async_db_session).calculate_all_kpis(30)
+        assert isinstance(first, dict)
+        assert second == first
+
+class TestSQLiteTuning:
+    
+    def test_pragmas_applied_on_connect(self, tmp_path):
+        """Test that pooled file connections come up in WAL mode with the tuned pragmas"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'tuned.db'}", pool_size=2)
+        event.listen(engine, "connect", apply_sqlite_pragmas)
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA temp_store")).scalar() == 2  # MEMORY
+            assert conn.execute(text("PRAGMA cache_size")).scalar() == -settings.sqlite_cache_size_kib
+        engine.dispose()
+    
+    def test_memory_urls_detected(self):
+        assert is_sqlite_memory("sqlite://")
+        assert is_sqlite_memory("sqlite:///:memory:")
+        assert not is_sqlite_memory("sqlite:///./analytics.db")
+        assert not is_sqlite_memory("postgresql://db/analytics")
+    
+    def test_write_queue_serializes_on_one_thread(self):
+        """Test that queued writes run one at a time, in order, on the writer thread"""
+        queue = WriteQueue()
+        order, threads, active = [], set(), []
+        
+        def write(i):
+            active.append(i)
+            assert len(active) == 1
+            threads.add(threading.current_thread().name)
+            order.append(i)
+            active.remove(i)
+        
+        futures = [queue.submit(write, i) for i in range(50)]
+        for future in futures:
+            future.result()
+        queue.shutdown()
+        
+        assert order == list(range(50))
+        assert len(threads) == 1 and threads.pop().startswith("sqlite-writer")
+        assert queue.stats()["queued"] == 0
+    
+    def test_write_queue_run_propagates_and_nests(self):
+        """Test that errors reach the caller and nested writes do not deadlock"""
+        queue = WriteQueue()
+        assert queue.run(lambda: queue.run(lambda: 42)) == 42
+        with pytest.raises(ValueError):
+            queue.run(lambda: (_ for _ in ()).throw(ValueError("boom")))
+        queue.shutdown()
+        
+        inline = WriteQueue(enabled=False)
+        assert inline.run(threading.current_thread) is threading.current_thread()
+    
+    @pytest.mark.asyncio
+    async def test_write_queue_awaited_from_the_event_loop(self):
+        """Test that coroutines await queued writes, and async commits hold the writer for their turn"""
+        queue = WriteQueue()
+        order = []
+        
+        assert await queue.run_async(threading.current_thread) is not threading.current_thread()
+        async with queue.turn():
+            queued = asyncio.wrap_future(queue.submit(order.append, "queued"))
+            await asyncio.sleep(0.01)
+            order.append("async commit")
+        await queued
+        assert order == ["async commit", "queued"]
+        # A sync write left on the event loop runs inline instead of waiting on the writer
+        assert queue.run(threading.current_thread) is threading.current_thread()
+        queue.shutdown()
+
+class TestReadPool:
+    
+    def test_read_only_session_rejects_writes(self, db_session):
+        """Test that the read session can query but never flush changes"""
+        db_session.add(Sale(product_name="Product A", amount_cents=100, date=datetime.utcnow()))
+        db_session.commit()
+        
+        read_db = ReadOnlySession(bind=db_session.get_bind())
+        try:
+            assert read_db.query(Sale).count() == 1
+            read_db.add(Sale(product_name="Product B", amount_cents=100, date=datetime.utcnow()))
+            with pytest.raises(DatabaseError):
+                read_db.flush()
+        finally:
+            read_db.rollback()
+            read_db.close()
+    
+    def test_cached_rollups_rebuilt_from_primary_not_replica(self, db_session, tmp_path, monkeypatch):
+        """Test that day rollups built through a lagging replica session come from the primary"""
+        replica_engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+        Base.metadata.create_all(bind=replica_engine)  # Has not replayed the sale below yet
+        monkeypatch.setattr(settings, "database_read_url", str(replica_engine.url))
+        db_session.add(Sale(product_name="Coffee", amount_cents=450, date=datetime(2024, 1, 15, 9)))
+        db_session.commit()
+        
+        replica = ReadOnlySession(bind=replica_engine)
+        try:
+            assert reads_replica(replica) and not reads_replica(db_session)
+            top = TopProductsService(replica).get_top_products(datetime(2024, 1, 15), datetime(2024, 1, 16) - timedelta.resolution)
+            assert [row['total_revenue'] for row in top] == [4.5]
+        finally:
+            replica.close()
+            replica_engine.dispose()
+    
+    def test_pool_metrics_track_checkouts_and_hold_time(self, tmp_path):
+        """Test that checkouts, peak concurrency and hold time are recorded"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", pool_size=2, max_overflow=0)
+        metrics = PoolMetrics("test", engine.pool)
+        
+        first = engine.connect()
+        second = engine.connect()
+        assert metrics.stats()["in_use"] == 2
+        first.close()
+        second.close()
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        
+        stats = metrics.stats()
+        assert stats["checkouts"] == 3
+        assert stats["in_use"] == 0
+        assert stats["peak_in_use"] == 2
+        assert stats["connects"] == 2
+        assert stats["size"] == 2
+        assert stats["max_hold_ms"] > 0
+        engine.dispose()
+
+class TestQueryInstrumentation:
+    
+    def test_normalize_sql_groups_equivalent_statements(self):
+        """Test that literals, bind markers and IN-lists normalize away"""
+        assert normalize_sql("SELECT *  FROM sales\n WHERE id = 5 AND name = 'x'") == \
+            "SELECT * FROM sales WHERE id = ? AND name = ?"
+        assert normalize_sql("SELECT * FROM sales WHERE id IN (?, ?, ?)") == \
+            normalize_sql("SELECT * FROM sales WHERE id IN (?, ?)")
+        assert normalize_sql("SELECT * FROM t WHERE a = :a AND b = %(b)s") == "SELECT * FROM t WHERE a = ? AND b = ?"
+        assert normalize_sql("SELECT reltuples::bigint FROM pg_class WHERE relname = :name") == \
+            "SELECT reltuples::bigint FROM pg_class WHERE relname = ?"
+    
+    def test_failed_statement_releases_its_start_time(self, db_session, monkeypatch):
+        """Test that a statement that raises does not leave its start time behind for the next one"""
+        monkeypatch.setattr(settings, "query_instrumentation", True)
+        with db_session.get_bind().connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM no_such_table"))
+            assert not conn.info.get('query_start')
+    
+    def test_bind_shape_records_types_not_values(self):
+        assert bind_shape((1, "secret", 2.5), False) == "(int, str, float)"
+        assert bind_shape({"a": 1}, False) == "{a: int}"
+        assert bind_shape([(1,), (2,)], True) == "2 x (int)"
+    
+    def test_statements_attributed_to_request_and_slow_log(self, db_session, monkeypatch):
+        """Test per-request counting and the slow log with an EXPLAIN plan"""
+        monkeypatch.setattr(settings, "slow_query_ms", 0)
+        monkeypatch.setattr(settings, "explain_slow_queries", True)
+        query_registry.reset()
+        
+        stats = start_request("/test")
+        db_session.query(Sale).filter(Sale.customer_id == "CUST001").all()
+        db_session.query(func.count(Sale.id)).scalar()
+        
+        assert stats.statement_count == 2
+        assert stats.db_seconds > 0
+        assert stats.server_timing().endswith('desc="2 queries"')
+        
+        snapshot = query_registry.snapshot()
+        slow = snapshot["slow_queries"][-1]
+        assert slow["path"] == "/test"
+        assert slow["bind_shape"] == "(str)"
+        assert any("ix_sales_customer_id" in line or "INDEX" in line for line in slow["plan"])
+        assert len(snapshot["statements"]) == 2
+    
+    def test_registry_aggregates_endpoints(self):
+        registry = QueryRegistry(slow_log_size=2)
+        for count in (3, 5):
+            stats = start_request("/x")
+            for _ in range(count):
+                stats.record(0.001)
+            registry.record_request("GET /x", stats)
+        for index in range(3):
+            registry.record_slow(f"SELECT {index}", "()", 1.0, None)
+        
+        snapshot = registry.snapshot()
+        assert snapshot["endpoints"][0]["avg_statements"] == 4
+        assert snapshot["endpoints"][0]["max_statements"] == 5
+        assert [entry["sql"] for entry in snapshot["slow_queries"]] == ["SELECT 2", "SELECT 1"]
+
+
+class TestMetrics:
+    
+    def test_histogram_renders_cumulative_buckets(self):
+        registry = MetricsRegistry()
+        latency = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value, "/x")
+        
+        lines = registry.render().splitlines()
+        assert "# TYPE latency_seconds histogram" in lines
+        assert 'latency_seconds_bucket{route="/x",le="0.1"} 2' in lines
+        assert 'latency_seconds_bucket{route="/x",le="1.0"} 3' in lines
+        assert 'latency_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+        assert 'latency_seconds_count{route="/x"} 4' in lines
+        assert 'latency_seconds_sum{route="/x"} 3.65' in lines
+    
+    def test_counter_gauge_and_collector(self):
+        registry = MetricsRegistry()
+        rows = registry.counter("rows_total", "Rows", ("source",))
+        rows.inc("csv", amount=1000)
+        rows.inc("csv", amount=500)
+        depth = registry.gauge("depth", "Depth")
+        depth.inc()
+        depth.inc()
+        depth.dec()
+        registry.collector(lambda: [("queue_size", "gauge", "Queue", [("queue_size", {}, 7)])])
+        
+        output = registry.render()
+        assert 'rows_total{source="csv"} 1500' in output
+        assert "\ndepth 1\n" in output
+        assert "queue_size 7" in output
+    
+    def test_cache_hit_miss_eviction_counters(self):
+        memory = MemoryCache()
+        memory.set("a", 1)
+        memory.set("stale", 2, ttl_seconds=-1)
+        assert memory.get("a") == 1
+        assert memory.get("missing") is None
+        assert memory.get("stale") is None
+        memory.delete("a")
+        assert memory.stats()["hits"] == 1
+        assert memory.stats()["misses"] == 2
+        assert memory.stats()["evictions"] == 2
+        
+        rollups = DailyRollupCache("test_rollups", max_days=1)
+        rollups.set(datetime(2024, 1, 1).date(), 1)
+        rollups.set(datetime(2024, 1, 2).date(), 2)
+        assert rollups.get(datetime(2024, 1, 1).date()) is None
+        assert rollups.stats() == {'cached_days': 1, 'hits': 0, 'misses': 1, 'evictions': 1}
+        _daily_rollups.remove(rollups)
+    
+    @pytest.mark.asyncio
+    async def test_event_publish_latency_recorded(self):
+        bus = EventBus()
+        bus.subscribe(EventType.REPORT_GENERATED, lambda event: None)
+        before = event_publish_duration.count("report.generated")
+        
+        await bus.publish(Event(EventType.REPORT_GENERATED, "r1", "report", {}, datetime.utcnow()))
+        
+        assert event_publish_duration.count("report.generated") == before + 1
+    
+    def test_rss_without_proc_or_resource(self, monkeypatch):
+        """Test that memory metrics degrade to 0 where neither /proc nor the POSIX resource module exists"""
+        def no_proc(*args, **kwargs):
+            raise OSError("no /proc")
+        monkeypatch.setattr("builtins.open", no_proc)
+        monkeypatch.setitem(sys.modules, "resource", None)  # import resource -> ImportError, as on Windows
+        assert process_rss_bytes() == 0
+
+
+class TestSystemStatus:
+    
+    def test_row_count_after_deletes_and_for_string_ids(self, db_session):
+        """Test that never-analyzed SQLite tables count rows (not MAX(id)), so deletes and string ids are right"""
+        sales = [Sale(date=datetime(2024, 1, day), product_name="Coffee", amount_cents=500) for day in range(1, 4)]
+        db_session.add_all(sales + [Customer(id="CUST002", name="Ann")])
+        db_session.commit()
+        db_session.delete(sales[-1])
+        db_session.commit()
+        
+        assert estimate_row_count(db_session, "sales") == (2, "count")
+        assert estimate_row_count(db_session, "customers") == (1, "count")
+        assert estimate_row_count(db_session, "missing") == (None, "unavailable")
+    
+    def test_write_tracker_parses_write_statements(self):
+        tracker = WriteTracker()
+        tracker.record('INSERT INTO "sales" (date) VALUES (?)', 1000)
+        tracker.record("DELETE FROM sales WHERE id = ?", 1)
+        tracker.record("SELECT * FROM sales", 5)
+        
+        sales = tracker.table("sales")
+        assert sales["rows_written"] == {'insert': 1000, 'update': 0, 'delete': 1}
+        assert sales["last_write_at"] is not None
+        assert tracker.table("expenses")["last_write_at"] is None
+    
+    def test_bulk_and_returning_inserts_are_counted(self, db_session):
+        """Test that executemany batches and INSERT ... RETURNING count the rows they wrote, once committed"""
+        write_tracker.reset()
+        rows = [{"date": datetime(2024, 1, day), "product_name": "Coffee", "amount_cents": 500} for day in range(1, 5)]
+        hashed = [dict(row, row_hash=str(i)) for i, row in enumerate(rows)]
+        db_session.bulk_insert_mappings(Sale, rows[:2])
+        insert_new(db_session.connection(), Sale.__table__, hashed, SALE_CONFLICT_KEY)
+        assert write_tracker.table("sales")["rows_written"]["insert"] == 0
+        db_session.commit()
+        assert write_tracker.table("sales")["rows_written"]["insert"] == 6
+        
+        # Rows skipped by ON CONFLICT DO NOTHING and rolled-back writes are not counted
+        insert_new(db_session.connection(), Sale.__table__, hashed + [dict(rows[0], row_hash="new")], SALE_CONFLICT_KEY)
+        db_session.commit()
+        db_session.bulk_insert_mappings(Sale, rows)
+        db_session.rollback()
+        assert write_tracker.table("sales")["rows_written"]["insert"] == 7
+    
+    def test_row_count_from_sqlite_stat1(self, db_session):
+        """Test that SQLite row counts come from ANALYZE statistics once they exist"""
+        db_session.add_all([Sale(date=datetime(2024, 1, day), product_name="Coffee", amount_cents=500)
+                            for day in range(1, 4)])
+        db_session.commit()
+        try:
+            db_session.execute(text("ANALYZE"))
+            db_session.commit()
+            db_session.add(Sale(date=datetime(2024, 1, 4), product_name="Coffee", amount_cents=500))
+            db_session.commit()
+            
+            assert estimate_row_count(db_session, "sales") == (3, "sqlite_stat1")
+            assert estimate_row_count(db_session, "categories") == (0, "count")
+        finally:
+            db_session.execute(text("DROP TABLE IF EXISTS sqlite_stat1"))
+            db_session.commit()
+    
+    def test_status_is_cached(self, db_session):
+        """Test that repeated polls within the TTL run no SQL"""
+        write_tracker.reset()
+        db_session.add(Sale(date=datetime(2024, 1, 1), product_name="Coffee", amount_cents=500))
+        db_session.commit()
+        
+        first = start_request("/status")
+        status = SystemStatusService(db_session).get_status()
+        second = start_request("/status")
+        assert SystemStatusService(db_session).get_status() == status
+        
+        assert first.statement_count > 0
+        assert second.statement_count == 0
+        assert status["tables"]["sales"]["estimated_rows"] == 1
+        assert status["tables"]["sales"]["rows_written"]["insert"] == 1
+        assert status["database_latency_ms"] >= 0
+
+
+class TestKeysetPagination:
+    
+    def test_pages_walk_every_row_once_across_ties(self, db_session):
+        """Test that (date, id) ordering pages through equal timestamps without gaps or repeats"""
+        shared = datetime(2024, 1, 15, 12, 0)
+        db_session.add_all([Sale(date=shared if index % 2 else shared - timedelta(days=index),
+                                 product_name="Coffee", amount_cents=100 + index) for index in range(25)])
+        db_session.commit()
+        expected = [sale.id for sale in db_session.query(Sale).order_by(Sale.date.desc(), Sale.id.desc())]
+        
+        service = SalesService(db_session)
+        seen, cursor = [], None
+        while True:
+            page, cursor = service.get_sales_page(limit=7, cursor=cursor)
+            seen.extend(sale.id for sale in page)
+            if cursor is None:
+                break
+        
+        assert seen == expected
+    
+    def test_last_full_page_has_no_cursor(self, db_session):
+        db_session.add_all([Expense(date=datetime(2024, 1, day), description="Rent", amount_cents=1000)
+                            for day in range(1, 5)])
+        db_session.commit()
+        
+        first, cursor = ExpensesService(db_session).get_expenses_page(limit=2)
+        second, final = ExpensesService(db_session).get_expenses_page(limit=2, cursor=cursor)
+        
+        assert [expense.date.day for expense in first + second] == [4, 3, 2, 1]
+        assert final is None
+    
+    def test_pages_through_null_sort_keys(self, db_session):
+        """Test that customers without created_at page last, including a page that ends on one"""
+        db_session.add_all([Customer(id=f"C{index}", name="Ann", created_at=datetime(2024, 1, index))
+                            for index in range(1, 6)])
+        db_session.commit()
+        # The column default fills created_at on insert; rows imported before it existed have none
+        db_session.query(Customer).filter(Customer.id.in_(["C3", "C4", "C5"])).update({"created_at": None})
+        db_session.commit()
+        
+        for columns in (None, CUSTOMER_RESPONSE_COLUMNS):
+            seen, cursor = [], None
+            while True:
+                page, cursor = CustomersServiceV1(db_session).get_customers_page(limit=2, cursor=cursor, columns=columns)
+                seen.extend(customer.id for customer in page)
+                if cursor is None:
+                    break
+            assert seen == ["C2", "C1", "C5", "C4", "C3"]
+    
+    def test_cursor_round_trip_and_tampering(self):
+        columns = (Sale.date, Sale.id)
+        token = encode_cursor([datetime(2024, 1, 15, 12, 30), 42])
+        assert decode_cursor(token, columns) == (datetime(2024, 1, 15, 12, 30), 42)
+        
+        with pytest.raises(ValidationError):
+            decode_cursor("not-a-cursor", columns)
+        with pytest.raises(ValidationError):
+            decode_cursor(encode_cursor([1]), columns)
+
+
+class TestExportService:
+    
+    def _seed(self, db_session):
+        db_session.add_all([Sale(date=datetime(2024, 1, day), product_name=f"Product {day}", amount_cents=1050 * day,
+                                 customer_id="CUST001" if day % 2 else None) for day in range(1, 6)])
+        db_session.commit()
+    
+    def test_ndjson_streams_in_batches(self, db_session):
+        """Test one chunk per batch, rows ordered by date and amounts in dollars"""
+        self._seed(db_session)
+        
+        chunks = list(ExportService(db_session, batch_size=2).export_sales("ndjson", start_date=datetime(2024, 1, 2)))
+        rows = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+        
+        assert len(chunks) == 2
+        assert [row["product_name"] for row in rows] == ["Product 2", "Product 3", "Product 4", "Product 5"]
+        assert rows[0]["amount"] == 21.0
+        assert rows[0]["customer_id"] is None
+    
+    def test_csv_export_with_gzip(self, db_session):
+        self._seed(db_session)
+        
+        body = gzip.decompress(b"".join(gzip_stream(ExportService(db_session).export_sales("csv"))))
+        lines = body.decode().splitlines()
+        
+        assert lines[0] == "id,date,product_name,amount,customer_id,category,created_at"
+        assert len(lines) == 6
+        assert ",Product 1,10.50,CUST001,," in lines[1]
+
+
+class TestFastSerialization:
+    
+    def test_column_rows_match_pydantic_output(self, db_session, monkeypatch):
+        """Test that the tuple + orjson path renders what SaleResponse would (and so does the json fallback)"""
+        db_session.add(Sale(date=datetime(2024, 1, 15, 12, 30, 0, 250), product_name="Coffee",
+                            amount_cents=1999, customer_id=None, category="Drinks"))
+        db_session.commit()
+        sale = db_session.query(Sale).one()
+        expected = json.loads(SaleResponse(
+            id=sale.id, date=sale.date, product_name=sale.product_name, amount=sale.amount_cents / 100,
+            customer_id=sale.customer_id, category=sale.category, created_at=sale.created_at
+        ).model_dump_json())
+        
+        rows = SalesService(db_session).get_sales(columns=SALE_RESPONSE_COLUMNS)
+        records = serialization.rows_to_records(SALE_RESPONSE_COLUMNS, rows)
+        
+        assert json.loads(serialization.dumps(records)) == [expected]
+        monkeypatch.setattr(serialization, "orjson", None)
+        assert json.loads(serialization.dumps(records)) == [expected]
+
+
+class TestSalesPartitioning:
+    
+    def test_month_arithmetic_and_names(self):
+        assert add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+        assert month_range(datetime(2024, 1, 31), datetime(2024, 3, 1)) == \
+            [date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)]
+        assert partition_name(date(2024, 2, 1)) == "sales_y2024m02"
+        assert partition_ddl(date(2024, 12, 1)).endswith("FROM ('2024-12-01') TO ('2025-01-01')")
+    
+    def test_window_prunes_to_overlapping_months(self):
+        names = [partition_name(month) for month in month_range(date(2023, 1, 1), date(2024, 12, 1))]
+        
+        pruned = partitions_for_window(names + [DEFAULT_PARTITION], datetime(2024, 2, 15), datetime(2024, 4, 1))
+        
+        assert pruned == ["sales_y2024m02", "sales_y2024m03", "sales_y2024m04", DEFAULT_PARTITION]
+    
+    def test_sqlite_stays_unpartitioned(self, db_session):
+        conn = db_session.connection()
+        assert not is_partitioned(conn)
+        assert ensure_upcoming_partitions(conn) == []
+    
+    def test_layout_matches_sales_model(self):
+        """Test that partitioning rebuilds sales with every model column and index, so none is dropped"""
+        table = Sale.__table__
+        assert set(SALES_COLUMNS.split(", ")) == set(table.columns.keys())
+        assert {name for name, _ in SALES_INDEXES + SALES_UNIQUE_INDEXES} == {index.name for index in table.indexes}
+
+class TestSuggestions:
+    
+    def _seed(self, db_session):
+        now = datetime.utcnow()
+        db_session.add_all([Customer(id="C1", name="Alice Cooper"), Customer(id="C2", name="Bob Alcott")])
+        db_session.add_all(
+            [Sale(product_name="Cappuccino", amount_cents=450, customer_id="C2", date=now) for _ in range(3)]
+            + [Sale(product_name="Iced Cappuccino", amount_cents=550, customer_id="C1", date=now),
+               Sale(product_name="Espresso", amount_cents=300, date=now)]
+        )
+        db_session.commit()
+    
+    def test_index_ranks_prefix_then_popularity(self):
+        """Test substring matching, prefix-first ranking and short-prefix lookups"""
+        index = SuggestionIndex()
+        index.upsert("Iced Cappuccino", "Iced Cappuccino", 10)
+        index.upsert("Cappuccino", "Cappuccino", 2)
+        index.upsert("Cappuccino Grande", "Cappuccino Grande", 5)
+        index.upsert("Espresso", "Espresso", 50)
+        
+        assert [label for _, label in index.search("CAPPU")] == \
+            ["Cappuccino Grande", "Cappuccino", "Iced Cappuccino"]
+        assert [label for _, label in index.search("ca")] == \
+            ["Cappuccino Grande", "Cappuccino", "Iced Cappuccino"]
+        assert index.search("pp") == []
+        assert [label for _, label in index.search("", limit=1)] == ["Espresso"]
+        assert index.search("xyz") == []
+        
+        index.upsert("Espresso", "Espresso Doppio")
+        index.remove("Cappuccino Grande")
+        assert index.search("doppio") == [("Espresso", "Espresso Doppio")]
+        assert [label for _, label in index.search("capp")] == ["Cappuccino", "Iced Cappuccino"]
+    
+    def test_broad_queries_walk_popularity_order(self, monkeypatch):
+        """Test that the early-stopping walk for broad queries returns the exact ranking"""
+        index = SuggestionIndex()
+        for i, name in enumerate(["Latte", "Oat Latte", "Iced Latte", "Lavender Tea", "Plain Bagel", "Chai"]):
+            index.upsert(name, name, i)
+        queries = ["", "la", "latte", "atte", "lat", "xyz"]
+        exact = {query: index.search(query, limit=2) for query in queries}
+        
+        monkeypatch.setattr(suggestions_module, "EXACT_RANK_LIMIT", 0)
+        assert {query: index.search(query, limit=2) for query in queries} == exact
+        assert [label for _, label in exact["atte"]] == ["Iced Latte", "Oat Latte"]
+    
+    def test_loads_names_with_sales_counts(self, db_session):
+        """Test that the lazy load ranks products and customers by number of sales"""
+        self._seed(db_session)
+        service = SuggestionService()
+        
+        assert service.suggest_products(db_session, "cappuccino") == ["Cappuccino", "Iced Cappuccino"]
+        assert service.suggest_customers(db_session, "al") == \
+            [{"id": "C1", "name": "Alice Cooper"}, {"id": "C2", "name": "Bob Alcott"}]
+        assert service.suggest_customers(db_session, "") == \
+            [{"id": "C2", "name": "Bob Alcott"}, {"id": "C1", "name": "Alice Cooper"}]
+    
+    @pytest.mark.asyncio
+    async def test_products_without_sales_are_left_out(self, db_session):
+        """Test that products with no sales are skipped on load and dropped when their last sale goes"""
+        self._seed(db_session)
+        db_session.add(Product(name="Cappuccino Freddo"))
+        db_session.commit()
+        service = SuggestionService()
+        assert service.suggest_products(db_session, "cappuccino") == ["Cappuccino", "Iced Cappuccino"]
+        
+        bus = EventBus()
+        service.attach(bus)
+        await bus.publish(Event(event_type=EventType.SALE_DELETED, entity_id="5", entity_type="sale",
+                                data={"id": 5, "product_name": "Espresso"}, timestamp=datetime.utcnow()))
+        assert service.suggest_products(db_session, "espresso") == []
+    
+    @pytest.mark.asyncio
+    async def test_kept_current_from_events(self, db_session):
+        """Test that sale and customer events update names and popularity without a reload"""
+        self._seed(db_session)
+        service = SuggestionService()
+        service.ensure_loaded(db_session)
+        bus = EventBus()
+        service.attach(bus)
+        now = datetime.utcnow()
+        
+        def publish(event_type, data, entity_type="sale"):
+            return bus.publish(Event(event_type=event_type, entity_id=str(data["id"]),
+                                     entity_type=entity_type, data=data, timestamp=now))
+        
+        for sale_id in range(5):
+            await publish(EventType.SALE_CREATED, {"id": 100 + sale_id, "product_name": "Iced Cappuccino",
+                                                   "customer_id": "C1"})
+        await publish(EventType.SALE_CREATED, {"id": 200, "product_name": "Flat White", "customer_id": None})
+        assert service.suggest_products(db_session, "ccino") == ["Iced Cappuccino", "Cappuccino"]
+        assert service.suggest_products(db_session, "white") == ["Flat White"]
+        
+        await publish(EventType.CUSTOMER_UPDATED, {"id": "C2", "name": "Robert Alcott"}, "customer")
+        await publish(EventType.CUSTOMER_CREATED, {"id": "C3", "name": "Alan Turing"}, "customer")
+        await publish(EventType.CUSTOMER_DELETED, {"id": "C1", "name": "Alice Cooper"}, "customer")
+        assert service.suggest_customers(db_session, "al") == \
+            [{"id": "C3", "name": "Alan Turing"}, {"id": "C2", "name": "Robert Alcott"}]
+    
+    def test_database_fallback_with_fts5(self, db_session):
+        """Test that the SQLite FTS5 trigram tables answer the same substring queries"""
+        self._seed(db_session)
+        bind = db_session.get_bind()
+        with bind.begin() as conn:
+            create_trigram_indexes(conn)
+        try:
+            db_session.add(Product(name="Cappuccino Freddo"))
+            db_session.commit()
+            
+            names = {name for _, name in search_database(db_session, "products", "CAPPUCCINO")}
+            assert names == {"Cappuccino", "Iced Cappuccino", "Cappuccino Freddo"}
+            assert search_database(db_session, "customers", "cott") == [("C2", "Bob Alcott")]
+            assert search_database(db_session, "customers", "bo") == [("C2", "Bob Alcott")]
+        finally:
+            db_session.rollback()
+            with bind.begin() as conn:
+                drop_trigram_indexes(conn)
+
+class TestIndexAdvisor:
+    
+    def test_plan_summary_parses_both_dialects(self):
+        """Test that SQLite and PostgreSQL plans map onto the same summary"""
+        sqlite_plan = summarize_plan("sqlite", [
+            "SEARCH sales USING COVERING INDEX ix_sales_date_product_amount (date>? AND date<?)",
+            "SEARCH sales USING INDEX ix_sales_date (date>?)",
+            "SCAN expenses",
+            "USE TEMP B-TREE FOR GROUP BY",
+        ])
+        pg_plan = summarize_plan("postgresql", [
+            "HashAggregate  (cost=10.0..12.0 rows=5 width=16)",
+            "  ->  Index Only Scan using ix_sales_date_product_amount on sales  (cost=0.4..8.0 rows=100 width=12)",
+            "  ->  Bitmap Index Scan on ix_sales_date  (cost=0.0..4.3 rows=10 width=0)",
+            "  ->  Seq Scan on expenses  (cost=0.0..35.5 rows=2550 width=8)",
+            "Sort  (cost=20.0..21.0 rows=5 width=16)",
+        ])
+        
+        for summary in (sqlite_plan, pg_plan):
+            assert summary['covering'] == ["ix_sales_date_product_amount"]
+            assert summary['lookups'] == ["ix_sales_date"]
+            assert summary['full_scans'] == ["expenses"]
+            assert summary['temp_sort'] is True
+    
+    def test_workload_uses_covering_indexes(self, db_session):
+        """Test that the replayed analytics queries are served by the covering indexes"""
+        now = datetime.utcnow()
+        db_session.add_all([
+            Sale(product_name="Coffee", amount_cents=450, customer_id="C1", date=now - timedelta(days=1)),
+            Sale(product_name="Tea", amount_cents=300, date=now - timedelta(days=2)),
+            Expense(description="Rent", amount_cents=10000, category="Rent", date=now - timedelta(days=1)),
+        ])
+        db_session.commit()
+        
+        report = IndexAdvisor(db_session).advise(analytics_workload(now - timedelta(days=30), now))
+        
+        def covering(name):
+            return {index for query in report['queries'] if query['name'] == name for index in query['covering']}
+        
+        assert "ix_sales_date_product_amount" in covering("revenue_metrics")
+        assert "ix_sales_customer_date_amount" in covering("customer_summary")
+        assert "ix_expenses_date_category_amount" in covering("expenses_by_category")
+        assert report['findings'] == []
+        assert "ix_sales_date_product_amount" in report['indexes']['sales']['used']
+
+
+class TestSessionScopedHandlers:
+    
+    @pytest.mark.asyncio
+    async def test_session_per_event_with_bounded_concurrency(self, async_session_factory):
+        """Test that each event gets its own closed session and at most max_concurrency run at once"""
+        import asyncio
+        bus = EventBus()
+        opened = []
+        running = {'now': 0, 'peak': 0}
+        
+        def factory():
+            session = async_session_factory()
+            opened.append(session)
+            return session
+        
+        async def recalculate(event, db):
+            running['now'] += 1
+            running['peak'] = max(running['peak'], running['now'])
+            await db.execute(select(func.count(Sale.id)))
+            await asyncio.sleep(0.01)
+            running['now'] -= 1
+        
+        handlers = SessionScopedHandlers("test", factory, max_concurrency=2)
+        handlers.subscribe(bus, EventType.SALE_CREATED, recalculate)
+        waits_before = event_handler_checkout_wait.count("test.recalculate")
+        
+        events = [Event(EventType.SALE_CREATED, str(i), "sale", {}, datetime.utcnow()) for i in range(6)]
+        await asyncio.gather(*(bus.publish(event) for event in events))
+        
+        assert len(opened) == 6 and len(set(map(id, opened))) == 6
+        assert running['peak'] == 2
+        assert all(not session.in_transaction() for session in opened)
+        assert event_handler_checkout_wait.count("test.recalculate") - waits_before == 6
+        
+        handlers.close()
+        await bus.publish(events[0])
+        assert len(opened) == 6
+    
+    @pytest.mark.asyncio
+    async def test_errors_counted_and_slot_released(self, async_session_factory):
+        """Test that a failing handler is counted and does not leak its concurrency slot"""
+        bus = EventBus()
+        calls = []
+        
+        async def failing(event, db):
+            calls.append(event.entity_id)
+            raise RuntimeError("boom")
+        
+        handlers = SessionScopedHandlers("test", async_session_factory, max_concurrency=1)
+        handlers.subscribe(bus, EventType.EXPENSE_CREATED, failing)
+        errors_before = event_handler_errors.value("test.failing")
+        
+        for i in range(3):
+            await bus.publish(Event(EventType.EXPENSE_CREATED, str(i), "expense", {}, datetime.utcnow()))
+        
+        assert calls == ["0", "1", "2"]
+        assert event_handler_errors.value("test.failing") - errors_before == 3
+        handlers.close()
+
+
+class TestRowReader:
+    
+    def test_list_rows_skips_identity_map(self, db_session):
+        """Test that list_rows returns plain tuples without loading ORM instances"""
+        now = datetime.utcnow()
+        db_session.add_all([Sale(date=now - timedelta(days=day), product_name="Coffee", amount_cents=250 + day)
+                            for day in range(5)])
+        db_session.commit()
+        db_session.expunge_all()
+        
+        service = SalesService(db_session)
+        rows = service.get_sales(limit=3, start_date=now - timedelta(days=3, hours=1), columns=SALE_RESPONSE_COLUMNS)
+        
+        assert len(db_session.identity_map) == 0
+        assert [tuple(row)[3] for row in rows] == [250, 251, 252]
+        records = serialization.rows_to_records(SALE_RESPONSE_COLUMNS, rows)
+        assert records[0]["amount"] == 2.5 and records[0]["product_name"] == "Coffee"
+        # Same rows and order as the ORM path
+        assert [record["id"] for record in records] == [sale.id for sale in service.get_sales(
+            limit=3, start_date=now - timedelta(days=3, hours=1))]
+    
+    def test_list_page_matches_orm_pages(self, db_session):
+        """Test that row-tuple keyset pages walk the same ids as ORM pages"""
+        created = datetime(2024, 3, 1)
+        db_session.add_all([Customer(id=f"C{index:02d}", name=f"Customer {index}",
+                                     created_at=created + timedelta(hours=index // 2)) for index in range(9)])
+        db_session.commit()
+        service = CustomersServiceV1(db_session)
+        
+        def walk(columns):
+            seen, cursor = [], None
+            while True:
+                page, cursor = service.get_customers_page(limit=4, cursor=cursor, columns=columns)
+                seen.extend(customer.id for customer in page)
+                if cursor is None:
+                    return seen
+        
+        assert walk(CUSTOMER_RESPONSE_COLUMNS) == walk(None)
+        assert len(walk(None)) == 9
+
+
+class TestPreparedStatements:
+    
+    def test_every_statement_runs_and_is_reused(self, db_session):
+        """Test that each registered statement executes and repeated calls reuse one compiled form"""
+        now = datetime.utcnow()
+        db_session.add_all([
+            Sale(product_name="Coffee", amount_cents=450, customer_id="C1", date=now - timedelta(days=1)),
+            Sale(product_name="Tea", amount_cents=300, customer_id="C1", date=now - timedelta(days=2)),
+            Expense(description="Rent", amount_cents=100, date=now - timedelta(days=1)),
+        ])
+        db_session.commit()
+        params = {"since": now - timedelta(days=30), "start_date": now - timedelta(days=30), "end_date": now,
+                  "vip_threshold": 500}
+        
+        for name in statements:
+            statements.execute(db_session, name, **params).all()
+        assert statements.execute(db_session, "sales_total_since", **params).scalar() == 750
+        assert statements.execute(db_session, "repeat_customers", **params).scalar() == 1
+        assert tuple(statements.execute(db_session, "customer_summary", **params).first()) == (1, 0, 1, 1)
+        
+        compiled = []
+        listener = lambda conn, clauseelement, multiparams, params, execution_options, result: compiled.append(
+            result.context.compiled)
+        bind = db_session.get_bind()
+        event.listen(bind, "after_execute", listener)
+        try:
+            for _ in range(3):
+                statements.execute(db_session, "revenue_metrics", **params).first()
+        finally:
+            event.remove(bind, "after_execute", listener)
+        assert len({id(item) for item in compiled}) == 1
+    
+    def test_duplicate_names_rejected(self):
+        registry = StatementRegistry()
+        registry.register("count", statements.get("customer_count"))
+        with pytest.raises(ValueError):
+            registry.register("count", statements.get("customer_count"))
+
+
+class TestIdempotentImports:
+    
+    DAY_ONE = "2024-01-15,Coffee,4.50,C1,beverages\n2024-01-15,Coffee,4.50,C1,beverages\n"
+    DAY_TWO = "2024-01-16,Tea,3.00,C2,beverages\n"
+    HEADER = "date,product_name,amount,customer_id,category\n"
+    
+    def test_reimport_writes_only_new_rows(self, db_session):
+        """Test that an overlapping export only adds its new rows, and identical rows in one file both land"""
+        first = DataProcessor(db_session)
+        assert first.process_csv_content(self.HEADER + self.DAY_ONE) == (2, [])
+        
+        again = DataProcessor(db_session)
+        assert again.process_csv_content(self.HEADER + self.DAY_ONE + self.DAY_TWO) == (1, [])
+        assert again.duplicates_skipped == 2
+        assert db_session.query(func.count(Sale.id)).scalar() == 3
+        assert db_session.query(func.sum(Sale.amount_cents)).scalar() == 1200
+        
+        blind = DataProcessor(db_session, dedupe=False)
+        assert blind.process_csv_content(self.HEADER + self.DAY_TWO) == (1, [])
+        assert db_session.query(func.count(Sale.id)).scalar() == 4
+    
+    @pytest.mark.asyncio
+    async def test_corrected_rows_reported(self, db_session):
+        """Test that a re-export with a fixed amount reports the row it adds next to the old version"""
+        assert DataProcessor(db_session).process_csv_content(self.HEADER + self.DAY_ONE) == (2, [])
+        
+        # One amount corrected, a third identical sale and a new product - only the correction is reported
+        export = (self.HEADER + "2024-01-15,Coffee,4.50,C1,beverages\n2024-01-15,Coffee,5.00,C1,beverages\n"
+                  "2024-01-15,Coffee,4.50,C1,beverages\n2024-01-15,Coffee,4.50,C1,beverages\n2024-01-15,Tea,3.00,C1,\n")
+        processor = DataProcessor(db_session)
+        assert processor.process_csv_content(export) == (3, [])
+        assert processor.possible_corrections == [
+            "Possible correction (date=2024-01-15 00:00:00, product_name=Coffee, customer_id=C1): "
+            "differs from an earlier import, kept as a new row"
+        ]
+        
+        expenses = "date,description,amount,category\n2024-01-15,Rent,100.00,Operations\n"
+        service = CSVUploadService(db_session)
+        
+        def upload(content):
+            return UploadFile(filename="upload.csv", file=BytesIO(content.encode()))
+        assert (await service.upload_expenses_csv(upload(expenses)))["possible_corrections"] == []
+        result = await service.upload_expenses_csv(upload(expenses.replace("100.00", "110.00")))
+        assert result["processed_count"] == 1 and len(result["possible_corrections"]) == 1
+    
+    def test_unsupported_dialect_rejected(self):
+        connection = SimpleNamespace(dialect=SimpleNamespace(name="oracle"))
+        with pytest.raises(ValueError):
+            dialect_insert(connection, Sale.__table__)
+    
+    def test_row_hash_ordinals(self):
+        hasher = RowHasher(SALE_HASH_FIELDS)
+        row = {"date": datetime(2024, 1, 15), "product_name": "Coffee", "amount_cents": 450}
+        first, second = hasher(row), hasher(row)
+        assert first != second
+        assert RowHasher(SALE_HASH_FIELDS)(row) == first
+    
+    @pytest.mark.asyncio
+    async def test_csv_reupload_upserts(self, db_session):
+        """Test that re-uploaded customers update only changed rows and expenses are not duplicated"""
+        def upload(content):
+            return UploadFile(filename="upload.csv", file=BytesIO(content.encode()))
+        
+        customers = "id,name,email\nC1,Ann,ann@example.com\nC2,Bob,\n"
+        expenses = "date,description,amount,category\n2024-01-15,Rent,100.00,Operations\n"
+        service = CSVUploadService(db_session)
+        assert (await service.upload_customers_csv(upload(customers)))["processed_count"] == 2
+        assert (await service.upload_expenses_csv(upload(expenses)))["processed_count"] == 1
+        
+        result = await service.upload_customers_csv(upload(customers.replace("Bob", "Robert")))
+        assert (result["processed_count"], result["duplicates_skipped"]) == (1, 1)
+        assert db_session.get(Customer, "C2").name == "Robert"
+        
+        # Same rows under a new header order: past the import ledger, caught by the row hash
+        reordered = "description,date,amount,category\nRent,2024-01-15,100.00,Operations\n"
+        result = await service.upload_expenses_csv(upload(reordered))
+        assert (result["processed_count"], result["duplicates_skipped"]) == (0, 1)
+        assert db_session.query(func.count(Expense.id)).scalar() == 1
+    
+    @pytest.mark.asyncio
+    async def test_amounts_round_to_the_nearest_cent(self, db_session):
+        """Test that every import path rounds dollars to cents - int(19.99 * 100) truncated to 1998"""
+        def upload(content):
+            return UploadFile(filename="upload.csv", file=BytesIO(content.encode()))
+        
+        assert serialization.to_cents(19.99) == 1999
+        assert serialization.to_cents("0.29") == 29
+        assert parse_amount_cents("19.99") == 1999
+        service = CSVUploadService(db_session)
+        await service.upload_sales_csv(upload("date,product_name,amount\n2024-01-15,Coffee,19.99\n"))
+        await service.upload_expenses_csv(upload("date,description,amount\n2024-01-15,Rent,1150.29\n"))
+        
+        assert db_session.query(Sale.amount_cents).scalar() == 1999
+        assert db_session.query(Expense.amount_cents).scalar() == 115029
+    
+    def test_legacy_nan_rows_match_reimport(self, db_session):
+        """Test that rows stored with 'nan' for empty cells (hashed by the upsert_001 backfill) are not re-added"""
+        legacy = {"date": datetime(2024, 1, 15), "product_name": "Coffee", "amount_cents": 450,
+                  "customer_id": "nan", "category": "nan"}
+        db_session.add(Sale(**legacy, row_hash=RowHasher(SALE_HASH_FIELDS)(legacy)))
+        db_session.commit()
+        
+        processor = DataProcessor(db_session)
+        assert processor.process_csv_content(self.HEADER + "2024-01-15,Coffee,4.50,,\n") == (0, [])
+        assert processor.duplicates_skipped == 1
+        assert db_session.query(func.count(Sale.id)).scalar() == 1
+
+
+class TestImportLedger:
+    
+    HEADER = "date,product_name,amount,customer_id,category\n"
+    
+    def test_identical_file_skipped_and_changed_days_reprocessed(self, db_session):
+        """Test that a re-sent file is answered from the ledger and a re-export only processes new days"""
+        first = self.HEADER + "2024-01-15,Coffee,4.50,C1,beverages\n2024-01-16,Tea,3.00,C2,beverages\n"
+        assert DataProcessor(db_session).import_csv(first, "test") == (2, [])
+        
+        again = DataProcessor(db_session)
+        assert again.import_csv(first, "test") == (0, [])
+        assert again.plan.already_imported
+        
+        # Day 16 unchanged (rows reordered), day 17 new with an invalid row
+        export = (self.HEADER + "2024-01-16,Tea,3.00,C2,beverages\n2024-01-17,Cake,5.00,,food\n"
+                  "2024-01-17,Cake,-1,,food\n")
+        processor = DataProcessor(db_session)
+        processed, errors = processor.import_csv(export, "test")
+        assert processed == 1
+        assert processor.plan.chunks_skipped == 1
+        assert len(errors) == 1 and errors[0].startswith("Row 4:")  # Line of the original file
+        assert db_session.query(func.count(ImportFile.id)).scalar() == 1  # Failed imports are not recorded
+        assert db_session.query(func.count(Sale.id)).scalar() == 3
+    
+    def test_plan_chunks_by_day(self, db_session):
+        plan = ImportLedger(db_session).plan(
+            "sales", "test", self.HEADER + "2024-01-15 09:00,A,1,,\n\n2024-01-16,B,1,,\n2024-01-15 18:00,C,1,,\n",
+            chunk_column="date"
+        )
+        assert (plan.total_rows, plan.chunks, plan.row_index) == (3, 2, [0, 1, 2])
+        ImportLedger(db_session).record(plan, 3)
+        assert db_session.query(func.count()).select_from(ImportChunk).scalar() == 2
+        
+        replan = ImportLedger(db_session).plan(
+            "sales", "test", self.HEADER + "2024-01-15 18:00,C,1,,\n2024-01-15 09:00,A,1,,\n", chunk_column="date"
+        )
+        assert (replan.already_imported, replan.chunks_skipped, replan.row_index) == (False, 1, [])
+
+
+class TestSheetsSync:
+    
+    HEADER = ["date", "product_name", "amount", "customer_id", "category"]
+    
+    def sheet(self, *rows):
+        return FakeSheetsService({"Sales Log": [self.HEADER] + [list(row) for row in rows]})
+    
+    def test_incremental_sync_pages_and_resumes(self, db_session):
+        """Test that sync pages in row blocks, resumes after the cursor and keeps repeat sales"""
+        rows = [("2024-01-15", f"Item {i}", "2.00", "", "food") for i in range(7)]
+        fake = self.sheet(*rows)
+        connector = GoogleSheetsConnector(db_session, service=fake)
+        
+        assert connector.sync_sheet("fake-sheet", "Sales Log", block_rows=3) == (7, [])
+        assert fake.ranges == ["'Sales Log'!1:1", "'Sales Log'!2:4", "'Sales Log'!5:7", "'Sales Log'!8:10"]
+        assert db_session.get(SheetSyncState, ("fake-sheet", "Sales Log")).last_row == 8
+        
+        # Appended: a repeat of an earlier sale (same content, new row) and a new one
+        fake.sheets["Sales Log"] += [list(rows[0]), ["2024-01-16", "Cake", "5.00", "C1", ""]]
+        fake.ranges.clear()
+        assert connector.sync_sheet("fake-sheet", "Sales Log", block_rows=3) == (2, [])
+        assert fake.ranges == ["'Sales Log'!1:1", "'Sales Log'!9:11"]
+        assert db_session.query(func.count(Sale.id)).scalar() == 9
+        assert db_session.query(Sale).filter(Sale.customer_id.is_(None)).count() == 8
+    
+    def test_cursor_stops_before_invalid_row(self, db_session):
+        """Test that an invalid row is retried, and fixing it in place completes the sync"""
+        fake = self.sheet(("2024-01-15", "Tea", "3.00"), ("2024-01-15", "Tea", "oops"), ("2024-01-16", "Cake", "5.00"))
+        connector = GoogleSheetsConnector(db_session, service=fake)
+        
+        written, errors = connector.sync_sheet("fake-sheet", "Sales Log", block_rows=2)
+        assert (written, errors) == (2, ["Row 3: Invalid amount: oops"])
+        assert connector.sync_state.last_row == 2
+        
+        fake.sheets["Sales Log"][2][2] = "3.00"
+        assert connector.sync_sheet("fake-sheet", "Sales Log", block_rows=2) == (1, [])
+        assert connector.sync_state.last_row == 4
+        assert connector.duplicates_skipped == 1  # Row 4, re-read
+        assert db_session.query(func.sum(Sale.amount_cents)).scalar() == 1100
+    
+    def test_header_change_restarts_without_duplicates(self, db_session):
+        fake = self.sheet(("2024-01-15", "Tea", "3.00"))
+        connector = GoogleSheetsConnector(db_session, service=fake)
+        connector.sync_sheet("fake-sheet", "Sales Log")
+        
+        fake.sheets["Sales Log"] = [self.HEADER[:3] + ["note"], ["2024-01-15", "Tea", "3.00", "x"]]
+        assert connector.sync_sheet("fake-sheet", "Sales Log") == (0, [])
+        assert connector.sync_state.last_row == 2
+        assert GoogleSheetsConnector(db_session, service=fake).validate_sheet_access("fake-sheet")["sample_rows"] == 1
+        
+        assert connector.sync_sheet("unknown", "Sales Log") == (
+            0, ["Google Sheets sync error: Spreadsheet not found or not accessible: unknown"])
+        fake.sheets["Sales Log"][0] = ["date", "product_name"]
+        assert connector.sync_sheet("fake-sheet", "Sales Log") == (
+            0, ["Google Sheets sync error: Missing required columns: amount"])
+